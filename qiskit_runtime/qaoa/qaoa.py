@@ -12,17 +12,23 @@
 
 """A self-contained QAOA runtime with the SWAP strategies."""
 
-from typing import Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple, Union
+from time import time
 from warnings import warn
 
 import copy
-import retworkx as rx
+import hashlib
+import json
+import os
+import queue
+import threading
 import numpy as np
+from scipy.sparse import coo_matrix, spmatrix, tril
 
 from qiskit import QuantumCircuit
 from qiskit.algorithms import VQE
 from qiskit.algorithms.optimizers import SPSA
-from qiskit.circuit import ParameterVector, Parameter, Gate
+from qiskit.circuit import ParameterVector, Parameter, ParameterExpression, Gate, Qubit
 from qiskit.circuit.library import NLocal, EvolvedOperatorAnsatz
 from qiskit.circuit.exceptions import CircuitError
 from qiskit.circuit.quantumregister import QuantumRegister
@@ -59,8 +65,6 @@ from qiskit.transpiler.passes.optimization.echo_rzx_weyl_decomposition import (
     EchoRZXWeylDecomposition,
 )
 
-from qiskit_optimization import QuadraticProgram
-
 
 class Publisher:
     """Class used to publish interim results."""
@@ -69,10 +73,100 @@ class Publisher:
         self._messenger = messenger
 
     def callback(self, *args, **kwargs):
+        self._messenger.publish(self._format(*args, **kwargs))
+
+    def close(self):
+        """Publish all pending results."""
+
+    @staticmethod
+    def _format(*args, **kwargs):
         text = list(args)
         for k, v in kwargs.items():
             text.append({k: v})
-        self._messenger.publish(text)
+        return text
+
+
+class BatchedPublisher(Publisher):
+    """Class used to publish interim results in batches ``{"batch": [...]}`` from a thread.
+
+    This is the batched publisher of the VQE program without checkpoints, since each runtime
+    program is deployed as a single file. A batch is published once ``batch_size`` results are
+    collected or ``interval`` seconds have passed. Results which do not fit into the queue are
+    dropped and their number is published with the next batch as ``"dropped"``. The publisher
+    must be closed to publish the remaining results.
+    """
+
+    def __init__(self, messenger, interval=1.0, batch_size=100, max_queue_size=10000):
+        """
+        Args:
+            messenger: The messenger used to publish the results.
+            interval: The maximal time in seconds between two published batches.
+            batch_size: The maximal number of results in a batch.
+            max_queue_size: The maximal number of results waiting to be published.
+        """
+        super().__init__(messenger)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.dropped = 0
+
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def callback(self, *args, **kwargs):
+        try:
+            self._queue.put_nowait(("callback", (args, kwargs)))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def flush(self):
+        """Publish all results which are currently queued."""
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        done.wait()
+
+    def close(self):
+        """Publish all queued results and stop the background thread."""
+        if self._thread.is_alive():
+            self._queue.put(("close", None))
+            self._thread.join()
+
+    def _run(self):
+        batch = []
+        deadline = time() + self.interval
+        while True:
+            try:
+                kind, payload = self._queue.get(timeout=max(0, deadline - time()))
+            except queue.Empty:
+                kind, payload = None, None
+
+            if kind == "callback":
+                batch.append(self._format(*payload[0], **payload[1]))
+                if len(batch) < self.batch_size and time() < deadline:
+                    continue
+
+            if kind is None or kind == "callback":
+                self._publish_batch(batch)
+                batch = []
+                deadline = time() + self.interval
+            elif kind in ["flush", "close"]:
+                self._publish_batch(batch)
+                batch = []
+                if kind == "close":
+                    return
+                payload.set()
+
+    def _publish_batch(self, batch):
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+
+        if len(batch) > 0 or dropped > 0:
+            message = {"batch": batch}
+            if dropped > 0:
+                message["dropped"] = dropped
+            self._messenger.publish(message)
 
 
 # begin QAOA Gate
@@ -555,6 +649,158 @@ def line_coloring(num_vertices) -> Dict:
     return line_coloring
 
 
+def minimal_edge_coloring(coupling_map: CouplingMap) -> Dict[Tuple[int, int], int]:
+    """
+    Creates a proper edge coloring of the coupling map, i.e. edges sharing a vertex have
+    different colors. Bipartite coupling maps, such as lines, grids and heavy-hex lattices, are
+    colored with the minimal number of colors, i.e. the maximal degree, by recoloring alternating
+    paths (Kempe chains). Other coupling maps are colored with at most one color more than the
+    maximal degree with the algorithm of Misra and Gries.
+
+    Args:
+        coupling_map: The coupling map to color.
+
+    Returns:
+        Graph coloring as a dictionary with the edges in both directions as keys and the colors
+        as values.
+
+    Raises:
+        QiskitError: If no fan can be rotated in the algorithm of Misra and Gries, which cannot
+            happen for a proper partial coloring.
+    """
+    num_vertices = coupling_map.size()
+    edges = sorted({tuple(sorted(edge)) for edge in coupling_map.get_edges() if edge[0] != edge[1]})
+
+    neighbors = [set() for _ in range(num_vertices)]
+    for i, j in edges:
+        neighbors[i].add(j)
+        neighbors[j].add(i)
+
+    max_degree = max([len(vertex_neighbors) for vertex_neighbors in neighbors], default=0)
+
+    # colored[i][color] is the vertex connected to vertex i by an edge with this color
+    colored = [{} for _ in range(num_vertices)]
+
+    def free_color(vertex):
+        return min(set(range(max_degree + 1)) - set(colored[vertex].keys()))
+
+    def set_color(i, j, color):
+        colored[i][color] = j
+        colored[j][color] = i
+
+    def invert_path(start, color1, color2):
+        # swap the colors on the path alternating between color1 and color2 starting at start
+        path, vertex, color = [], start, color1
+        while color in colored[vertex]:
+            path.append((vertex, colored[vertex][color], color))
+            vertex = colored[vertex][color]
+            color = color2 if color == color1 else color1
+
+        for i, j, color in path:
+            del colored[i][color]
+            del colored[j][color]
+
+        for i, j, color in path:
+            set_color(i, j, color2 if color == color1 else color1)
+
+    if _is_bipartite(neighbors):
+        for i, j in edges:
+            color_i, color_j = free_color(i), free_color(j)
+            if color_i in colored[j]:
+                # the alternating path from j does not reach i in a bipartite graph
+                invert_path(j, color_i, color_j)
+
+            set_color(i, j, color_i)
+    else:
+        for vertex, neighbor in edges:
+            # build a maximal fan of vertex starting at the uncolored edge to neighbor
+            fan = [neighbor]
+            extended = True
+            while extended:
+                extended = False
+                for color, fan_vertex in colored[vertex].items():
+                    if fan_vertex not in fan and color not in colored[fan[-1]]:
+                        fan.append(fan_vertex)
+                        extended = True
+                        break
+
+            color_c, color_d = free_color(vertex), free_color(fan[-1])
+            invert_path(vertex, color_d, color_c)
+
+            # rotate the colors of the fan up to the first vertex where color d is free
+            end = _rotatable_fan_end(colored, vertex, fan, color_d)
+            if end is None:
+                raise QiskitError(
+                    f"No fan of vertex {vertex} can be rotated to color the edge to {neighbor}."
+                )
+
+            colors = [_edge_color(colored, vertex, fan[k]) for k in range(1, end + 1)]
+            for k, color in enumerate(colors):
+                del colored[vertex][color]
+                del colored[fan[k + 1]][color]
+
+            for k, color in enumerate(colors):
+                set_color(vertex, fan[k], color)
+
+            set_color(vertex, fan[end], color_d)
+
+    edge_coloring = {}
+    for i in range(num_vertices):
+        for color, j in colored[i].items():
+            edge_coloring[(i, j)] = color
+
+    return edge_coloring
+
+
+def _rotatable_fan_end(
+    colored: List[Dict[int, int]], vertex: int, fan: List[int], color: int
+) -> Optional[int]:
+    """Return the index of the first fan vertex where the color is free, or None.
+
+    The vertices up to the returned one must still form a fan of the vertex. After inverting the
+    alternating path in the algorithm of Misra and Gries such a fan vertex always exists.
+    """
+    for end, fan_vertex in enumerate(fan):
+        is_fan = all(
+            _edge_color(colored, vertex, fan[k]) not in colored[fan[k - 1]]
+            for k in range(1, end + 1)
+        )
+        if is_fan and color not in colored[fan_vertex]:
+            return end
+
+    return None
+
+
+def _is_bipartite(neighbors: List[Set[int]]) -> bool:
+    """Check whether the graph given by the neighbors of each vertex is bipartite."""
+    side = [None] * len(neighbors)
+    for root in range(len(neighbors)):
+        if side[root] is not None:
+            continue
+
+        side[root] = 0
+        stack = [root]
+        while stack:
+            vertex = stack.pop()
+            for neighbor in neighbors[vertex]:
+                if side[neighbor] is None:
+                    side[neighbor] = 1 - side[vertex]
+                    stack.append(neighbor)
+                elif side[neighbor] == side[vertex]:
+                    return False
+
+    return True
+
+
+def _edge_color(colored: List[Dict[int, int]], i: int, j: int) -> Optional[int]:
+    """Return the color of the edge (i, j), or None if it is not colored."""
+    for color, neighbor in colored[i].items():
+        if neighbor == j:
+            return color
+
+    return None
+
+
 class SwapStrategy:
     """A class representing SWAP strategies for coupling maps.
 
@@ -579,14 +825,15 @@ class SwapStrategy:
             edge_coloring: (Optional) edge coloring of the coupling map, specified as a set of
                 sets of edges (edges can be represented as lists, sets or tuples containing two
                 integers). The edge coloring is used for efficient gate parallelization when
-                using the swap strategy in a transpiler pass.
+                using the swap strategy in a transpiler pass. If None, a minimal edge coloring
+                is computed when it is first needed, see :func:`minimal_edge_coloring`.
         """
         self.coupling_map = copy.deepcopy(coupling_map)
         self.num_vertices = coupling_map.size()
         self.swap_layers = swap_layers
         self.edge_coloring = edge_coloring
         self._distance_matrix = None
-        self._inverse_composed_permutation = {0: list(range(self.num_vertices))}
+        self._permutations = None
 
     @property
     def coupling_map(self) -> CouplingMap:
@@ -597,8 +844,25 @@ class SwapStrategy:
     def coupling_map(self, coupling_map: CouplingMap) -> None:
         """Sets the coupling map of the SWAP strategy."""
         self._coupling_map = coupling_map
+        self._edge_coloring = None
         self._invalidate()
 
+    @property
+    def edge_coloring(self) -> Optional[Dict[Tuple[int, int], int]]:
+        """
+        Returns the edge coloring of the coupling map. If no coloring has been given, a minimal
+        edge coloring is computed once and cached until the coupling map changes.
+        """
+        if self._edge_coloring is None and self._coupling_map is not None:
+            self._edge_coloring = minimal_edge_coloring(self._coupling_map)
+
+        return self._edge_coloring
+
+    @edge_coloring.setter
+    def edge_coloring(self, edge_coloring: Optional[Dict[Tuple[int, int], int]]) -> None:
+        """Sets the edge coloring of the coupling map."""
+        self._edge_coloring = edge_coloring
+
     @property
     def swap_layers(self) -> List:
         """Returns the SWAP layers of the SWAP strategy."""
@@ -626,18 +890,11 @@ class SwapStrategy:
         if qubits is None:
             qubits = list(range(self.num_vertices))
 
-        max_distance = 0
-
-        for i in range(len(qubits)):
-            for j in range(i):
-                qubit1 = qubits[i]
-                qubit2 = qubits[j]
-                if self.distance_matrix[qubit1][qubit2] is None:
-                    return None
-
-                max_distance = max(max_distance, self.distance_matrix[qubit1][qubit2])
+        distances = self.distance_matrix[np.ix_(qubits, qubits)]
+        if np.any(distances < 0):
+            return None
 
-        return max_distance
+        return int(np.max(distances, initial=0))
 
     def __len__(self) -> int:
         """Return the length of the strategy as the number of layers."""
@@ -655,34 +912,93 @@ class SwapStrategy:
         return description
 
     @property
-    def distance_matrix(self) -> List[List]:
+    def distance_matrix(self) -> np.ndarray:
         """
-        Returns the distance matrix of the SWAP strategy as a nested list, where the entry (i,j)
+        Returns the distance matrix of the SWAP strategy as an integer array, where the entry (i,j)
         corresponds to the number of SWAP layers that need to be applied to obtain a connection
-        between physical qubits i and j.
+        between physical qubits i and j. The entry is -1 if the qubits are never connected.
 
         Returns:
-            Distance matrix for the SWAP strategy as a nested list.
+            Distance matrix for the SWAP strategy as an array.
         """
         self._check_configuration(raise_on_failure=True)
 
         # Only compute the distance matrix if it has not been computed before
         if self._distance_matrix is None:
-            distance_matrix = [[None] * self.num_vertices for _ in range(self.num_vertices)]
-
-            for i in range(self.num_vertices):
-                distance_matrix[i][i] = 0
-
-            for i in range(0, len(self.swap_layers) + 1):
-                for [j, k] in self.swapped_coupling_map(i).get_edges():
-                    if distance_matrix[j][k] is None:
-                        distance_matrix[j][k] = i
-                        distance_matrix[k][j] = i
+            permutations = self._permutation_array()
+            num_layers = len(permutations)
+
+            # the edges of the swapped coupling maps of all layers, shape (layers, edges, 2)
+            edges = np.array(self.coupling_map.get_edges(), dtype=int).reshape(-1, 2)
+            swapped_edges = permutations[:, edges]
+            layers = np.broadcast_to(np.arange(num_layers)[:, None], swapped_edges.shape[:2])
+
+            # the number of layers is larger than any distance and marks unreachable pairs
+            distance_matrix = np.full((self.num_vertices, self.num_vertices), num_layers)
+            np.fill_diagonal(distance_matrix, 0)
+            for j, k in [(0, 1), (1, 0)]:
+                np.minimum.at(
+                    distance_matrix,
+                    (swapped_edges[..., j].ravel(), swapped_edges[..., k].ravel()),
+                    layers.ravel(),
+                )
 
+            distance_matrix[distance_matrix == num_layers] = -1
             self._distance_matrix = distance_matrix
 
         return self._distance_matrix
 
+    def to_dict(self) -> Dict:
+        """
+        Serialize the SWAP strategy, including the precomputed permutations and distance
+        matrix, into a dictionary of lists that can be stored as JSON.
+
+        Returns:
+            The serialized SWAP strategy.
+        """
+        edge_coloring = None
+        if self.edge_coloring is not None:
+            edge_coloring = [[i, j, color] for (i, j), color in self.edge_coloring.items()]
+
+        return {
+            "num_vertices": self.num_vertices,
+            "coupling_map": [list(edge) for edge in self.coupling_map.get_edges()],
+            "swap_layers": [[list(edge) for edge in layer] for layer in self.swap_layers],
+            "edge_coloring": edge_coloring,
+            "permutations": self._permutation_array().tolist(),
+            "distance_matrix": self.distance_matrix.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "SwapStrategy":
+        """
+        Load a SWAP strategy serialized with :meth:`to_dict`. The permutations and the distance
+        matrix are loaded instead of being recomputed.
+
+        Args:
+            data: The serialized SWAP strategy.
+
+        Returns:
+            The SWAP strategy.
+        """
+        coupling_map = CouplingMap(couplinglist=data["coupling_map"])
+        for qubit in range(coupling_map.size(), data["num_vertices"]):
+            coupling_map.add_physical_qubit(qubit)
+
+        edge_coloring = None
+        if data["edge_coloring"] is not None:
+            edge_coloring = {(i, j): color for i, j, color in data["edge_coloring"]}
+
+        swap_strategy = SwapStrategy(
+            coupling_map=coupling_map,
+            swap_layers=[[tuple(edge) for edge in layer] for layer in data["swap_layers"]],
+            edge_coloring=edge_coloring,
+        )
+        swap_strategy._permutations = np.array(data["permutations"], dtype=int)
+        swap_strategy._distance_matrix = np.array(data["distance_matrix"], dtype=int)
+
+        return swap_strategy
+
     def permute_labels(self, permutation: List[int], inplace: bool = True):
         """
         Permute the labels of the underlying coupling map of the SWAP strategy
@@ -707,14 +1023,19 @@ class SwapStrategy:
             permuted_swap_layer = [(permutation[i], permutation[j]) for (i, j) in swap_layer]
             permuted_swap_layers.append(permuted_swap_layer)
 
+        permuted_edge_coloring = {
+            (permutation[i], permutation[j]): color for (i, j), color in self.edge_coloring.items()
+        }
+
         if inplace:
             self.coupling_map = permuted_coupling_map
             self.swap_layers = permuted_swap_layers
+            self.edge_coloring = permuted_edge_coloring
         else:
             return SwapStrategy(
                 coupling_map=permuted_coupling_map,
                 swap_layers=permuted_swap_layers,
-                edge_coloring=self.edge_coloring,
+                edge_coloring=permuted_edge_coloring,
             )
 
     def new_connections(self, idx: int) -> List[Set]:
@@ -729,13 +1050,8 @@ class SwapStrategy:
         Returns:
             A set of edges representing the new qubit connections
         """
-        connections = []
-        for i in range(self.num_vertices):
-            for j in range(i):
-                if self.distance_matrix[i][j] == idx:
-                    connections.append({i, j})
-
-        return connections
+        rows, columns = np.nonzero(np.tril(self.distance_matrix == idx, k=-1))
+        return [{int(i), int(j)} for i, j in zip(rows, columns)]
 
     def missing_couplings(self) -> Set[Tuple[int, int]]:
         """Returns the set of couplings that cannot be reached."""
@@ -772,11 +1088,10 @@ class SwapStrategy:
         Returns:
             The swapped coupling map.
         """
-        permutation = self.inverse_composed_permutation(idx)
-
-        edges = [[permutation[i], permutation[j]] for [i, j] in self.coupling_map.get_edges()]
+        permutation = self._permutation_array()[idx]
+        edges = np.array(self.coupling_map.get_edges(), dtype=int).reshape(-1, 2)
 
-        return CouplingMap(couplinglist=edges)
+        return CouplingMap(couplinglist=permutation[edges].tolist())
 
     def apply_swap_layer(self, list_to_swap: List, idx: int) -> List:
         """
@@ -810,7 +1125,7 @@ class SwapStrategy:
         Returns:
             The permutation as a list of integer values
         """
-        return self.invert_permutation(self.inverse_composed_permutation(idx))
+        return np.argsort(self._permutation_array()[idx]).tolist()
 
     def inverse_composed_permutation(self, idx) -> List[int]:
         """
@@ -824,20 +1139,32 @@ class SwapStrategy:
         Returns:
             The inversed permutation as a list of integer values
         """
-        # Only compute the inverse permutation if it has not been computed before
+        return self._permutation_array()[idx].tolist()
+
+    def _permutation_array(self) -> np.ndarray:
+        """
+        Returns the inversed composed permutations of all SWAP layers as an integer array of
+        shape (number of layers + 1, number of vertices), where row idx is the permutation after
+        applying idx SWAP layers.
+        """
+        # Only compute the permutations if they have not been computed before
         self._check_configuration(raise_on_failure=True)
-        try:
-            return self._inverse_composed_permutation[idx]
+        if self._permutations is None:
+            permutations = np.empty((len(self.swap_layers) + 1, self.num_vertices), dtype=int)
+            permutations[0] = np.arange(self.num_vertices)
 
-        except KeyError:
-            if idx == 0:
-                return list(range(self.num_vertices))
+            for idx, swap_layer in enumerate(self.swap_layers):
+                # applying the layer to a list x gives x[layer], so layers compose by indexing
+                layer = np.arange(self.num_vertices)
+                for edge in swap_layer:
+                    (i, j) = tuple(edge)
+                    layer[i], layer[j] = layer[j], layer[i]
 
-            self._inverse_composed_permutation[idx] = self.apply_swap_layer(
-                self.inverse_composed_permutation(idx - 1), idx - 1
-            )
+                permutations[idx + 1] = permutations[idx][layer]
 
-            return self._inverse_composed_permutation[idx]
+            self._permutations = permutations
+
+        return self._permutations
 
     @staticmethod
     def invert_permutation(permutation: List) -> List:
@@ -866,7 +1193,7 @@ class SwapStrategy:
     def _invalidate(self) -> None:
         """Reset all precomputed properties of the SWAP strategy"""
         self._distance_matrix = None
-        self._inverse_composed_permutation = {}
+        self._permutations = None
 
     def _check_configuration(self, raise_on_failure: bool = True) -> bool:
         """
@@ -914,8 +1241,8 @@ class SwapStrategy:
             vertex_mapping: An optional mapping between vertices of the old and the new coupling
                 map. If None, a trivial mapping (0 -> 0, 1 -> 1, etc.) is used
             retain_edge_coloring: Specifies whether edge coloring of old SWAP strategy should be
-                used in the embedded strategy. Note that this can lead to an incomplete coloring
-                in the new strategy.
+                used in the embedded strategy. If the retained coloring does not cover all edges
+                of the new coupling map, a new coloring is computed instead.
 
         Returns:
             The new SWAP strategy obtained from embedding the existing SWAP strategy in the new
@@ -934,13 +1261,15 @@ class SwapStrategy:
         for swap_layer in self.swap_layers:
             swap_layers.append([(vertex_mapping[i], vertex_mapping[j]) for (i, j) in swap_layer])
 
-        if retain_edge_coloring and self.edge_coloring is not None:
+        edge_coloring = None
+        if retain_edge_coloring:
             edge_coloring = {
                 (vertex_mapping[i], vertex_mapping[j]): self.edge_coloring[(i, j)]
                 for (i, j) in self.edge_coloring.keys()
             }
-        else:
-            edge_coloring = None
+
+            if any(tuple(edge) not in edge_coloring for edge in coupling_map.get_edges()):
+                edge_coloring = None
 
         return SwapStrategy(
             coupling_map=coupling_map,
@@ -987,10 +1316,16 @@ class LineSwapStrategy(SwapStrategy):
             couplings.append((line[idx], line[idx + 1]))
             couplings.append((line[idx + 1], line[idx]))
 
+        # the line coloring is defined on the positions in the line
+        edge_coloring = {
+            (line[i], line[j]): color
+            for (i, j), color in line_coloring(num_vertices=len(line)).items()
+        }
+
         super().__init__(
             coupling_map=CouplingMap(couplings),
             swap_layers=swap_layers,
-            edge_coloring=line_coloring(num_vertices=len(line)),
+            edge_coloring=edge_coloring,
         )
 
 
@@ -1371,6 +1706,14 @@ class HWQAOAAnsatz(QAOAAnsatz):
         self._swapped_layout = None
         self._cost_matrix = None
 
+        # the layouts as integer arrays, set when the circuit is built
+        self._layout_positions = None
+        self._final_positions = None
+        self._circuit_indices = None
+
+        # the parameters of the reps, set when the circuit is built
+        self._qaoa_parameters = None
+
         super().__init__(
             cost_operator=cost_operator,
             reps=reps,
@@ -1433,7 +1776,9 @@ class HWQAOAAnsatz(QAOAAnsatz):
         self._cost_operator = cost_operator
         self._invalidate()
         self._num_logical_qubits = cost_operator.num_qubits if cost_operator else None
-        self._cost_matrix = self._get_cost_matrix(cost_operator) if cost_operator else None
+        self._cost_matrix = (
+            self._get_cost_matrix(cost_operator, sparse=True) if cost_operator else None
+        )
 
     @property
     def swap_strategy(self) -> Optional[SwapStrategy]:
@@ -1459,25 +1804,64 @@ class HWQAOAAnsatz(QAOAAnsatz):
         self._invalidate()
 
     @staticmethod
-    def _get_cost_matrix(cost_operator: OperatorBase) -> np.array:
-        """Returns the cost matrix of a cost operator
+    def _get_cost_matrix(
+        cost_operator: OperatorBase, sparse: bool = False
+    ) -> Union[np.ndarray, spmatrix]:
+        r"""Returns the cost matrix of a cost operator
+
+        The cost matrix is the symmetric matrix of the binary quadratic program with the
+        variables :math:`x_i = (1 - z_i) / 2`, with the linear coefficients on the diagonal. For
+        the Ising operator :math:`\sum_{i<j} w_{ij} Z_i Z_j + \sum_i h_i Z_i` the entries are
+        :math:`M_{ij} = 2 w_{ij}` and :math:`M_{ii} = -2 h_i - 2 \sum_j w_{ij}`. They are read
+        directly from the Z bits of the Paulis.
 
         Args:
-            cost_operator: An operator representing the cost of an optimization problem.
+            cost_operator: A :class:`PauliSumOp` representing the cost of an optimization problem.
+                Identity terms only shift the cost and are ignored.
+            sparse: If True, a ``scipy.sparse`` matrix is returned instead of an array.
 
         Returns:
-            The corresponding cost matrix as a nested list.
+            The corresponding cost matrix.
+
+        Raises:
+            QiskitError: If the cost operator is not a :class:`PauliSumOp`, contains X or Y terms,
+                or terms on more than two qubits.
         """
-        # TODO: Add check for cost operator?
-        quadratic_program = QuadraticProgram()
-        quadratic_program.from_ising(qubit_op=cost_operator)
-        size = len(quadratic_program.variables)
-        objective = quadratic_program.objective
-        matrix = objective.quadratic.to_array(symmetric=True)
-        linear_coeff = objective.linear.to_array()
+        if not isinstance(cost_operator, PauliSumOp):
+            raise QiskitError(
+                f"The cost operator must be a PauliSumOp, not {type(cost_operator).__name__}."
+            )
+
+        paulis = cost_operator.primitive.paulis
+        coeffs = np.real(cost_operator.primitive.coeffs * cost_operator.coeff)
+
+        if np.any(paulis.x):
+            raise QiskitError("The cost operator must only consist of Pauli Z and I terms.")
 
-        for i in range(size):
-            matrix[i][i] += linear_coeff[i]
+        order = np.sum(paulis.z, axis=1)
+        if np.any(order > 2):
+            raise QiskitError("The cost operator must not contain terms on more than two qubits.")
+
+        # the linear terms contribute -2 h_i to the diagonal
+        linear_qubits = np.nonzero(paulis.z[order == 1])[1]
+        linear_values = -2 * coeffs[order == 1]
+
+        # the quadratic terms contribute 2 w_ij off the diagonal and -2 w_ij to the diagonal
+        pairs = np.nonzero(paulis.z[order == 2])[1].reshape(-1, 2)
+        quadratic_values = 2 * coeffs[order == 2]
+
+        rows = np.concatenate((linear_qubits, pairs[:, 0], pairs[:, 1], pairs[:, 0], pairs[:, 1]))
+        cols = np.concatenate((linear_qubits, pairs[:, 1], pairs[:, 0], pairs[:, 0], pairs[:, 1]))
+        values = np.concatenate(
+            (linear_values, np.tile(quadratic_values, 2), -np.tile(quadratic_values, 2))
+        )
+
+        size = cost_operator.num_qubits
+        if sparse:
+            return coo_matrix((values, (rows, cols)), shape=(size, size)).tocsr()
+
+        matrix = np.zeros((size, size))
+        np.add.at(matrix, (rows, cols), values)
 
         return matrix
 
@@ -1575,48 +1959,16 @@ class HWQAOAAnsatz(QAOAAnsatz):
         if self._initial_layout is None:
             self._initial_layout = Layout.generate_trivial_layout(*self.qregs)
 
-        # Order qubit pairs by the minimal number of steps after which they are adjacent during
-        # the SWAP process, i.e. by the SWAP layer depth after which the corresponding
-        # interaction can be applied
-        distance_matrix = self.swap_strategy.distance_matrix
-        gate_layers = {}
-        for i in range(self._num_logical_qubits):
-            for j in range(i):
-
-                rotation_angle = self._cost_matrix[i][j]
-
-                if np.isclose(rotation_angle, 0):
-                    continue
-
-                distance = distance_matrix[self.initial_layout.get_virtual_bits()[self.qubits[i]]][
-                    self.initial_layout.get_virtual_bits()[self.qubits[j]]
-                ]
-
-                if distance not in gate_layers.keys():
-                    gate_layers[distance] = {(i, j): rotation_angle}
-                else:
-                    gate_layers[distance][(i, j)] = rotation_angle
-
-        max_distance = max(gate_layers.keys())
-        final_permutation = self.swap_strategy.composed_permutation(idx=max_distance)
-        self._swapped_layout = Layout()
-        self._swapped_layout.from_dict(
-            {
-                self.initial_layout.get_physical_bits()[i]: final_permutation[i]
-                for i in range(self._num_physical_qubits)
-            }
-        )
-
-        # Apply QAOA layers
+        # Apply QAOA layers, stamped out from the parameterized even and odd layer
+        even_layer, odd_layer, cost_parameter, mixer_parameter = self._layer_templates(self.qubits)
         qaoa_circuit = QuantumCircuit(*self.qregs, name=self.name)
         parameters = ParameterVector("t", 2 * self.reps)
+        self._qaoa_parameters = parameters
         for i in range(self.reps):
+            layer = odd_layer if i % 2 == 1 else even_layer
             qaoa_circuit.compose(
-                self._mapped_qaoa_layer(
-                    mixer_parameter=parameters[2 * i + 1],
-                    cost_parameter=parameters[2 * i],
-                    rzz_layers=gate_layers,
-                    reverse_ops=(i % 2 == 1),
+                layer.assign_parameters(
+                    {cost_parameter: parameters[2 * i], mixer_parameter: parameters[2 * i + 1]}
                 ),
                 inplace=True,
             )
@@ -1637,8 +1989,155 @@ class HWQAOAAnsatz(QAOAAnsatz):
 
         self.append(instr, self.qubits)
 
+    def build_dag(self, parameter_values: Optional[List] = None) -> DAGCircuit:
+        r"""
+        Builds the mapped QAOA circuit directly as DAG with the parameters assigned to the given
+        values. This gives the same as decomposing the circuit with assigned parameters and
+        converting it to a DAG, but the instructions of the layer templates are copied straight
+        into the DAG without building the circuit, wrapping it into a gate and decomposing it.
+
+        Args:
+            parameter_values: The values of the cost and mixer parameters of the reps, in the order
+                :math:`(\gamma_1, \beta_1, \gamma_2, \beta_2, ...)` of the circuit parameters.
+                The values can be numbers or parameter expressions. If None, the parameters of
+                the circuit are used, which requires building the circuit.
+
+        Returns:
+            The mapped QAOA circuit as DAG.
+        """
+        if self.swap_strategy is None:
+            circuit = self if parameter_values is None else self.assign_parameters(parameter_values)
+            return circuit_to_dag(circuit.decompose())
+
+        self._check_configuration()
+
+        qr = QuantumRegister(self.num_qubits, "q")
+        if self._initial_layout is None:
+            self._initial_layout = Layout.generate_trivial_layout(qr)
+
+        if parameter_values is None:
+            self._build()
+            parameter_values = self._qaoa_parameters
+
+        even_layer, odd_layer, cost_parameter, mixer_parameter = self._layer_templates(list(qr))
+
+        dag = DAGCircuit()
+        dag.name = self.name
+        dag.add_qreg(qr)
+
+        # Prepend an initial state (defaults to the equal superposition state if not specified)
+        if self.initial_state:
+            indices = {qubit: idx for idx, qubit in enumerate(self.initial_state.qubits)}
+            for instruction, qargs, _ in self.initial_state.data:
+                dag.apply_operation_back(
+                    copy.copy(instruction), [qr[indices[qubit]] for qubit in qargs], []
+                )
+
+        # Apply QAOA layers, stamped out from the parameterized even and odd layer
+        indices = {qubit: idx for idx, qubit in enumerate(even_layer.qubits)}
+        for i in range(self.reps):
+            layer = odd_layer if i % 2 == 1 else even_layer
+            values = {
+                cost_parameter: parameter_values[2 * i],
+                mixer_parameter: parameter_values[2 * i + 1],
+            }
+            for instruction, qargs, _ in layer.data:
+                dag.apply_operation_back(
+                    _assign_instruction(instruction, values),
+                    [qr[indices[qubit]] for qubit in qargs],
+                    [],
+                )
+
+        return dag
+
+    def _layer_templates(
+        self, qubits: List[Qubit]
+    ) -> Tuple[QuantumCircuit, Optional[QuantumCircuit], Parameter, Parameter]:
+        """
+        Creates the mapped QAOA layers of the even and odd reps with placeholder parameters. The
+        layers only differ between the reps by their parameters, such that the circuit is built
+        by assigning the parameters of each rep to these templates. This also sets the swapped
+        layout and the layouts as integer arrays.
+
+        Args:
+            qubits: The virtual qubits of the circuit, mapped by the initial layout.
+
+        Returns:
+            The even layer, the odd layer (None if there is only one rep), the cost parameter and
+            the mixer parameter of the layers.
+        """
+        # The nonzero interactions (i, j) with i > j as sparse edge list
+        interactions = tril(self._cost_matrix, k=-1).tocoo()
+        nonzero = ~np.isclose(interactions.data, 0)
+        rows, cols = interactions.row[nonzero], interactions.col[nonzero]
+        angles = interactions.data[nonzero]
+        order = np.lexsort((cols, rows))
+        rows, cols, angles = rows[order], cols[order], angles[order]
+
+        # The single qubit rotations are given by the row sums of the cost matrix
+        linear_angles = -2 * np.asarray(self._cost_matrix.sum(axis=1)).ravel()
+
+        # Order qubit pairs by the minimal number of steps after which they are adjacent during
+        # the SWAP process, i.e. by the SWAP layer depth after which the corresponding
+        # interaction can be applied
+        virtual_bits = self.initial_layout.get_virtual_bits()
+        positions = np.array(
+            [virtual_bits[qubits[i]] for i in range(self._num_logical_qubits)], dtype=int
+        )
+        distances = self.swap_strategy.distance_matrix[positions[rows], positions[cols]]
+
+        order = np.argsort(distances, kind="stable")
+        layer_distances, starts = np.unique(distances[order], return_index=True)
+        gate_layers = {
+            int(distance): (rows[indices], cols[indices], angles[indices])
+            for distance, indices in zip(layer_distances, np.split(order, starts[1:]))
+        }
+
+        max_distance = max(gate_layers.keys(), default=0)
+        final_permutation = self.swap_strategy.composed_permutation(idx=max_distance)
+        physical_bits = self.initial_layout.get_physical_bits()
+        self._swapped_layout = Layout()
+        self._swapped_layout.from_dict(
+            {physical_bits[i]: final_permutation[i] for i in range(self._num_physical_qubits)}
+        )
+
+        # Translate the layouts once into integer arrays: the positions in the coupling map of
+        # the logical qubits before and after the SWAP layers, and the index of the circuit
+        # qubit at each position
+        qubit_indices = {
+            qubit: idx for idx, qubit in enumerate(QuantumCircuit(self._num_physical_qubits).qubits)
+        }
+        self._layout_positions = positions
+        self._final_positions = np.asarray(final_permutation, dtype=int)[positions]
+        self._circuit_indices = [
+            qubit_indices[physical_bits[i]] for i in range(self._num_physical_qubits)
+        ]
+
+        # Build the layers with placeholder parameters
+        cost_parameter = Parameter("γ")
+        mixer_parameter = Parameter("β")
+        even_layer = self._mapped_qaoa_layer(
+            mixer_parameter=mixer_parameter,
+            cost_parameter=cost_parameter,
+            rzz_layers=gate_layers,
+            reverse_ops=False,
+            linear_angles=linear_angles,
+        )
+
+        odd_layer = None
+        if self.reps > 1:
+            odd_layer = self._mapped_qaoa_layer(
+                mixer_parameter=mixer_parameter,
+                cost_parameter=cost_parameter,
+                rzz_layers=gate_layers,
+                reverse_ops=True,
+                linear_angles=linear_angles,
+            )
+
+        return even_layer, odd_layer, cost_parameter, mixer_parameter
+
     def _mapped_qaoa_layer(
-        self, mixer_parameter, cost_parameter, rzz_layers, reverse_ops=False
+        self, mixer_parameter, cost_parameter, rzz_layers, reverse_ops=False, linear_angles=None
     ) -> QuantumCircuit:
         """
         Creates a single mapped QAOA layer with specified parameters and rzz_layers. The mapped
@@ -1649,10 +2148,12 @@ class HWQAOAAnsatz(QAOAAnsatz):
             cost_parameter: Parameter to use for cost layer
             rzz_layers: RZZ layers specified as a dictionary with integer keys corresponding to the
                 layer index and values corresponding to the RZZ gates in the layer. RZZ gates are
-                specified as dictionaries with integer tuples specifying the corresponding qubit
-                pairs as keys and rotational angles as values.
+                specified as sparse edge lists, i.e. a tuple of arrays with the first qubits, the
+                second qubits and the rotational angles.
             reverse_ops: Reverses the QAOA layer by reversing the order of the instructions. This
                 allows us to alternate between even and odd layers.
+            linear_angles: The angles of the single qubit rotations of each logical qubit. If None,
+                they are computed from the cost matrix.
 
         Returns:
             The mapped QAOA layer as a quantum circuit
@@ -1662,95 +2163,64 @@ class HWQAOAAnsatz(QAOAAnsatz):
         qaoa_cost_layer = QuantumCircuit(self._num_physical_qubits)
 
         # Applying Ising gates for single qubit rotations
-        for j in range(self._num_logical_qubits):
-            rotation_angle = 0
-            for k in range(self._num_logical_qubits):
-                rotation_angle -= self._cost_matrix[j][k]
-                rotation_angle -= self._cost_matrix[k][j]
+        if linear_angles is None:
+            linear_angles = -2 * np.asarray(self._cost_matrix.sum(axis=1)).ravel()
 
-            if abs(rotation_angle) > 1.0e-14:
-                qaoa_cost_layer.rz(rotation_angle * cost_parameter, j)
+        for j in np.nonzero(np.abs(linear_angles) > 1.0e-14)[0]:
+            qaoa_cost_layer.rz(linear_angles[j] * cost_parameter, int(j))
 
         # Iterate over and apply gate layers
-        max_distance = max(rzz_layers.keys())
-        current_layout = Layout()
+        max_distance = max(rzz_layers.keys(), default=0)
+        circuit_indices = self._circuit_indices
+        edge_coloring = self.swap_strategy.edge_coloring
+        num_colors = max(edge_coloring.values(), default=-1) + 1
         for i in range(max_distance + 1):
-            # Set the current layout depending on the number of SWAP layers already applied
-            current_permutation = self.swap_strategy.composed_permutation(idx=i)
-            current_layout.from_dict(
-                {
-                    self.initial_layout.get_physical_bits()[j]: current_permutation[j]
-                    for j in range(self._num_physical_qubits)
-                }
-            )
-            # Determine SWAP gates in upcoming SWAP layer
-            try:
-                upcoming_swaps = copy.copy(self.swap_strategy.swap_layers[i])
-            except IndexError:
-                upcoming_swaps = []
+            # The positions of the logical qubits after the SWAP layers already applied
+            current_permutation = np.asarray(self.swap_strategy.composed_permutation(idx=i))
+            current_positions = current_permutation[self._layout_positions]
+
+            # Determine SWAP gates in upcoming SWAP layer, as ordered set
+            upcoming_swaps = {}
+            if i < len(self.swap_strategy.swap_layers):
+                upcoming_swaps = {tuple(swap): None for swap in self.swap_strategy.swap_layers[i]}
 
             # Get current layer and replace the problem indices j,k by the corresponding
             # positions in the coupling map
-            rzz_layer = rzz_layers.get(i, {})
-            rzz_layer = {
-                (
-                    current_layout.get_virtual_bits()[self.qubits[j]],
-                    current_layout.get_virtual_bits()[self.qubits[k]],
-                ): rotation_angle
-                for (j, k), rotation_angle in rzz_layer.items()
-            }
+            rzz_layer = []
+            if i in rzz_layers:
+                rows, cols, angles = rzz_layers[i]
+                rzz_layer = zip(
+                    current_positions[rows].tolist(),
+                    current_positions[cols].tolist(),
+                    angles.tolist(),
+                )
 
             # Build a list of RZZ gates that overlap with next SWAP layer and should be applied at
-            # the end of the current RZZ layer to cancel as many CNOT gates as possible.
+            # the end of the current RZZ layer to cancel as many CNOT gates as possible. The other
+            # gates are sorted into sub layers according to the edge coloring of the swap strategy
             final_sublayer = {}
-            layer_new = {}
-            for (j, k), rotation_angle in rzz_layer.items():
+            sublayers = [{} for _ in range(num_colors)]
+            for j, k, rotation_angle in rzz_layer:
                 if (j, k) in upcoming_swaps:
                     final_sublayer[(j, k)] = rotation_angle
-                    upcoming_swaps.remove((j, k))
-                if (k, j) in upcoming_swaps:
+                    del upcoming_swaps[(j, k)]
+                elif (k, j) in upcoming_swaps:
                     final_sublayer[(j, k)] = rotation_angle
-                    upcoming_swaps.remove((k, j))
+                    del upcoming_swaps[(k, j)]
                 else:
-                    layer_new[(j, k)] = rotation_angle
-            rzz_layer = layer_new
-
-            # Build sub layers according to graph coloring or greedily if no graph
-            # coloring has been specified TODO: outsource this to a single function?
-            edge_coloring = self.swap_strategy.edge_coloring
-            if edge_coloring is not None:
-                sublayers = [{} for _ in range(max(edge_coloring.values()) + 1)]
-                for edge, rotation_angle in rzz_layer.items():
-                    sublayers[edge_coloring[edge]][edge] = rotation_angle
-            else:
-                sublayers = []
-                while rzz_layer:
-                    current_layer = {}
-                    remaining_gates = {}
-                    blocked_vertices = set()
-                    for edge, rotation_angle in rzz_layer.items():
-                        if all([j not in blocked_vertices for j in edge]):
-                            current_layer[edge] = rotation_angle
-                            blocked_vertices = blocked_vertices.union(edge)
-                        else:
-                            remaining_gates[edge] = rotation_angle
-                    rzz_layer = remaining_gates
-                    sublayers.append(current_layer)
+                    sublayers[edge_coloring[(j, k)]][(j, k)] = rotation_angle
 
             # Apply sub-layers
             for sublayer in sublayers:
-                for edge, rotation_angle in sublayer.items():
-                    (j, k) = map(
-                        lambda vertex: self.initial_layout.get_physical_bits()[vertex],
-                        edge,
-                    )
+                for (j, k), rotation_angle in sublayer.items():
+                    j, k = circuit_indices[j], circuit_indices[k]
                     qaoa_cost_layer.cx(j, k)
                     qaoa_cost_layer.rz(rotation_angle * cost_parameter, k)
                     qaoa_cost_layer.cx(j, k)
 
             # Apply final sublayer
-            for edge, rotation_angle in final_sublayer.items():
-                (j, k) = map(lambda vertex: self.initial_layout.get_physical_bits()[vertex], edge)
+            for (j, k), rotation_angle in final_sublayer.items():
+                j, k = circuit_indices[j], circuit_indices[k]
                 qaoa_cost_layer.cx(j, k)
                 qaoa_cost_layer.rz(rotation_angle * cost_parameter, k)
 
@@ -1763,11 +2233,8 @@ class HWQAOAAnsatz(QAOAAnsatz):
 
             # Apply SWAP gates
             if i < max_distance:
-                for swap in upcoming_swaps:
-                    (j, k) = map(
-                        lambda vertex: self.initial_layout.get_physical_bits()[vertex],
-                        swap,
-                    )
+                for (j, k) in upcoming_swaps:
+                    j, k = circuit_indices[j], circuit_indices[k]
                     qaoa_cost_layer.cx(j, k)
                     qaoa_cost_layer.cx(k, j)
                     qaoa_cost_layer.cx(j, k)
@@ -1780,14 +2247,33 @@ class HWQAOAAnsatz(QAOAAnsatz):
         else:
             qaoa_layer = qaoa_cost_layer
             for i in range(self._num_logical_qubits):
-                idx = self.initial_layout.get_physical_bits()[
-                    self._swapped_layout.get_virtual_bits()[self.qubits[i]]
-                ]
-                qaoa_layer.rx(2.0 * mixer_parameter, idx)
+                qaoa_layer.rx(2.0 * mixer_parameter, circuit_indices[self._final_positions[i]])
 
         return qaoa_layer
 
 
+def _assign_instruction(instruction, values: Dict[Parameter, Any]):
+    """Return a copy of the instruction with the parameters in ``values`` assigned."""
+    assigned = copy.copy(instruction)
+
+    params = []
+    for param in instruction.params:
+        if isinstance(param, ParameterExpression):
+            for parameter, value in values.items():
+                if parameter in param.parameters:
+                    param = param.assign(parameter, value)
+
+            # fully bound parameters are validated but stay parameter expressions, as when
+            # assigning in a circuit
+            if not param.parameters:
+                param = instruction.validate_parameter(param)
+
+        params.append(param)
+
+    assigned.params = params
+    return assigned
+
+
 class QAOASwapPass(TransformationPass):
     """A transpiler pass for QAOA circuits."""
 
@@ -1829,10 +2315,8 @@ class QAOASwapPass(TransformationPass):
                     initial_layout=qaoa_layout,
                 )
 
-                # Reassign the parameters to those of the original circuit.
-                rebound = qaoa.assign_parameters(op.params)
-
-                dag.substitute_node_with_dag(node, circuit_to_dag(rebound.decompose()))
+                # Build the circuit directly as DAG with the parameters of the original circuit.
+                dag.substitute_node_with_dag(node, qaoa.build_dag(op.params))
 
         mapping = self.property_set.get("qaoa_swap_layout", None)
         if mapping is not None:
@@ -1847,9 +2331,17 @@ class SwapStrategyCreator(AnalysisPass):
     This class analyses the coupling map to first see if a line swap strategy can be used.
     The best line is determined based on the fidelity of the two-qubit gates. If the backend
     has enough qubits but no simple path can be found (i.e. no line) then a swap strategy
-    from the swap strategy library is used.
+    from the swap strategy library is used. If a cache directory is given, the created swap
+    strategies are stored there, keyed by the backend, its coupling map and calibration, the
+    two-qubit gate, whether the fidelity is used and the problem size, such that later runs on
+    the same device load them instead of creating them. The directory is on the machine that
+    runs the pass, so the cache only helps if that machine keeps its files between runs.
     """
 
+    # the best paths found in this process, keyed by the backend, calibration date, two-qubit
+    # gate, use of the fidelity and length
+    _path_cache = {}
+
     def __init__(
         self,
         backend: Backend,
@@ -1857,6 +2349,7 @@ class SwapStrategyCreator(AnalysisPass):
         use_fidelity: bool = True,
         swap_strategy: Optional[SwapStrategy] = None,
         swap_strategy_qubits: Optional[List[int]] = None,
+        cache_dir: Optional[str] = None,
     ):
         """
         Args:
@@ -1872,6 +2365,10 @@ class SwapStrategyCreator(AnalysisPass):
                 to run on. If this list is None (the default value) then the qubits
                 will be determined based on the problem size and optionally the fidelity
                 of the two-qubit gates.
+            cache_dir: A directory to store the created swap strategies in and to load them from.
+                If None (the default) the swap strategies are not cached. The swap strategies
+                are not cached either if the fidelity is used but the backend properties have
+                no calibration date, since the cache could not tell when they are outdated.
         """
         super().__init__()
 
@@ -1886,9 +2383,20 @@ class SwapStrategyCreator(AnalysisPass):
         self._two_qubit_fidelity = {}
         self._max_problem_size = backend.configuration().num_qubits
         self._name = backend.name()
+        self._two_qubit_gate = two_qubit_gate
         self._use_fidelity = use_fidelity
+        self._cache_dir = cache_dir
 
         props = backend.properties()
+
+        # the best path depends on the gate fidelities, which change with each calibration
+        self._properties_date = None
+        if use_fidelity and getattr(props, "last_update_date", None) is not None:
+            self._properties_date = str(props.last_update_date)
+
+        if use_fidelity and self._properties_date is None:
+            self._cache_dir = None
+
         for edge in coupling_map:
             self._two_qubit_fidelity[tuple(edge)] = 1 - props.gate_error(two_qubit_gate, edge)
 
@@ -1904,37 +2412,105 @@ class SwapStrategyCreator(AnalysisPass):
             )
 
     def find_path(self, length: int) -> Optional[List[int]]:
-        """Find the paths of the coupling map with the appropriate length.
+        """Find the path of the coupling map with the appropriate length and highest fidelity.
+
+        The path maximizes the fidelity computed by :meth:`evaluate_path`, i.e. the sum of the
+        logarithms of the two-qubit gate fidelities. It is found with a depth-first search that
+        follows the best edges first and prunes partial paths which cannot improve on the best
+        path found so far, even if all their remaining edges had the highest fidelity. If the
+        fidelity is not used, the first path that is found is returned. The paths are cached per
+        backend, calibration date, two-qubit gate and length, unless the fidelity is used and the
+        backend properties have no calibration date.
 
         Args:
-            length: The length of the simple path to find.
+            length: The number of qubits in the simple path to find.
 
         Returns:
             The best path that could be found. If no path was found then None is returned.
         """
+        if self._use_fidelity and self._properties_date is None:
+            return self._search_path(length)
 
-        paths, size = [], self._coupling_map.size()
+        key = (self._name, self._properties_date, self._two_qubit_gate, self._use_fidelity, length)
+        if key not in self._path_cache:
+            SwapStrategyCreator._path_cache[key] = self._search_path(length)
 
-        for node1 in range(size):
-            for node2 in range(node1 + 1, size):
-                paths.extend(
-                    rx.all_simple_paths(
-                        self._coupling_map.graph,
-                        node1,
-                        node2,
-                        min_depth=length,
-                        cutoff=length,
-                    )
-                )
-        if len(paths) == 0:
+        path = self._path_cache[key]
+        return None if path is None else list(path)
+
+    def _search_path(self, length: int) -> Optional[List[int]]:
+        """Search the path with the highest fidelity by branch and bound, see :meth:`find_path`."""
+        size = self._coupling_map.size()
+        if length < 2 or length > size:
             return None
 
-        if not self._use_fidelity:
-            return paths[0]
+        # the neighbors of each node with the log-fidelity of the edge, best edges first
+        neighbors = {node: [] for node in range(size)}
+        for edge in self._coupling_map.get_edges():
+            neighbors[edge[0]].append((edge[1], self._log_fidelity(edge)))
+
+        for node_neighbors in neighbors.values():
+            node_neighbors.sort(key=lambda neighbor: -neighbor[1])
+
+        best_edge = max(
+            (neighbor[1] for node_neighbors in neighbors.values() for neighbor in node_neighbors),
+            default=-np.inf,
+        )
+        best = {"path": None, "value": -np.inf}
+        path, visited = [], set()
+
+        def extend(value):
+            """Extend the path and return True if the search can stop."""
+            if len(path) == length:
+                # every path is found in both directions, keep the one as in the original order
+                if path[0] < path[-1] and (best["path"] is None or value > best["value"]):
+                    best["path"], best["value"] = list(path), value
+                    return not self._use_fidelity
+
+                return False
+
+            if best["path"] is not None:
+                if value + (length - len(path)) * best_edge <= best["value"]:
+                    return False
+
+            for neighbor, log_fidelity in neighbors[path[-1]]:
+                if neighbor in visited:
+                    continue
+
+                path.append(neighbor)
+                visited.add(neighbor)
+                done = extend(value + log_fidelity)
+                path.pop()
+                visited.remove(neighbor)
+
+                if done:
+                    return True
+
+            return False
 
-        fidelities = [self.evaluate_path(path) for path in paths]
+        def best_incident(node):
+            return neighbors[node][0][1] if neighbors[node] else -np.inf
 
-        return self.get_best_path(paths, fidelities)
+        # start with the nodes on the best edges
+        for start in sorted(neighbors, key=best_incident, reverse=True):
+            path.append(start)
+            visited.add(start)
+            done = extend(0.0)
+            path.pop()
+            visited.remove(start)
+
+            if done:
+                break
+
+        return best["path"]
+
+    def _log_fidelity(self, edge: Tuple[int, int]) -> float:
+        """Return the logarithm of the fidelity of the edge, or 0 if the fidelity is not used."""
+        if not self._use_fidelity:
+            return 0.0
+
+        fidelity = self._two_qubit_fidelity[tuple(edge)]
+        return np.log(fidelity) if fidelity > 0 else -np.inf
 
     @staticmethod
     def get_best_path(paths: List[List[int]], fidelities: List[float]) -> List[int]:
@@ -1992,18 +2568,73 @@ class SwapStrategyCreator(AnalysisPass):
                     f"{self._max_problem_size}. Received {problem_size}"
                 )
 
-            self._path = self.find_path(problem_size)
-
-            if self._path is None:
-                self._swap_strategy, self._path = get_swap_strategy(self._name, problem_size)
+            cached = self._load_cached(problem_size)
+            if cached is not None:
+                self._swap_strategy, self._path = cached
             else:
-                self._swap_strategy = LineSwapStrategy(list(range(len(self._path))))
+                self._path = self.find_path(problem_size)
+
+                if self._path is None:
+                    self._swap_strategy, self._path = get_swap_strategy(self._name, problem_size)
+                else:
+                    self._swap_strategy = LineSwapStrategy(list(range(len(self._path))))
+
+                self._store_cached(problem_size)
 
         self.property_set["qaoa_swap_strategy"] = self._swap_strategy
         self.property_set["qaoa_swap_layout"] = self._path
 
         return dag
 
+    def _cache_file(self, problem_size: int) -> str:
+        """Return the cache file of the swap strategy for the given problem size."""
+        key = json.dumps(
+            [
+                sorted(self._coupling_map.get_edges()),
+                self._properties_date,
+                self._two_qubit_gate,
+                self._use_fidelity,
+            ]
+        )
+        coupling_hash = hashlib.sha256(key.encode()).hexdigest()[:16]
+
+        return os.path.join(self._cache_dir, f"{self._name}_{coupling_hash}_{problem_size}.json")
+
+    def _load_cached(self, problem_size: int) -> Optional[Tuple[SwapStrategy, List[int]]]:
+        """Load the swap strategy and path from the cache, or None if they are not cached."""
+        if self._cache_dir is None:
+            return None
+
+        filename = self._cache_file(problem_size)
+        if not os.path.exists(filename):
+            return None
+
+        # a truncated or foreign file is treated as a cache miss and overwritten
+        try:
+            with open(filename, "r") as file:
+                cached = json.load(file)
+
+            return SwapStrategy.from_dict(cached["swap_strategy"]), list(cached["path"])
+        except (OSError, ValueError, KeyError, TypeError, QiskitError):
+            return None
+
+    def _store_cached(self, problem_size: int) -> None:
+        """Store the swap strategy and path in the cache."""
+        if self._cache_dir is None:
+            return
+
+        os.makedirs(self._cache_dir, exist_ok=True)
+        filename = self._cache_file(problem_size)
+        cached = {
+            "swap_strategy": self._swap_strategy.to_dict(),
+            "path": [int(qubit) for qubit in self._path],
+        }
+
+        # write to a temporary file first such that an interrupted write does not corrupt the cache
+        with open(filename + ".tmp", "w") as file:
+            json.dump(cached, file)
+        os.replace(filename + ".tmp", filename)
+
 
 class InitialQubitMapper(TransformationPass):
     """Reorder the decision variables based on the swap strategy.
@@ -2040,182 +2671,71 @@ class InitialQubitMapper(TransformationPass):
         Raises:
             QiskitError: if the cost operator is too large for the swap strategy.
         """
-        if len(swap_strategy.distance_matrix) < cost_op.num_qubits:
+        if swap_strategy.distance_matrix.shape[0] < cost_op.num_qubits:
             raise QiskitError(
                 f"The cost operator with {cost_op.num_qubits} qubits is too large "
                 f"for the swap strategy {swap_strategy}."
             )
 
-        rotation_angles = self._map_rotation_angles(cost_op)
-
-        # A mapping with the logical qubit as key and the physical qubit as value.
-        physical_mapping = dict()
+        num_qubits = cost_op.num_qubits
+        rotation_angles = self._rotation_matrix(cost_op)
 
         # The distance matrix between the qubits in the swap strategy.
-        distance_mat = swap_strategy.distance_matrix
+        distance_mat = np.asarray(swap_strategy.distance_matrix)[:num_qubits, :num_qubits]
+
+        # The physical qubit of each logical qubit, or -1 if it has not been mapped yet.
+        physical_mapping = np.full(num_qubits, -1)
+        unmapped_physical_qubits = np.ones(num_qubits, dtype=bool)
 
-        unmapped_virtual_qubits = set(range(cost_op.num_qubits))
-        unmapped_physical_qubits = set(range(cost_op.num_qubits))
+        # The running sums of the rotation angles between each logical qubit and the mapped ones.
+        rotation_sums = np.zeros(num_qubits)
 
-        while unmapped_virtual_qubits:
+        for step in range(num_qubits):
+            unmapped_virtual_qubits = physical_mapping < 0
 
             # Get the next virtual qubit to map using the sum of rotations to the mapped qubits.
-            v_qubit = self._get_next_qubit_to_map(
-                list(unmapped_virtual_qubits), physical_mapping, rotation_angles
-            )
+            # The first qubit is the one with the most rotations.
+            if step == 0:
+                v_qubit = int(np.argmax(np.count_nonzero(rotation_angles, axis=1)))
+            else:
+                v_qubit = int(np.argmax(np.where(unmapped_virtual_qubits, rotation_sums, -np.inf)))
 
-            # Find the physical qubit to which to map the virtual qubit.
-            p_qubit = self._min_distance(
-                v_qubit,
-                physical_mapping,
-                unmapped_physical_qubits,
-                rotation_angles,
-                distance_mat,
-            )
+            # Find the physical qubit v to which to map the virtual qubit i. It minimizes the sum
+            # of d_{v, v(j)} * theta_{ij} over the mapped virtual qubits j with a rotation to i.
+            neighbors = np.flatnonzero((rotation_angles[v_qubit] != 0) & ~unmapped_virtual_qubits)
+            distances = distance_mat[:, physical_mapping[neighbors]]
+            costs = distances @ rotation_angles[v_qubit, neighbors]
+            p_qubit = int(np.argmin(np.where(unmapped_physical_qubits, costs, np.inf)))
 
             # Update state variables.
             physical_mapping[v_qubit] = p_qubit
-            unmapped_virtual_qubits.remove(v_qubit)
-            unmapped_physical_qubits.remove(p_qubit)
-
-        # reorder data to get a permutations list
-        permutation = [0] * cost_op.num_qubits
-        for v_qubit, p_qubit in physical_mapping.items():
-            permutation[v_qubit] = p_qubit
-
-        return copy.deepcopy(cost_op).permute(permutation)
-
-    def _min_distance(
-        self,
-        qubit: int,
-        physical_mapping: Dict[int, int],
-        free_positions: Set[int],
-        rotation_angles: Dict[Tuple, float],
-        distance_mat: List[List[int]],
-    ) -> int:
-        r"""Find the physical qubit to which to map the virtual qubit.
-
-        The cost function that is computed is
-
-        .. math::
+            unmapped_physical_qubits[p_qubit] = False
+            rotation_sums += rotation_angles[:, v_qubit]
 
-            \sum_{j\in M} d_{v, v(j)}\theta_{ij}.
-
-        Here, :math:`d_{v, v(j)}` is the swap distance between the physical node v
-        and the position of the physical qubit :math:`v(j)` to which decision variable
-        :math:`j` has been mapped. :math:`\theta_{ij}` is the angle between the
-        decision variable to map, i.e. :math:`i`, and the mapped decision variable :math:`j`.
-        The set :math:`M` is the set of decision variables that have already been mapped
-        to a physical qubit.
-
-        Args:
-            qubit: The decision variable to map, i.e. :math:`i`.
-            physical_mapping: The dictionary of decisions variables (i.e. virtual qubits) as keys
-                that have already been mapped to physical variables as values.
-            rotation_angles: A dict connecting the decision variables to their corresponding
-                rotations. E.g. 4.0*ZIIZ has rotation_angles {(0, 3): 4.0, (3, 0): 4.0}.
-            distance_mat: The distance matrix from the swap strategy to use.
-
-        Returns:
-            The index of the physical qubit to which the decision variable (i.e. the qubit)
-            argument will be mapped.
-        """
-        smallest_cost, smallest_idx = np.Inf, None
-
-        def calculate_cost(pos):
-            # Compute the sum in the cost function to minimize
-            cost = 0.0
-            for v_qubit, p_qubit in physical_mapping.items():
-                theta = rotation_angles.get((qubit, v_qubit), 0)
-                cost += distance_mat[pos][p_qubit] * theta
-            return cost
-
-        return min(free_positions, key=calculate_cost)
+        return copy.deepcopy(cost_op).permute(physical_mapping.tolist())
 
     @staticmethod
-    def _map_rotation_angles(cost_op: PauliSumOp) -> Dict[Tuple, float]:
-        """Return the rotation angle between two qubits.
-
-        Args:
-            cost_op: A sum of Paulis whose coefficients determine the rotation angles
-                that will be extracted and put into a dict.
-
-        Returns:
-            A dictionary where the keys are the decision variable indices, e.g. (2, 3)
-            and the values are the coefficients of the corresponding pauli Z terms.
-            The returned dictionary contains keys (A, B) and (B, A) which both point
-            to the same rotation angle since the RZZGate is symmetric.
-        """
-
-        rotation_angles = dict()
-
-        for pauli, coeff in zip(cost_op.primitive.paulis, cost_op.primitive.coeffs):
-            indices = tuple([idx for idx, char in enumerate(pauli) if str(char) == "Z"])
-
-            rotation_angles[indices] = coeff
-            rotation_angles[indices[::-1]] = coeff
-
-        return rotation_angles
-
-    def _get_next_qubit_to_map(
-        self,
-        unmapped: List[int],
-        mapped: Dict[int, int],
-        rotation_angles: Dict[Tuple, float],
-    ) -> int:
-        """Return the next virtual qubit to map to a physical qubit.
+    def _rotation_matrix(cost_op: PauliSumOp) -> np.ndarray:
+        """Return the rotation angles between all pairs of qubits.
 
         Args:
-            unmapped: Qubits that have not yet been mapped to a physical qubit
-                in the initial layout.
-            mapped: The dictionary of decisions variables (i.e. virtual qubits) as keys
-                that have already been mapped to physical variables as values.
-            rotation_angles: A dict connecting the decision variables to their corresponding
-                rotations. E.g. 4.0*ZIIZ has rotation_angles {(0, 3): 4.0, (3, 0): 4.0}.
+            cost_op: A sum of Paulis whose coefficients determine the rotation angles.
 
         Returns:
-            A list of sum of rotations between apped and unmapped qubits.
+            A symmetric matrix where the entry (A, B) is the coefficient of the Pauli Z term
+            on the qubits A and B, e.g. 4.0*ZIIZ has the entries (0, 3) and (3, 0) equal to 4.0.
         """
+        num_qubits = cost_op.num_qubits
+        z_bits = cost_op.primitive.paulis.z
+        quadratic = np.sum(z_bits, axis=1) == 2
 
-        # If no qubit has been mapped we first consider the qubit with the highest
-        # number of connections.
-        if not mapped:
-            max_rotation_count = 0
-            max_qubit = 0
-            for idx1, qb1 in enumerate(unmapped):
+        pairs = np.nonzero(z_bits[quadratic])[1].reshape(-1, 2)
+        coeffs = np.real(cost_op.primitive.coeffs[quadratic])
 
-                rotation_count = 0
-                for idx2, qb2 in enumerate(unmapped[idx1 + 1 :]):
-                    if (idx1, idx2) in rotation_angles:
-                        rotation_count += 1
+        rotation_angles = np.zeros((num_qubits, num_qubits))
+        np.add.at(rotation_angles, (pairs[:, 0], pairs[:, 1]), coeffs)
 
-                if rotation_count > max_rotation_count:
-                    max_qubit = qb1
-
-            return max_qubit
-
-        # Consider the following qubits using the largest som of rotations.
-        sum_of_rotations = [
-            self._rotation_sum(qubit, list(mapped.keys()), rotation_angles) for qubit in unmapped
-        ]
-
-        return max(zip(sum_of_rotations, unmapped), key=lambda x: x[0])[1]
-
-    @staticmethod
-    def _rotation_sum(
-        qubit: int, other_qubits: List[int], rotation_angles: Dict[Tuple, float]
-    ) -> float:
-        """Compute the rotation sum between the given qubit and the other qubits.
-
-        Args:
-            qubit: The qubit for which we compute the sum of all other rotation angles.
-            other_qubits: The list of qubits that have already been mapped to physical
-                qubits.
-
-        Returns:
-            The sum of the rotation angles between the given qubit and the unmapped qubit.
-        """
-        return sum(rotation_angles.get((qubit, other), 0) for other in other_qubits)
+        return rotation_angles + rotation_angles.T
 
     def run(self, dag: DAGCircuit) -> DAGCircuit:
         """Reorder the terms in the QAOA cost operator according to a swap strategy.
@@ -2249,6 +2769,7 @@ def swap_pass_manager_creator(
     swap_strategy: Optional[SwapStrategy] = None,
     swap_strategy_qubits: Optional[List[int]] = None,
     use_initial_mapping: bool = False,
+    swap_strategy_cache: Optional[str] = None,
 ) -> PassManager:
     """Create a swap strategy pass manager.
 
@@ -2262,6 +2783,9 @@ def swap_pass_manager_creator(
             mapping to the transpilation passes that will reorganize the Pauli operations in
             the cost operator to reduce the number of two-qubit gates that the SWAP strategy will
             implement.
+        swap_strategy_cache: An optional directory to cache the created swap strategies in. The
+            directory is on the machine that runs the program, so the cache only helps if that
+            machine keeps its files between jobs.
     """
 
     if swap_strategy is not None and swap_strategy_qubits is None:
@@ -2275,6 +2799,7 @@ def swap_pass_manager_creator(
             backend,
             swap_strategy=swap_strategy,
             swap_strategy_qubits=swap_strategy_qubits,
+            cache_dir=swap_strategy_cache,
         )
     )
 
@@ -2389,12 +2914,21 @@ def main(backend, user_messenger, **kwargs):
     use_swap_strategies = kwargs.get("use_swap_strategies", True)
     serialized_inputs["use_swap_strategies"] = use_swap_strategies
 
+    swap_strategy_cache = kwargs.get("swap_strategy_cache", None)
+    serialized_inputs["swap_strategy_cache"] = swap_strategy_cache
+
     use_pulse_efficient = kwargs.get("use_pulse_efficient", False)
     serialized_inputs["use_pulse_efficient"] = use_pulse_efficient
 
     optimization_level = kwargs.get("optimization_level", 1)
     serialized_inputs["optimization_level"] = optimization_level
 
+    publish_interval = kwargs.get("publish_interval", None)
+    serialized_inputs["publish_interval"] = publish_interval
+
+    publish_batch_size = kwargs.get("publish_batch_size", None)
+    serialized_inputs["publish_batch_size"] = publish_batch_size
+
     # select expectation algorithm
     if alpha == 1:
         expectation = PauliExpectation()
@@ -2413,7 +2947,11 @@ def main(backend, user_messenger, **kwargs):
     # Define the transpiler passes to use.
     pass_manager = None
     if use_swap_strategies:
-        pass_manager = swap_pass_manager_creator(backend, use_initial_mapping=use_initial_mapping)
+        pass_manager = swap_pass_manager_creator(
+            backend,
+            use_initial_mapping=use_initial_mapping,
+            swap_strategy_cache=swap_strategy_cache,
+        )
 
     pulse_passes = pulse_pass_creator(backend) if use_pulse_efficient else None
 
@@ -2431,7 +2969,14 @@ def main(backend, user_messenger, **kwargs):
     quantum_instance.circuit_summary = True
 
     # publisher for user-server communication
-    publisher = Publisher(user_messenger)
+    if publish_interval is not None or publish_batch_size is not None:
+        publisher = BatchedPublisher(
+            user_messenger,
+            interval=publish_interval if publish_interval is not None else 1.0,
+            batch_size=publish_batch_size if publish_batch_size is not None else 100,
+        )
+    else:
+        publisher = Publisher(user_messenger)
 
     # dictionary to store the history of the optimization
     history = {"nfevs": [], "params": [], "energy": [], "std": []}
@@ -2455,7 +3000,11 @@ def main(backend, user_messenger, **kwargs):
         callback=store_history_and_forward,
         quantum_instance=quantum_instance,
     )
-    result = qaoa.compute_minimum_eigenvalue(operator, aux_operators)
+    try:
+        result = qaoa.compute_minimum_eigenvalue(operator, aux_operators)
+    finally:
+        # make sure all interim results are published before the final result or the error
+        publisher.close()
 
     serialized_result = {
         "optimizer_time": result.optimizer_time,
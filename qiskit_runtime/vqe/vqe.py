@@ -14,23 +14,30 @@
 
 from abc import ABC, abstractmethod
 from typing import Iterator, Optional, Union, Callable, Tuple, List, Dict, Any
+import hashlib
 import logging
+import os
 from time import time
 import warnings
 import sys
 import json
+import queue
+import threading
 import traceback
-from collections import deque
+from collections import deque, OrderedDict
+from copy import copy, deepcopy
+from functools import partial
 
 import numpy as np
 import scipy
+from scipy.sparse.linalg import LinearOperator, gmres
 
 from qiskit.algorithms.optimizers import Optimizer, OptimizerSupportLevel, SPSA, QNSPSA
-from qiskit import Aer
+from qiskit import Aer, transpile
 from qiskit.algorithms import VQE, VQEResult
 from qiskit.algorithms.exceptions import AlgorithmError
 from qiskit.algorithms.minimum_eigen_solvers import MinimumEigensolverResult
-from qiskit.circuit import ParameterVector, QuantumCircuit
+from qiskit.circuit import Parameter, ParameterExpression, ParameterVector, QuantumCircuit
 from qiskit.opflow import (
     StateFn,
     CircuitSampler,
@@ -38,9 +45,19 @@ from qiskit.opflow import (
     ExpectationBase,
     OperatorBase,
     ListOp,
+    ComposedOp,
+    OperatorStateFn,
+    DictStateFn,
+    PauliOp,
+    PauliSumOp,
+    SummedOp,
+    CircuitStateFn,
+    PauliBasisChange,
     I,
 )
 from qiskit.providers import BaseBackend, Backend
+from qiskit.result import Result
+from qiskit.quantum_info import SparsePauliOp
 from qiskit.utils import QuantumInstance
 
 from qiskit.ignis.mitigation.measurement import CompleteMeasFitter
@@ -84,6 +101,10 @@ class It(ABC):
         classes = {"Constant": Constant, "Powerlaw": Powerlaw, "Concatenated": Concatenated}
         return classes[name](**inputs)
 
+    def __call__(self) -> Iterator[float]:
+        """Create a new iterator, such that the instance can be used as iterator factory."""
+        return self.get_iterator()()
+
 
 class Constant(It):
     """An iterator yielding constant values."""
@@ -192,6 +213,1136 @@ class Concatenated(It):
         return concat
 
 
+class TerminationChecker(ABC):
+    """A base class for serializable termination criteria of the SPSA optimizers.
+
+    The checker is called after each iteration with the number of function evaluations, the
+    current parameters, the loss at the current parameters, the size of the update step and
+    whether the step was accepted. If a step is rejected, the current parameters and loss are
+    those of the last accepted point. If it returns True, the optimization is stopped. Since
+    checkers keep track of previous iterations, their serialized form includes this state.
+    """
+
+    reason = None
+
+    @abstractmethod
+    def __call__(
+        self, nfev: int, x: np.ndarray, fx: float, stepsize: float, accepted: bool
+    ) -> bool:
+        """Check whether the optimization should terminate."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def serialize(self) -> Tuple[str, Dict[str, Any]]:
+        """Serialize the termination checker."""
+        raise NotImplementedError
+
+    @staticmethod
+    def deserialize(serialized: Tuple[str, Dict[str, Any]]) -> "TerminationChecker":
+        """Construct the termination checker from the serialized data."""
+
+        name, inputs = serialized
+        classes = {"LossSlope": LossSlope, "ParameterChange": ParameterChange, "Patience": Patience}
+        return classes[name](**inputs)
+
+
+class LossSlope(TerminationChecker):
+    """Terminate if the loss does not decrease on average over a window of iterations.
+
+    The slope of the loss is estimated with a linear fit to the last ``window`` losses and the
+    optimization stops once the loss decreases by less than ``tolerance`` per iteration.
+    """
+
+    reason = "loss_slope"
+
+    def __init__(
+        self, window: int = 10, tolerance: float = 1e-3, losses: Optional[List[float]] = None
+    ) -> None:
+        """
+        Args:
+            window: The number of iterations used to fit the slope.
+            tolerance: The minimal decrease of the loss per iteration to continue.
+            losses: The losses of the previous iterations, used to restore the checker.
+        """
+        self.window = window
+        self.tolerance = tolerance
+        self.losses = deque(losses or [], maxlen=window)
+
+    def __call__(self, nfev, x, fx, stepsize, accepted):
+        self.losses.append(float(np.real(fx)))
+        if len(self.losses) < self.window:
+            return False
+
+        slope = np.polyfit(np.arange(self.window), np.array(self.losses), 1)[0]
+        return -slope < self.tolerance
+
+    def serialize(self) -> Tuple[str, Dict[str, Any]]:
+        return (
+            "LossSlope",
+            {"window": self.window, "tolerance": self.tolerance, "losses": list(self.losses)},
+        )
+
+
+class ParameterChange(TerminationChecker):
+    """Terminate if the update steps are smaller than a tolerance for several iterations."""
+
+    reason = "parameter_change"
+
+    def __init__(self, tolerance: float = 1e-4, patience: int = 3, count: int = 0) -> None:
+        """
+        Args:
+            tolerance: The minimal norm of an update step to continue.
+            patience: The number of consecutive small steps after which to terminate.
+            count: The current number of consecutive small steps, used to restore the checker.
+        """
+        self.tolerance = tolerance
+        self.patience = patience
+        self.count = count
+
+    def __call__(self, nfev, x, fx, stepsize, accepted):
+        if stepsize < self.tolerance:
+            self.count += 1
+        else:
+            self.count = 0
+
+        return self.count >= self.patience
+
+    def serialize(self) -> Tuple[str, Dict[str, Any]]:
+        return (
+            "ParameterChange",
+            {"tolerance": self.tolerance, "patience": self.patience, "count": self.count},
+        )
+
+
+class Patience(TerminationChecker):
+    """Terminate if the loss did not improve for a number of iterations."""
+
+    reason = "patience"
+
+    def __init__(
+        self,
+        patience: int = 20,
+        min_delta: float = 0.0,
+        best: Optional[float] = None,
+        count: int = 0,
+    ) -> None:
+        """
+        Args:
+            patience: The number of iterations without improvement after which to terminate.
+            min_delta: The minimal decrease of the loss that counts as improvement.
+            best: The best loss so far, used to restore the checker.
+            count: The current number of iterations without improvement, used to restore the
+                checker.
+        """
+        self.patience = patience
+        self.min_delta = min_delta
+        self.best = best
+        self.count = count
+
+    def __call__(self, nfev, x, fx, stepsize, accepted):
+        fx = float(np.real(fx))
+        if self.best is None or fx < self.best - self.min_delta:
+            self.best = fx
+            self.count = 0
+        else:
+            self.count += 1
+
+        return self.count >= self.patience
+
+    def serialize(self) -> Tuple[str, Dict[str, Any]]:
+        return (
+            "Patience",
+            {
+                "patience": self.patience,
+                "min_delta": self.min_delta,
+                "best": self.best,
+                "count": self.count,
+            },
+        )
+
+
+class BernoulliPerturbations:
+    """A source of Bernoulli random perturbations backed by a NumPy random generator.
+
+    The perturbations are drawn in blocks of shape ``(num, dim)`` with a single call to the
+    generator and can optionally be pre-generated for the whole optimization.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        perturbation_dims: Optional[int] = None,
+        seed: Optional[Union[int, np.random.SeedSequence]] = None,
+    ) -> None:
+        """
+        Args:
+            dim: The dimension of the perturbations.
+            perturbation_dims: The number of dimensions to perturb at once. Per default all
+                dimensions are perturbed simultaneously.
+            seed: The seed of the random generator.
+        """
+        self.dim = dim
+        self.perturbation_dims = perturbation_dims
+        self.generator = np.random.default_rng(seed)
+
+        self._buffer = None
+        self._buffer_state = None
+        self._position = 0
+
+    def pregenerate(self, num: int) -> None:
+        """Pre-generate ``num`` perturbations, which are consumed before new ones are drawn."""
+        # store the generator state, such that the buffer can be restored from a checkpoint
+        self._buffer_state = self.generator.bit_generator.state
+        self._buffer = self._draw(num)
+        self._position = 0
+
+    def sample(self, num: int) -> np.ndarray:
+        """Get ``num`` perturbations as array of shape ``(num, dim)``."""
+        if self._buffer is None:
+            return self._draw(num)
+
+        samples = self._buffer[self._position : self._position + num]
+        self._position += num
+
+        # once the buffer is used up continue with the generator directly
+        if self._position >= len(self._buffer):
+            self._buffer = None
+            self._buffer_state = None
+            samples = np.concatenate((samples, self._draw(num - len(samples))))
+
+        return samples
+
+    def _draw(self, num):
+        if self.perturbation_dims is None:
+            return 1 - 2 * self.generator.integers(0, 2, size=(num, self.dim))
+
+        signs = 1 - 2 * self.generator.integers(0, 2, size=(num, self.perturbation_dims))
+        # random choice without replacement for each row
+        indices = np.argsort(self.generator.random((num, self.dim)), axis=1)
+        indices = indices[:, : self.perturbation_dims]
+
+        perturbations = np.zeros((num, self.dim))
+        np.put_along_axis(perturbations, indices, signs, axis=1)
+        return perturbations
+
+    def get_state(self) -> Dict[str, Any]:
+        """Get the serializable state of the perturbation source."""
+        if self._buffer is None:
+            return {"generator": self.generator.bit_generator.state, "buffer": 0, "position": 0}
+
+        return {
+            "generator": self._buffer_state,
+            "buffer": len(self._buffer),
+            "position": self._position,
+        }
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """Restore the perturbation source from a state returned by ``get_state``."""
+        self.generator.bit_generator.state = state["generator"]
+        self._buffer = None
+        self._buffer_state = None
+
+        if state["buffer"] > 0:
+            self.pregenerate(state["buffer"])
+            self._position = state["position"]
+
+
+class OptimizerHistory:
+    """The loss, parameters and time of each iteration of the SPSA optimizers.
+
+    The values are stored in preallocated arrays, which are only grown if more iterations than
+    the initial capacity are recorded. To reduce the memory footprint the values can be stored
+    in single precision and only every ``stride``-th iteration can be recorded. Additional
+    information, such as the reason of termination, is stored in ``metadata``. Checkpoints only
+    hold the values recorded since the previous checkpoint, see :meth:`checkpoint_dict`.
+    """
+
+    def __init__(
+        self,
+        num_parameters: int,
+        capacity: int = 100,
+        dtype: Union[str, type] = "float64",
+        stride: int = 1,
+    ) -> None:
+        """
+        Args:
+            num_parameters: The number of parameters of the optimization.
+            capacity: The number of iterations for which memory is allocated initially.
+            dtype: The data type of the recorded losses and parameters, e.g. ``"float32"``.
+            stride: Only record every ``stride``-th iteration.
+        """
+        self.dtype = np.dtype(dtype)
+        self.stride = stride
+        self.metadata = {}
+
+        self.loss = np.empty(capacity, dtype=self.dtype)
+        self.params = np.empty((capacity, num_parameters), dtype=self.dtype)
+        self.time = np.empty(capacity)  # timestamps require double precision
+        self._size = 0
+        self._iterations = 0
+
+        # the index of the first record, which is nonzero if the history is restored from a
+        # checkpoint without the previous records, and the number of records in checkpoints
+        self._start = 0
+        self._checkpointed = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, loss: float, params: np.ndarray) -> None:
+        """Record the loss and parameters of an iteration."""
+        self._iterations += 1
+        if (self._iterations - 1) % self.stride != 0:
+            return
+
+        if self._size == len(self.loss):
+            self._grow()
+
+        self.loss[self._size] = np.real(loss)
+        self.params[self._size] = params
+        self.time[self._size] = time()
+        self._size += 1
+
+    def _grow(self):
+        capacity = max(1, 2 * len(self.loss))
+        for name in ["loss", "params", "time"]:
+            values = getattr(self, name)
+            grown = np.empty((capacity,) + values.shape[1:], dtype=values.dtype)
+            grown[: self._size] = values[: self._size]
+            setattr(self, name, grown)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the recorded values and the metadata as dictionary."""
+        return self._records_dict(0)
+
+    def checkpoint_dict(self) -> Dict[str, Any]:
+        """Get the values recorded since the last call of this method and the metadata.
+
+        Sending the whole history with every checkpoint would grow the checkpoints linearly and
+        their total size quadratically with the number of iterations. The dictionaries of all
+        checkpoints are passed as list to :meth:`from_dict` to restore the whole history.
+        """
+        history = self._records_dict(self._checkpointed)
+        self._checkpointed = self._size
+        return history
+
+    def _records_dict(self, first):
+        history = {
+            "loss": self.loss[first : self._size],
+            "params": self.params[first : self._size],
+            "time": self.time[first : self._size],
+            "start": self._start + first,
+            "stride": self.stride,
+            "iterations": self._iterations,
+        }
+        # copy the metadata, such that the lists of a checkpoint do not grow with the history
+        history.update(deepcopy(self.metadata))
+        return history
+
+    @classmethod
+    def from_dict(
+        cls,
+        history: Union[Dict[str, Any], List[Dict[str, Any]]],
+        num_parameters: int,
+        capacity: int = 100,
+    ) -> "OptimizerHistory":
+        """Restore the history from a dictionary returned by ``to_dict``.
+
+        The history can also be restored from the list of the dictionaries returned by
+        ``checkpoint_dict`` for consecutive checkpoints. If only the dictionary of the last
+        checkpoint is given, only the values recorded since the previous checkpoint are restored.
+
+        Args:
+            history: The history dictionary, or the list of consecutive checkpoint dictionaries.
+            num_parameters: The number of parameters of the optimization.
+            capacity: The number of additional iterations for which memory is allocated.
+
+        Returns:
+            The restored history.
+
+        Raises:
+            ValueError: If the checkpoint dictionaries are not consecutive.
+        """
+        parts = [history] if isinstance(history, dict) else list(history)
+        start = parts[0].get("start", 0)
+        end = start
+        for part in parts:
+            if part.get("start", end) != end:
+                raise ValueError(
+                    f"The history from record {part['start']} does not continue at record {end}."
+                )
+            end += len(part["loss"])
+
+        history = dict(parts[-1])
+        for key in ["loss", "params", "time", "start"]:
+            history.pop(key, None)
+
+        loss = np.concatenate([np.asarray(part["loss"]) for part in parts])
+        params = np.concatenate(
+            [np.asarray(part["params"]).reshape(-1, num_parameters) for part in parts]
+        )
+        timestamps = np.concatenate([np.asarray(part["time"], dtype=float) for part in parts])
+
+        restored = cls(num_parameters, len(loss) + capacity, loss.dtype, history.pop("stride", 1))
+        restored.loss[: len(loss)] = loss
+        restored.params[: len(loss)] = params
+        restored.time[: len(loss)] = timestamps
+        restored._size = len(loss)
+        restored._iterations = history.pop("iterations", len(loss))
+        restored._start = start
+        restored._checkpointed = len(loss)
+        restored.metadata = history
+        return restored
+
+    def summary(self) -> Dict[str, Any]:
+        """Get a summary of the history, with the final and the best recorded loss."""
+        summary = {"iterations": self._iterations, "records": self._size, "stride": self.stride}
+        if self._size > 0:
+            best = int(np.argmin(self.loss[: self._size]))
+            summary["final_loss"] = float(self.loss[self._size - 1])
+            summary["best_loss"] = float(self.loss[best])
+            summary["best_params"] = self.params[best]
+
+        summary.update(self.metadata)
+        return summary
+
+
+class PauliShotAllocator:
+    """Allocate the shots of a Pauli expectation value to its measurement groups.
+
+    The circuit of each group of commuting Paulis is repeated :math:`m_g` times and the group
+    value is the mean over the repetitions, such that the group is effectively measured with
+    :math:`m_g` times the shots per circuit. The repetitions are chosen proportional to the
+    standard deviation of the group value (Neyman allocation), which is initially estimated
+    by the norm of the group coefficients and later from the sampled bitstrings. The shots per
+    circuit are scaled such that the total number of shots is the same as without allocation.
+
+    The allocated circuits are executed with a copy of the quantum instance, such that other
+    circuits, such as the overlaps of QN-SPSA, keep the original number of shots. Note that the
+    repetitions multiply the number of energy circuits by about ``resolution``.
+    """
+
+    def __init__(self, interval: int = 10, resolution: int = 4) -> None:
+        """
+        Args:
+            interval: The number of iterations after which the shots are reallocated from the
+                observed variances.
+            resolution: The average number of repetitions per group. Larger values allow a
+                finer allocation at the cost of more circuits with fewer shots each.
+        """
+        self.interval = interval
+        self.resolution = resolution
+        self.repetitions = None
+        self.quantum_instance = None
+
+        self._groups = None
+        self._coeff = 1
+        self._weights = None
+        self._variances = None
+        self._num_observations = 0
+        self._shots = None
+
+    def initialize(self, operator: OperatorBase, quantum_instance: QuantumInstance) -> None:
+        """Set the expectation value, converted with a ``PauliExpectation``, to allocate.
+
+        The allocated expectation value must be sampled with the allocator's ``quantum_instance``,
+        a copy of the given quantum instance whose shots are set by the allocation.
+        """
+        if isinstance(operator, SummedOp):
+            self._groups, self._coeff = operator.oplist, operator.coeff
+        else:
+            self._groups, self._coeff = [operator], 1
+
+        self._weights = np.array([_coefficient_norm(group) for group in self._groups])
+        self._variances = np.zeros(len(self._groups))
+        self._num_observations = 0
+        self._shots = quantum_instance.run_config.shots
+
+        # copy the run configuration as well, since it holds the shots
+        self.quantum_instance = copy(quantum_instance)
+        self.quantum_instance._run_config = copy(  # pylint: disable=protected-access
+            quantum_instance.run_config
+        )
+
+    def observe(self, sampled_operators: List[OperatorBase], expectation: ExpectationBase) -> None:
+        """Record the group variances of sampled, allocated expectation values."""
+        for operator in sampled_operators:
+            groups = operator.oplist if isinstance(operator, SummedOp) else [operator]
+            if len(groups) != len(self._groups):
+                continue
+
+            for i, group in enumerate(groups):
+                repetitions = group.oplist if isinstance(group, ListOp) else [group]
+                self._variances[i] += np.mean(
+                    [_sampled_variance(op, expectation) for op in repetitions]
+                )
+            self._num_observations += 1
+
+    def allocate(self) -> OperatorBase:
+        """Reallocate the shots and get the expectation value with repeated group circuits."""
+        if self._num_observations > 0:
+            stddevs = np.sqrt(np.maximum(self._variances / self._num_observations, 0))
+            if np.any(stddevs > 0):
+                self._weights = stddevs
+
+        self._variances = np.zeros(len(self._groups))
+        self._num_observations = 0
+
+        num_groups = len(self._groups)
+        if np.sum(self._weights) > 0:
+            fractions = self._weights / np.sum(self._weights)
+        else:
+            fractions = np.ones(num_groups) / num_groups
+
+        self.repetitions = np.maximum(1, np.round(self.resolution * num_groups * fractions))
+        self.repetitions = self.repetitions.astype(int)
+
+        return self.allocated_operator()
+
+    def allocated_operator(self) -> OperatorBase:
+        """Get the expectation value with repeated group circuits for the current allocation."""
+        # keep the total number of shots constant
+        shots = int(round(self._shots * len(self._groups) / np.sum(self.repetitions)))
+        self.quantum_instance.set_config(shots=max(1, shots))
+
+        return SummedOp(
+            [
+                ListOp([_repeat_group(group) for _ in range(repetitions)], combo_fn=_mean)
+                for group, repetitions in zip(self._groups, self.repetitions)
+            ],
+            coeff=self._coeff,
+        )
+
+    def get_state(self) -> Dict[str, Any]:
+        """Get the allocation and the observed variances, e.g. to checkpoint an optimization."""
+        return {
+            "weights": self._weights,
+            "variances": self._variances,
+            "num_observations": self._num_observations,
+            "repetitions": self.repetitions,
+        }
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """Restore a state returned by ``get_state``, after initializing the same expectation."""
+        self._weights = np.asarray(state["weights"], dtype=float)
+        self._variances = np.asarray(state["variances"], dtype=float)
+        self._num_observations = state["num_observations"]
+        self.repetitions = np.asarray(state["repetitions"], dtype=int)
+
+
+def _coefficient_norm(group):
+    """Get the norm of the Pauli coefficients of a measurement group."""
+    if isinstance(group, ComposedOp) and isinstance(group.oplist[0], OperatorStateFn):
+        measurement = group.oplist[0]
+        primitive = measurement.primitive
+        if isinstance(primitive, PauliSumOp):
+            coeffs = primitive.primitive.coeffs * primitive.coeff
+        elif isinstance(primitive, PauliOp):
+            coeffs = np.array([primitive.coeff])
+        else:
+            return 1.0
+
+        return float(np.abs(group.coeff * measurement.coeff) * np.linalg.norm(coeffs))
+
+    return 1.0
+
+
+def _repeat_group(group):
+    """Get a copy of a measurement group with its own circuit, such that it is sampled again."""
+    if isinstance(group, ComposedOp) and isinstance(group.oplist[-1], CircuitStateFn):
+        state = group.oplist[-1]
+        repeated_state = CircuitStateFn(state.primitive.copy(), coeff=state.coeff)
+        return ComposedOp(group.oplist[:-1] + [repeated_state], coeff=group.coeff)
+
+    return group
+
+
+def _mean(values):
+    """Combine repeated evaluations of an operator."""
+    return np.mean(values, axis=0)
+
+
+class StatevectorEvaluator:
+    """Evaluate energies and state overlaps of a parameterized circuit exactly.
+
+    The circuit is unrolled to U and CX gates once, and the states of a whole batch of
+    parameters are simulated together: the angles of each U gate are evaluated for all points at
+    once and the gates are applied to the array of all statevectors. The Hamiltonian is then
+    applied to all states as a sparse matrix. This is exact and avoids the overhead of sampling
+    circuits on a simulator, but requires memory exponential in the number of qubits.
+    """
+
+    def __init__(
+        self,
+        circuit: QuantumCircuit,
+        operator: OperatorBase,
+        parameters: Optional[List[Parameter]] = None,
+    ) -> None:
+        """
+        Args:
+            circuit: The parameterized circuit preparing the states.
+            operator: The Hamiltonian.
+            parameters: The circuit parameters in the order of the parameter values. Per default
+                the parameters sorted by name.
+        """
+        if parameters is None:
+            parameters = sorted(circuit.parameters, key=lambda p: p.name)
+
+        self.circuit = circuit
+        self.parameters = list(parameters)
+        self._matrix = _operator_matrix(operator)
+
+        unrolled = transpile(circuit, basis_gates=["u", "cx"], optimization_level=0)
+        self._num_qubits = unrolled.num_qubits
+        self._global_phase = unrolled.global_phase
+        self._columns = {parameter: i for i, parameter in enumerate(self.parameters)}
+        self._coefficients = {}
+
+        # the operations as (instruction, statevector axes of the qubits, fixed matrix or None)
+        indices = {qubit: i for i, qubit in enumerate(unrolled.qubits)}
+        self._operations = []
+        for instruction, qargs, _ in unrolled.data:
+            if instruction.name == "barrier":
+                continue
+
+            axes = [self._num_qubits - indices[qubit] for qubit in reversed(qargs)]
+            if any(isinstance(param, ParameterExpression) for param in instruction.params):
+                self._operations.append((instruction, axes, None))
+            else:
+                matrix = instruction.to_matrix().reshape((2,) * (2 * len(qargs)))
+                self._operations.append((instruction, axes, matrix))
+
+    def statevectors(self, points: np.ndarray) -> np.ndarray:
+        """Get the states for a batch of parameters as array of shape ``(len(points), 2^n)``."""
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        num_points = len(points)
+
+        # the axis 0 enumerates the points and the axis n - i holds qubit i
+        states = np.zeros((num_points, 2 ** self._num_qubits), dtype=complex)
+        states[:, 0] = 1
+        states = states.reshape((num_points,) + (2,) * self._num_qubits)
+
+        for instruction, axes, matrix in self._operations:
+            if matrix is None:
+                # a U gate with parameterized angles
+                angles = [self._evaluate(param, points) for param in instruction.params]
+                states = np.moveaxis(states, axes[0], -1)
+                states = np.einsum("b...j,bij->b...i", states, _u_matrices(*angles))
+                states = np.moveaxis(states, -1, axes[0])
+            else:
+                num_qargs = len(axes)
+                states = np.tensordot(
+                    matrix, states, axes=(list(range(num_qargs, 2 * num_qargs)), axes)
+                )
+                states = np.moveaxis(states, list(range(num_qargs)), axes)
+
+        phases = np.exp(1j * self._evaluate(self._global_phase, points))
+        return phases.reshape(-1, 1) * states.reshape(num_points, -1)
+
+    def energies(self, points: np.ndarray) -> np.ndarray:
+        """Get the energies for a batch of parameters."""
+        return self.expectation_values(self.statevectors(points))
+
+    def expectation_values(
+        self, states: np.ndarray, operator: Optional[OperatorBase] = None
+    ) -> np.ndarray:
+        """Get the expectation values of an operator, per default the Hamiltonian, for states."""
+        matrix = self._matrix if operator is None else _operator_matrix(operator)
+        applied = np.asarray(matrix @ states.T).T
+        return np.real(np.sum(np.conj(states) * applied, axis=1))
+
+    def overlaps(self, left: np.ndarray, right: np.ndarray) -> np.ndarray:
+        """Get the absolute overlaps of the states for two batches of parameters."""
+        left_states = self._unique_statevectors(left)
+        return np.abs(np.sum(np.conj(left_states) * self.statevectors(right), axis=1))
+
+    def _unique_statevectors(self, points):
+        # the left states of the QN-SPSA overlaps are all the same
+        points = np.atleast_2d(points)
+        if np.all(points == points[0]):
+            return np.repeat(self.statevectors(points[:1]), len(points), axis=0)
+
+        return self.statevectors(points)
+
+    def _evaluate(self, value, points):
+        """Evaluate a gate parameter for all points at once."""
+        if not isinstance(value, ParameterExpression):
+            return np.full(len(points), float(value))
+
+        parameters = list(value.parameters)
+        columns = [self._columns[parameter] for parameter in parameters]
+
+        # most angles are affine in the parameters, such that they are a single matrix product
+        if id(value) not in self._coefficients:
+            self._coefficients[id(value)] = _affine_coefficients(value, parameters)
+
+        coefficients = self._coefficients[id(value)]
+        if coefficients is not None:
+            offset, slopes = coefficients
+            return offset + points[:, columns] @ slopes
+
+        return np.array(
+            [float(value.bind(dict(zip(parameters, point[columns])))) for point in points]
+        )
+
+
+def _operator_matrix(operator):
+    """Get the matrix of an operator, as sparse matrix if possible."""
+    try:
+        return operator.to_spmatrix()
+    except (AttributeError, NotImplementedError):
+        return np.asarray(operator.to_matrix())
+
+
+def _u_matrices(theta, phi, lam):
+    """Get the matrices of U gates for arrays of angles, with shape ``(len(theta), 2, 2)``."""
+    cos, sin = np.cos(theta / 2), np.sin(theta / 2)
+    matrices = np.empty((len(theta), 2, 2), dtype=complex)
+    matrices[:, 0, 0] = cos
+    matrices[:, 0, 1] = -np.exp(1j * lam) * sin
+    matrices[:, 1, 0] = np.exp(1j * phi) * sin
+    matrices[:, 1, 1] = np.exp(1j * (phi + lam)) * cos
+    return matrices
+
+
+def _affine_coefficients(expression, parameters):
+    """Get the offset and slopes of an expression affine in the parameters, or None otherwise."""
+
+    def evaluate(values):
+        return float(expression.bind(dict(zip(parameters, values))))
+
+    try:
+        offset = evaluate(np.zeros(len(parameters)))
+        slopes = np.array([evaluate(unit) - offset for unit in np.identity(len(parameters))])
+
+        # verify the expression is affine at a generic point
+        point = np.sqrt(np.arange(2, len(parameters) + 2))
+        if not np.isclose(evaluate(point), offset + slopes @ point):
+            return None
+    except ZeroDivisionError:
+        return None
+
+    return offset, slopes
+
+
+class CachedPauliExpectation(PauliExpectation):
+    """A Pauli expectation caching the measurement plans of the observables it converts.
+
+    The measurement plan of a Pauli sum, i.e. the measurement circuits of its groups of
+    qubit-wise commuting Paulis and their coefficients, is stored in the memory of the instance
+    under a hash of the Paulis and coefficients, such that converting the same observable again
+    skips the grouping and the construction of the basis changes. If a filename is given, the
+    groups are further stored in a JSON file, such that repeated runs on the same Hamiltonian
+    skip the grouping. The file is read once per instance and the basis-change circuits are
+    reconstructed from the stored groups, which is fast compared to the grouping.
+    """
+
+    def __init__(self, filename: Optional[str] = None, group_paulis: bool = True) -> None:
+        """
+        Args:
+            filename: The JSON file to store the measurement groups in. If None, the plans are
+                only cached in memory.
+            group_paulis: Whether to group the Pauli measurements into commuting sums.
+        """
+        super().__init__(group_paulis=group_paulis)
+        self.filename = filename
+        self.hits = 0
+        self.misses = 0
+
+        self._plans = {}  # the converted measurements, keyed by the operator hash
+        self._stored = None  # the groups stored in the file, loaded upon the first miss
+
+    def convert(self, operator: OperatorBase) -> OperatorBase:
+        """Convert the measurements like the ``PauliExpectation``, using the cached plans.
+
+        Only measurements of a ``PauliSumOp`` with a numeric coefficient are cached if the Paulis
+        are grouped, all other operators are converted by the ``PauliExpectation``.
+
+        Args:
+            operator: The operator to convert.
+
+        Returns:
+            The converted operator.
+        """
+        cacheable = isinstance(operator, OperatorStateFn) and operator.is_measurement
+        cacheable = cacheable and isinstance(operator.primitive, PauliSumOp)
+        cacheable = cacheable and self._grouper is not None
+        if not cacheable or isinstance(operator.primitive.coeff, ParameterExpression):
+            return super().convert(operator)
+
+        key = _operator_hash(operator.primitive)
+        if key in self._plans:
+            self.hits += 1
+        else:
+            groups = self._load(key)
+            if groups is None:
+                self.misses += 1
+                grouped = self._grouper.convert(operator.primitive)
+                groups = [
+                    [[label, coeff.real, coeff.imag] for label, coeff in group.primitive.to_list()]
+                    for group in grouped.oplist
+                ]
+                self._store(key, groups)
+            else:
+                self.hits += 1
+
+            grouped = SummedOp(
+                [
+                    PauliSumOp(
+                        SparsePauliOp.from_list(
+                            [(label, real + 1j * imag) for label, real, imag in group]
+                        ),
+                        grouping_type="TPB",
+                    )
+                    for group in groups
+                ],
+                coeff=operator.primitive.coeff,
+            )
+            measurement = StateFn(grouped, is_measurement=True)
+            basis_change = PauliBasisChange(
+                replacement_fn=PauliBasisChange.measurement_replacement_fn
+            )
+            self._plans[key] = basis_change.convert(measurement).reduce()
+
+        return self._plans[key] * operator.coeff
+
+    def _load(self, key):
+        """Load the groups stored under ``key`` in the file, or None if they are not stored."""
+        if self.filename is None:
+            return None
+
+        if self._stored is None:
+            self._stored = {}
+            if os.path.exists(self.filename):
+                with open(self.filename, "r") as file:
+                    self._stored = json.load(file)
+
+        return self._stored.get(key, None)
+
+    def _store(self, key, groups):
+        """Store the groups under ``key`` in the file, keeping the other stored plans."""
+        if self.filename is None:
+            return
+
+        self._stored[key] = groups
+
+        # write to a temporary file first to not corrupt the cache if the program is interrupted
+        with open(self.filename + ".tmp", "w") as file:
+            json.dump(self._stored, file)
+        os.replace(self.filename + ".tmp", self.filename)
+
+
+def _operator_hash(operator):
+    """Hash the Paulis and coefficients of a ``PauliSumOp``."""
+    terms = [[label, coeff.real, coeff.imag] for label, coeff in operator.primitive.to_list()]
+    coeff = complex(operator.coeff)
+    serialized = json.dumps([terms, coeff.real, coeff.imag])
+    return hashlib.sha256(serialized.encode()).hexdigest()
+
+
+class _BoundedCircuitSampler(CircuitSampler):
+    """A ``CircuitSampler`` whose operator cache is bounded in size.
+
+    The sampler caches the transpiled circuits of each converted operator. Here, the cache is a
+    least-recently-used cache which holds at most ``max_entries`` operators and at most
+    ``max_instructions`` transpiled instructions in total. An operator whose transpiled circuits
+    alone exceed ``max_instructions`` is not kept, without evicting other operators, and is
+    transpiled again upon the next use.
+    """
+
+    def __init__(
+        self,
+        backend: Union[Backend, BaseBackend, QuantumInstance],
+        max_entries: int = 8,
+        max_instructions: Optional[int] = 1000000,
+        **kwargs,
+    ) -> None:
+        """
+        Args:
+            backend: The backend or quantum instance used to sample the circuits.
+            max_entries: The maximum number of cached operators.
+            max_instructions: The maximum total number of instructions in the cached, transpiled
+                circuits. If None, only the number of operators is bounded.
+            kwargs: Additional arguments for the ``CircuitSampler``.
+        """
+        kwargs.setdefault("caching", "all")
+        super().__init__(backend, **kwargs)
+        self.max_entries = max_entries
+        self.max_instructions = max_instructions
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._cached_ops = OrderedDict()
+        self._cached_sizes = {}
+
+    def convert(
+        self,
+        operator: OperatorBase,
+        params: Optional[Dict[Parameter, Union[float, List[float], List[List[float]]]]] = None,
+    ) -> OperatorBase:
+        """Convert the operator like the ``CircuitSampler`` and update the bounded cache.
+
+        Args:
+            operator: The operator to convert.
+            params: The parameter values to bind, see ``CircuitSampler.convert``.
+
+        Returns:
+            The operator with the circuits replaced by the sampled states.
+        """
+        op_id = operator.instance_id
+        if op_id in self._cached_ops:
+            self.hits += 1
+            self._cached_ops.move_to_end(op_id)
+        else:
+            self.misses += 1
+
+        converted = super().convert(operator, params)
+
+        if op_id not in self._cached_sizes and op_id in self._cached_ops:
+            size = _num_instructions(self._cached_ops[op_id])
+            if self.max_instructions is not None and size > self.max_instructions:
+                # do not evict the other operators for an operator that never fits
+                del self._cached_ops[op_id]
+            else:
+                self._cached_sizes[op_id] = size
+        self._evict()
+
+        return converted
+
+    def clear_cache(self) -> None:
+        """Clear the cached operators, but keep the counts of hits, misses and evictions."""
+        super().clear_cache()
+        # the base class replaces the cache by a plain dictionary
+        self._cached_ops = OrderedDict()
+        self._cached_sizes = {}
+
+    def cache_info(self) -> Dict[str, int]:
+        """Get the hits, misses, evictions and the current size of the operator cache."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._cached_ops),
+            "instructions": sum(self._cached_sizes.values()),
+        }
+
+    def _evict(self):
+        total = sum(self._cached_sizes.values())
+        while len(self._cached_ops) > self.max_entries or (
+            self.max_instructions is not None and total > self.max_instructions
+        ):
+            op_id, _ = self._cached_ops.popitem(last=False)
+            total -= self._cached_sizes.pop(op_id, 0)
+            self.evictions += 1
+
+
+def _num_instructions(op_cache):
+    """Count the instructions of the transpiled circuits in a cached operator."""
+    circuits = []
+    templates = getattr(op_cache, "transpiled_circ_templates", None)
+    for cache in [op_cache.transpiled_circ_cache, templates]:
+        if cache is not None:
+            circuits += list(cache)
+
+    if not circuits:
+        circuits = [sfn.primitive for sfn in op_cache.circuit_ops_cache.values()]
+
+    return sum(len(circuit.data) for circuit in circuits)
+
+
+class SubspaceMitigatedQuantumInstance(QuantumInstance):
+    """A quantum instance correcting readout errors in the subspace of the observed bitstrings.
+
+    The readout errors are assumed to be uncorrelated between the qubits, such that all
+    measured qubits are calibrated with only two circuits, preparing all qubits in 0 and all
+    qubits in 1. The calibrations are cached per physical qubit for the lifetime of the instance.
+    The counts are corrected by solving the readout error equations restricted to the observed
+    bitstrings [1], which requires memory proportional to the number of observed bitstrings
+    instead of :math:`2^n`.
+
+    References:
+        [1] P. D. Nation et al., Scalable mitigation of measurement errors on quantum computers,
+            `arXiv:2108.12518 <https://arxiv.org/abs/2108.12518>`_
+    """
+
+    def __init__(
+        self,
+        backend: Union[Backend, BaseBackend],
+        direct_limit: int = 1000,
+        chunk_size: int = 256,
+        **kwargs,
+    ) -> None:
+        """
+        Args:
+            backend: The backend to execute the circuits on.
+            direct_limit: Up to this number of observed bitstrings, the reduced readout error
+                matrix is constructed and inverted directly. For more bitstrings, the equations
+                are solved iteratively without storing the matrix.
+            chunk_size: The number of matrix rows constructed at once in the iterative solver.
+            kwargs: Additional arguments for the ``QuantumInstance``.
+        """
+        super().__init__(backend, **kwargs)
+        self.direct_limit = direct_limit
+        self.chunk_size = chunk_size
+
+        # physical qubit -> (probability to read 1 if 0 is prepared, to read 0 if 1 is prepared)
+        self._readout_errors = {}
+
+    def execute(
+        self, circuits: Union[QuantumCircuit, List[QuantumCircuit]], had_transpiled: bool = False
+    ) -> Result:
+        """Execute the circuits and correct the readout errors of their counts.
+
+        The measured physical qubits which are not yet calibrated are calibrated first.
+        Statevector simulations are executed without mitigation.
+
+        Args:
+            circuits: The circuit or the list of circuits to execute.
+            had_transpiled: Whether the circuits are already transpiled.
+
+        Returns:
+            The result with the mitigated counts.
+        """
+        if self.is_statevector:
+            return super().execute(circuits, had_transpiled)
+
+        if not isinstance(circuits, list):
+            circuits = [circuits]
+
+        if not had_transpiled:
+            circuits = self.transpile(circuits)
+
+        result = super().execute(circuits, had_transpiled=True)
+
+        layouts = [_measured_qubits(circuit) for circuit in circuits]
+        self._calibrate({qubit for layout in layouts for qubit in layout if qubit is not None})
+
+        mitigated = deepcopy(result)
+        for i, layout in enumerate(layouts):
+            mitigated.results[i].data.counts = self._mitigate(result.get_counts(i), layout)
+
+        return mitigated
+
+    def _calibrate(self, qubits):
+        """Calibrate the readout errors of the qubits which are not yet calibrated."""
+        missing = sorted(qubit for qubit in qubits if qubit not in self._readout_errors)
+        if len(missing) == 0:
+            return
+
+        num_qubits = max(missing) + 1
+        circuits = []
+        for prepared in [0, 1]:
+            circuit = QuantumCircuit(num_qubits, len(missing))
+            if prepared == 1:
+                circuit.x(missing)
+            circuit.measure(missing, list(range(len(missing))))
+            circuits.append(circuit)
+
+        # keep the qubits in place, such that each measurement calibrates the physical qubit
+        circuits = transpile(
+            circuits, self.backend, initial_layout=list(range(num_qubits)), optimization_level=0
+        )
+        result = super().execute(circuits, had_transpiled=True)
+
+        flipped = []
+        for prepared in [0, 1]:
+            counts = result.get_counts(prepared)
+            bits = _bit_array([bitstring.replace(" ", "") for bitstring in counts.keys()])
+            frequencies = np.array(list(counts.values())) / sum(counts.values())
+            ones = frequencies.dot(bits)  # the probability to read 1 on each qubit
+            flipped.append(ones if prepared == 0 else 1 - ones)
+
+        for i, qubit in enumerate(missing):
+            self._readout_errors[qubit] = (flipped[0][i], flipped[1][i])
+
+    def _mitigate(self, counts, layout):
+        """Correct the counts of a circuit whose clbits measure the qubits in ``layout``."""
+        bitstrings = list(counts.keys())
+        shots = sum(counts.values())
+        probabilities = np.array(list(counts.values()), dtype=float) / shots
+        bits = _bit_array([bitstring.replace(" ", "") for bitstring in bitstrings])
+
+        # the readout matrices of each clbit, indexed as [read, prepared]
+        matrices = []
+        for qubit in layout:
+            if qubit is None:
+                matrices.append(np.identity(2))
+            else:
+                p01, p10 = self._readout_errors[qubit]
+                matrices.append(np.array([[1 - p01, p10], [p01, 1 - p10]]))
+
+        def rows(indices):
+            block = np.ones((len(indices), len(bitstrings)))
+            for k, matrix in enumerate(matrices):
+                block *= matrix[bits[indices, k][:, None], bits[None, :, k]]
+            return block
+
+        num = len(bitstrings)
+        chunks = [
+            np.arange(i, min(i + self.chunk_size, num)) for i in range(0, num, self.chunk_size)
+        ]
+
+        # normalize the columns in the subspace, such that the solution is a quasi-distribution
+        column_sums = np.zeros(num)
+        for chunk in chunks:
+            column_sums += np.sum(rows(chunk), axis=0)
+
+        if num <= self.direct_limit:
+            quasi = np.linalg.solve(rows(np.arange(num)) / column_sums, probabilities)
+        else:
+
+            def matvec(vector):
+                scaled = np.ravel(vector) / column_sums
+                return np.concatenate([rows(chunk).dot(scaled) for chunk in chunks])
+
+            operator = LinearOperator((num, num), matvec=matvec)
+            quasi, _ = gmres(operator, probabilities, x0=probabilities, atol=1e-10)
+
+        mitigated = _nearest_probabilities(quasi) * shots
+        return {bitstring: value for bitstring, value in zip(bitstrings, mitigated) if value > 0}
+
+
+def _measured_qubits(circuit):
+    """Get the qubit measured into each clbit of a circuit, or None if the clbit is unused."""
+    layout = [None] * circuit.num_clbits
+    for instruction, qargs, cargs in circuit.data:
+        if instruction.name == "measure":
+            layout[circuit.clbits.index(cargs[0])] = circuit.qubits.index(qargs[0])
+
+    return layout
+
+
+def _bit_array(bitstrings):
+    """Get the bits of big endian bitstrings as array, where the ``k``-th column is bit ``k``."""
+    bits = np.frombuffer("".join(bitstrings).encode(), dtype=np.uint8)
+    bits = bits.reshape(len(bitstrings), -1)[:, ::-1]
+    return (bits == ord("1")).astype(int)
+
+
+def _nearest_probabilities(quasi):
+    """Get the probability distribution closest to a quasi-probability distribution.
+
+    This is the algorithm of Smolin et al., Phys. Rev. Lett. 108, 070502 (2012).
+    """
+    order = np.argsort(quasi)
+    sorted_quasi = quasi[order]
+    num = len(quasi)
+
+    # remove the most negative values and distribute their weight over the remaining ones
+    accumulated = 0.0
+    i = 0
+    while i < num and sorted_quasi[i] + accumulated / (num - i) < 0:
+        accumulated += sorted_quasi[i]
+        sorted_quasi[i] = 0
+        i += 1
+    sorted_quasi[i:] += accumulated / max(num - i, 1)
+
+    probabilities = np.empty(num)
+    probabilities[order] = sorted_quasi
+    return probabilities
+
+
 class _SPSA(Optimizer):
     """A generalized SPSA optimizer including support for Hessians."""
 
@@ -203,7 +1354,7 @@ class _SPSA(Optimizer):
         trust_region: bool = False,
         learning_rate: Optional[Union[float, Callable[[], Iterator]]] = None,
         perturbation: Optional[Union[float, Callable[[], Iterator]]] = None,
-        resamplings: int = 1,
+        resamplings: Union[int, Dict[int, int], str] = 1,
         last_avg: int = 1,
         callback: Optional[CALLBACK] = None,
         # 2-SPSA arguments
@@ -215,10 +1366,25 @@ class _SPSA(Optimizer):
         initial_hessian: Optional[np.ndarray] = None,
         expectation: Optional[ExpectationBase] = None,
         backend: Optional[Union[Backend, QuantumInstance]] = None,
+        checkpoint_interval: Optional[int] = None,
+        checkpoint_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        resume_state: Optional[Dict[str, Any]] = None,
+        seed: Optional[Union[int, np.random.SeedSequence]] = None,
+        pregenerate_perturbations: bool = False,
+        estimation_error: Union[bool, str] = True,
+        evaluate_final: bool = True,
+        target_snr: float = 1.0,
+        max_resamplings: int = 10,
+        termination_checker: Optional[TerminationChecker] = None,
+        history_dtype: Union[str, type] = "float64",
+        history_stride: int = 1,
+        shot_allocator: Optional[PauliShotAllocator] = None,
+        evaluator: Optional[StatevectorEvaluator] = None,
     ) -> None:
         r"""
         Args:
-            maxiter: The maximum number of iterations.
+            maxiter: The maximum number of iterations. If 0, the calibration and the initial
+                evaluations are skipped and the initial point is returned.
             blocking: If True, only accepts updates that improve the loss.
             allowed_increase: If blocking is True, this sets by how much the loss can increase
                 and still be accepted. If None, calibrated automatically to be twice the
@@ -228,6 +1394,9 @@ class _SPSA(Optimizer):
                 :math:`a_k`.
             perturbation: A generator yielding the perturbation magnitudes :math:`c_k`.
             resamplings: In each step, sample the gradient (and preconditioner) this many times.
+                Can be an integer, a dictionary mapping the iteration to the number of
+                resamplings, or ``"adaptive"`` to choose the number of resamplings such that
+                the gradient reaches the signal-to-noise ratio ``target_snr``.
             last_avg: Return the average of the ``last_avg`` parameters instead of just the
                 last parameter values.
             callback: A callback function passed information in each iteration step. The
@@ -251,6 +1420,41 @@ class _SPSA(Optimizer):
             expectation: An expectation converter.
             backend: A backend to evaluate the circuits, if the overlap function is provided as
                 a circuit and the objective function as operator expression.
+            checkpoint_interval: If set, the optimizer state is passed to the
+                ``checkpoint_callback`` every ``checkpoint_interval`` iterations.
+            checkpoint_callback: A callable receiving the serializable optimizer state, see
+                ``checkpoint_interval``.
+            resume_state: An optimizer state, as passed to the ``checkpoint_callback``, to
+                resume the optimization from instead of starting from the initial point. Each
+                state only holds the history since the previous checkpoint. To restore the whole
+                history, its ``"history"`` is replaced by the list of the histories of all states.
+            seed: The seed for the random perturbations.
+            pregenerate_perturbations: If True, the random perturbations for all iterations are
+                generated at once at the start of the optimization.
+            estimation_error: Whether to pass the standard error of the function evaluations to
+                the callback. If ``"lazy"``, the callback receives callables that compute the
+                errors of all evaluations in an iteration upon the first call. If False, the
+                error is reported as 0.
+            evaluate_final: If True, the loss is evaluated at the final point. If False, the
+                final loss is returned as None, e.g. to evaluate it together with other
+                observables.
+            target_snr: If ``resamplings`` is ``"adaptive"``, the number of resamplings for the
+                next iteration is chosen such that the averaged gradient reaches this
+                signal-to-noise ratio, estimated from the gradient samples of the current
+                iteration.
+            max_resamplings: If ``resamplings`` is ``"adaptive"``, the maximal number of
+                resamplings per iteration.
+            termination_checker: A criterion to stop the optimization before ``maxiter``
+                iterations, see :class:`TerminationChecker`. The reason of the termination is
+                stored in ``history.metadata["stop_reason"]``.
+            history_dtype: The data type of the losses and parameters in the history, e.g.
+                ``"float32"`` to halve its size.
+            history_stride: Only record every ``history_stride``-th iteration in the history.
+            shot_allocator: If set, the shots are allocated to the Pauli measurement groups of the
+                loss with this allocator, see :class:`PauliShotAllocator`.
+            evaluator: If set, the loss and the overlaps are evaluated exactly with this
+                evaluator instead of sampling circuits. The parameters of the evaluator must be
+                ordered like the sorted parameters of the loss.
         """
         super().__init__()
 
@@ -278,6 +1482,20 @@ class _SPSA(Optimizer):
         self.perturbation_dims = perturbation_dims
         self.initial_hessian = initial_hessian
         self.trust_region = trust_region
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_callback = checkpoint_callback
+        self.resume_state = resume_state
+        self.seed = seed
+        self.pregenerate_perturbations = pregenerate_perturbations
+        self.estimation_error = estimation_error
+        self.evaluate_final = evaluate_final
+        self.target_snr = target_snr
+        self.max_resamplings = max_resamplings
+        self.termination_checker = termination_checker
+        self.history_dtype = history_dtype
+        self.history_stride = history_stride
+        self.shot_allocator = shot_allocator
+        self.evaluator = evaluator
 
         # runtime arguments
         self.grad_params = None
@@ -285,16 +1503,23 @@ class _SPSA(Optimizer):
         self.hessian_params = None
         self.hessian_expr = None
         self.gradient_expressions = None
+        self._hessian_from_loss = False
 
         if backend is not None:
-            self._sampler = CircuitSampler(backend, caching="all")
+            self._sampler = _BoundedCircuitSampler(backend)
             self._expectation = expectation
         else:
             self._sampler = None
             self._expectation = None
 
+        # the sampler of the loss, which differs from ``_sampler`` if the shots are allocated
+        self._energy_sampler = self._sampler
+        self._split_expressions = None
+
         self._nfev = None
         self._moving_avg = None  # moving average of the preconditioner
+        self._perturbations = None  # the source of random perturbations
+        self._next_resamplings = None  # the number of resamplings if they are adaptive
 
     @staticmethod
     def calibrate(
@@ -306,6 +1531,7 @@ class _SPSA(Optimizer):
         alpha: float = 0.602,
         gamma: float = 0.101,
         modelspace: bool = False,
+        generator: Optional[np.random.Generator] = None,
     ) -> Tuple[Iterator[float], Iterator[float]]:
         r"""Calibrate SPSA parameters with a powerseries as learning rate and perturbation coeffs.
 
@@ -325,22 +1551,27 @@ class _SPSA(Optimizer):
             gamma: The exponent of the perturbation powerseries.
             modelspace: Whether the target magnitude is the difference of parameter values
                 or function values (= model space).
+            generator: The random generator for the perturbations. If None, a new unseeded
+                generator is used.
 
         Returns:
-            tuple(generator, generator): A tuple of powerseries generators, the first one for the
-                learning rate and the second one for the perturbation.
+            tuple(Powerlaw, Powerlaw): A tuple of powerseries iterator factories, the first one
+                for the learning rate and the second one for the perturbation.
         """
         if target_magnitude is None:
             target_magnitude = 2 * np.pi / 10
 
+        if generator is None:
+            generator = np.random.default_rng()
+
         dim = len(initial_point)
 
         # compute the average magnitude of the first step
         steps = 25
         avg_magnitudes = 0
-        for _ in range(steps):
-            # compute the random directon
-            pert = np.array([1 - 2 * np.random.binomial(1, 0.5) for _ in range(dim)])
+        # compute the random directions
+        perts = 1 - 2 * generator.integers(0, 2, size=(steps, dim))
+        for pert in perts:
             delta = loss(initial_point + c * pert) - loss(initial_point - c * pert)
             avg_magnitudes += np.abs(delta / (2 * c))
 
@@ -356,11 +1587,9 @@ class _SPSA(Optimizer):
             warnings.warn(f"Calibration failed, using {target_magnitude} for `a`")
             a = target_magnitude
 
-        def learning_rate():
-            return powerseries(a, alpha, stability_constant)
-
-        def perturbation():
-            return powerseries(c, gamma)
+        # use serializable iterators, such that the calibration can be stored in a checkpoint
+        learning_rate = Powerlaw(float(a), alpha, stability_constant)
+        perturbation = Powerlaw(c, gamma, 0)
 
         return learning_rate, perturbation
 
@@ -378,6 +1607,63 @@ class _SPSA(Optimizer):
         # sampled = self._sampler.convert(loss, params=values_dict)
         # results = np.real(sampled.eval())
 
+    def evaluate(self, loss: OperatorBase, points: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Evaluate the loss at many parameter points in as few jobs as possible.
+
+        The points are bound into a single sampler call per job, where a job contains as many
+        points as the ``max_experiments`` of the backend allows. This is useful to scan the
+        loss landscape, e.g. to choose an initial point.
+
+        Args:
+            loss: The loss as operator expression.
+            points: The parameter values, one point per row, ordered like the sorted parameters
+                of the loss.
+
+        Returns:
+            The loss values and their standard errors. The errors are 0 if the loss is evaluated
+            exactly, on a statevector backend, or if ``estimation_error`` is False.
+
+        Raises:
+            ValueError: If neither a backend nor an exact evaluator is set.
+        """
+        points = np.atleast_2d(points)
+        if self.evaluator is not None:
+            return self.evaluator.energies(points), np.zeros(len(points))
+
+        if self._sampler is None:
+            raise ValueError("A backend is required to evaluate the loss.")
+
+        sorted_params = sorted(loss.parameters, key=lambda p: p.name)
+        quantum_instance = self._sampler.quantum_instance
+
+        # the number of points per job is limited by the number of circuits the backend accepts
+        max_experiments = getattr(quantum_instance.backend.configuration(), "max_experiments", None)
+        if max_experiments is None or quantum_instance.is_statevector:
+            points_per_job = len(points)
+        else:
+            points_per_job = max(1, max_experiments // max(1, _num_circuits(loss)))
+
+        values, errors = [], []
+        for start in range(0, len(points), points_per_job):
+            chunk = points[start : start + points_per_job]
+            values_dict = {param: chunk[:, i].tolist() for i, param in enumerate(sorted_params)}
+            sampled = self._sampler.convert(loss, params=values_dict)
+            values.append(np.real(sampled.eval()))
+
+            # statevector values are exact and have no sampling error
+            if (
+                self.estimation_error
+                and self._expectation is not None
+                and not quantum_instance.is_statevector
+            ):
+                shots = quantum_instance.run_config.shots
+                operators = [sampled[i] for i in range(len(chunk))]
+                errors.append(_EstimationErrors(operators, self._expectation, shots)())
+            else:
+                errors.append(np.zeros(len(chunk)))
+
+        return np.concatenate(values), np.concatenate(errors)
+
     def _point_samples(self, loss, x, eps, deltas1, deltas2):
         # cache gradient epxressions
         if self.gradient_expressions is None:
@@ -410,6 +1696,7 @@ class _SPSA(Optimizer):
                         loss.assign_parameters(dict(zip(sorted_params, x_mm))),
                     ]
                     self.hessian_params = [x_pp, x_pm, x_mp, x_mm]
+                    self._hessian_from_loss = True
 
                 self.gradient_expressions = ListOp(self.grad_expr + self.hessian_expr)
             else:
@@ -429,51 +1716,26 @@ class _SPSA(Optimizer):
         x_mm_ = np.array([x - eps * delta1 for delta1 in deltas1])
         y_ = np.array([x for _ in deltas1])
 
-        # build dictionary
-        values_dict = {}
-
-        if self.second_order:
-            for params, value_matrix in zip(
-                self.grad_params + self.hessian_params,
-                [theta_p_, theta_m_, x_pp_, x_pm_, x_mp_, x_mm_, y_],
-            ):
-                values_dict.update(
-                    {params[i]: value_matrix[:, i].tolist() for i in range(num_parameters)}
-                )
+        points = [theta_p_, theta_m_, x_pp_, x_pm_, x_mp_, x_mm_, y_]
+        if self.evaluator is not None:
+            results = self._evaluate_exactly(points)
+            estimation_errors = [[0.0, 0.0] for _ in range(resamplings)]
         else:
-            for params, value_matrix in zip(self.grad_params, [theta_p_, theta_m_]):
-                values_dict.update(
-                    {params[i]: value_matrix[:, i].tolist() for i in range(num_parameters)}
-                )
-
-        # execute at once
-        sampled = self._sampler.convert(self.gradient_expressions, params=values_dict)
-        results = np.real(sampled.eval())
+            results, estimation_errors = self._sample(points, num_parameters, resamplings)
 
-        # put results together
-        gradient_estimate = np.zeros(x.size)
+        # put results together, the gradient samples are kept to estimate their variance
+        gradient_samples = (results[:, 0] - results[:, 1]).reshape(-1, 1) / (2 * eps) * deltas1
+        gradient_estimate = np.sum(gradient_samples, axis=0)
         fval_estimate = 0
         for i in range(resamplings):
             self._nfev += 2
-            gradient_estimate += (results[i, 0] - results[i, 1]) / (2 * eps) * deltas1[0]
             fval_estimate += (results[i, 0] + results[i, 1]) / 2
 
             if self.callback is not None:
-                if self._expectation:
-                    # get estimation error for the function evaluations
-                    variance = np.array(
-                        [
-                            self._expectation.compute_variance(sampled_op)
-                            for sampled_op in sampled[i][:2]
-                        ]
-                    )
-                    shots = self._sampler.quantum_instance.run_config.shots
-                    estimation_error = np.sqrt(variance / shots)
-                else:
-                    estimation_error = [0.0, 0.0]
-
-                self.callback(self._nfev - 1, theta_p_[i, :], results[i, 0], estimation_error[0])
-                self.callback(self._nfev, theta_m_[i, :], results[i, 1], estimation_error[1])
+                self.callback(
+                    self._nfev - 1, theta_p_[i, :], results[i, 0], estimation_errors[i][0]
+                )
+                self.callback(self._nfev, theta_m_[i, :], results[i, 1], estimation_errors[i][1])
 
         hessian_estimate = np.zeros((x.size, x.size))
         if self.second_order:
@@ -490,12 +1752,140 @@ class _SPSA(Optimizer):
             gradient_estimate / resamplings,
             hessian_estimate / resamplings,
             fval_estimate / resamplings,
+            gradient_samples,
         )
 
+    def _sample(self, points, num_parameters, resamplings):
+        """Sample the gradient expressions at the SPSA points, in the order of ``points``."""
+        # build dictionary
+        values_dict = {}
+
+        if self.second_order:
+            for params, value_matrix in zip(self.grad_params + self.hessian_params, points):
+                values_dict.update(
+                    {params[i]: value_matrix[:, i].tolist() for i in range(num_parameters)}
+                )
+        else:
+            for params, value_matrix in zip(self.grad_params, points[:2]):
+                values_dict.update(
+                    {params[i]: value_matrix[:, i].tolist() for i in range(num_parameters)}
+                )
+
+        # execute at once, unless the overlaps of QN-SPSA must keep the original shots
+        allocated = self._energy_sampler is not self._sampler
+        if allocated and self.second_order and not self._hessian_from_loss:
+            if self._split_expressions is None:
+                self._split_expressions = (ListOp(self.grad_expr), ListOp(self.hessian_expr))
+
+            energies, overlaps = self._split_expressions
+            sampled = self._energy_sampler.convert(energies, params=values_dict)
+            sampled_overlaps = self._sampler.convert(overlaps, params=values_dict)
+            results = np.concatenate(
+                (np.real(sampled.eval()), np.real(sampled_overlaps.eval())), axis=1
+            )
+        else:
+            sampled = self._energy_sampler.convert(self.gradient_expressions, params=values_dict)
+            results = np.real(sampled.eval())
+
+        if self.shot_allocator is not None:
+            self.shot_allocator.observe(
+                [sampled[i][j] for i in range(resamplings) for j in range(2)], self._expectation
+            )
+
+        # the estimation errors of the function evaluations are only needed for the callback
+        estimation_errors = None
+        if self.callback is not None:
+            estimation_errors = self._get_estimation_errors(sampled, resamplings)
+
+        return results, estimation_errors
+
+    def _evaluate_exactly(self, points):
+        """Evaluate the gradient expressions at the SPSA points with the exact evaluator."""
+        resamplings = len(points[0])
+        if not self.second_order:
+            energies = self.evaluator.energies(np.concatenate(points[:2]))
+            return energies.reshape(2, resamplings).T
+
+        if self._hessian_from_loss:
+            energies = self.evaluator.energies(np.concatenate(points[:6]))
+            return energies.reshape(6, resamplings).T
+
+        # QN-SPSA: the Hessian is estimated from the overlaps with the current point
+        energies = self.evaluator.energies(np.concatenate(points[:2])).reshape(2, resamplings)
+        overlaps = [self.evaluator.overlaps(points[6], right) for right in points[2:6]]
+        return np.concatenate((energies, overlaps)).T
+
+    def _reset_expressions(self):
+        """Reset the cached expressions derived from the loss, e.g. if the loss changed."""
+        self.grad_params = None
+        self.grad_expr = None
+        self.gradient_expressions = None
+        self._split_expressions = None
+        if self._hessian_from_loss:
+            self.hessian_params = None
+            self.hessian_expr = None
+            self._hessian_from_loss = False
+
+    def _get_estimation_errors(self, sampled, resamplings):
+        """Get the standard errors of the SPSA function evaluations in ``sampled``.
+
+        Returns a nested list where the entry ``[i][j]`` is the error of the ``j``-th function
+        evaluation of the ``i``-th resampling. If the errors are computed lazily, the entries
+        are callables returning the error and all errors are computed upon the first call.
+        """
+        if not self.estimation_error or not self._expectation:
+            return [[0.0, 0.0] for _ in range(resamplings)]
+
+        operators = [sampled[i][j] for i in range(resamplings) for j in range(2)]
+        shots = self._energy_sampler.quantum_instance.run_config.shots
+        errors = _EstimationErrors(operators, self._expectation, shots)
+
+        if self.estimation_error == "lazy":
+            return [[partial(errors.get, 2 * i + j) for j in range(2)] for i in range(resamplings)]
+
+        return errors().reshape(resamplings, 2).tolist()
+
+    def _history_capacity(self, first_iteration):
+        """Get the number of history records of the remaining iterations."""
+        return max(0, int(np.ceil((self.maxiter - first_iteration + 1) / self.history_stride)))
+
+    def _total_resamplings(self):
+        """Get the total number of resamplings over all iterations."""
+        if isinstance(self.resamplings, dict):
+            return sum(self.resamplings.get(k, 1) for k in range(1, self.maxiter + 1))
+        if self.resamplings == "adaptive":
+            # the actual number is not known in advance, use the upper bound
+            return self.max_resamplings * self.maxiter
+        return self.resamplings * self.maxiter
+
+    def _adapt_resamplings(self, gradient_samples):
+        r"""Choose the number of resamplings to reach the target signal-to-noise ratio.
+
+        The variance of the averaged gradient over :math:`n` samples is :math:`tr(\Sigma) / n`,
+        where :math:`\Sigma` is the covariance of a single gradient sample, hence the target is
+        reached for :math:`n = SNR^2 tr(\Sigma) / \|g\|^2`.
+        """
+        # at least 2 samples are required to estimate the variance
+        minimum = min(2, self.max_resamplings)
+        if len(gradient_samples) < 2:
+            return minimum
+
+        mean = np.mean(gradient_samples, axis=0)
+        total_variance = np.sum(np.var(gradient_samples, axis=0, ddof=1))
+        squared_norm = mean.dot(mean)
+
+        if squared_norm == 0:
+            return self.max_resamplings
+
+        required = int(np.ceil(self.target_snr ** 2 * total_variance / squared_norm))
+        return int(np.clip(required, minimum, self.max_resamplings))
+
     def _compute_update(self, loss, x, k, eps):
         # compute the perturbations
         if isinstance(self.resamplings, dict):
             avg = self.resamplings.get(k, 1)
+        elif self.resamplings == "adaptive":
+            avg = self._next_resamplings
         else:
             avg = self.resamplings
 
@@ -503,10 +1893,16 @@ class _SPSA(Optimizer):
         preconditioner = np.zeros((x.size, x.size))
 
         # accumulate the number of samples
-        deltas1 = [bernoulli_perturbation(x.size, self.perturbation_dims) for _ in range(avg)]
-        deltas2 = [bernoulli_perturbation(x.size, self.perturbation_dims) for _ in range(avg)]
+        deltas = self._perturbations.sample(2 * avg)
+        deltas1, deltas2 = deltas[:avg], deltas[avg:]
+
+        gradient, preconditioner, fval, gradient_samples = self._point_samples(
+            loss, x, eps, deltas1, deltas2
+        )
 
-        gradient, preconditioner, fval = self._point_samples(loss, x, eps, deltas1, deltas2)
+        if self.resamplings == "adaptive":
+            self._next_resamplings = self._adapt_resamplings(gradient_samples)
+            self.history.metadata["resamplings"].append(avg)
 
         # update the exponentially smoothed average
         if self.second_order:
@@ -523,70 +1919,162 @@ class _SPSA(Optimizer):
         return gradient, fval
 
     def _minimize(self, loss, initial_point):
-        # handle circuits case
-        if not callable(loss):
-            # sorted loss parameters
+        if self.evaluator is not None:
+            # exact energies of the statevectors, which take the place of the sampled loss
+            def loss_callable(x):
+                return self.evaluator.energies(x)[0]
+
+        elif not callable(loss):
+            # handle circuits case, with the sorted loss parameters
             sorted_params = sorted(loss.parameters, key=lambda p: p.name)
 
             def loss_callable(x):
                 value_dict = dict(zip(sorted_params, x))
-                return self._sampler.convert(loss, params=value_dict).eval().real
+                return self._energy_sampler.convert(loss, params=value_dict).eval().real
 
         else:
             loss_callable = loss
 
-        self.history = {
-            "loss": [],
-            "params": [],
-            "time": [],
-        }
-
-        # ensure learning rate and perturbation are set
-        # this happens only here because for the calibration the loss function is required
-        if self.learning_rate is None and self.perturbation is None:
-            get_learning_rate, get_perturbation = self.calibrate(loss_callable, initial_point)
-            eta = get_learning_rate()
-            eps = get_perturbation()
-        elif self.learning_rate is None or self.perturbation is None:
-            raise ValueError("If one of learning rate or perturbation is set, both must be set.")
+        # replace the loss by the expectation value with allocated shots per measurement group
+        allocate_shots = self.shot_allocator is not None and self._sampler is not None
+        allocate_shots = allocate_shots and not callable(loss) and self.evaluator is None
+        if allocate_shots:
+            self.shot_allocator.initialize(loss, self._sampler.quantum_instance)
+            if self.resume_state is not None and self.resume_state.get("shot_allocator"):
+                self.shot_allocator.set_state(self.resume_state["shot_allocator"])
+                loss = self.shot_allocator.allocated_operator()
+            else:
+                loss = self.shot_allocator.allocate()
+
+            self._energy_sampler = _BoundedCircuitSampler(self.shot_allocator.quantum_instance)
+            self._reset_expressions()
+
+        if self.resume_state is not None:
+            # continue from a checkpoint, this skips the calibration and initial evaluations
+            state = self.resume_state
+            get_learning_rate = _load_iterator_factory(state["learning_rate"], self.learning_rate)
+            get_perturbation = _load_iterator_factory(state["perturbation"], self.perturbation)
+
+            x = np.asarray(state["x"])
+            self._perturbations = BernoulliPerturbations(x.size, self.perturbation_dims)
+            self._perturbations.set_state(state["perturbations"])
+            fx = state["fx"]
+            self._next_resamplings = state.get("resamplings")
+            first_iteration = state["iteration"] + 1
+            self._moving_avg = np.asarray(state["moving_avg"])
+            self._nfev = state["nfev"]
+            self.allowed_increase = state["allowed_increase"]
+            self.history = OptimizerHistory.from_dict(
+                state["history"], x.size, capacity=self._history_capacity(first_iteration)
+            )
+            last_steps = deque(np.asarray(step) for step in state["last_steps"])
+            if state.get("termination_checker") is not None:
+                self.termination_checker = TerminationChecker.deserialize(
+                    state["termination_checker"]
+                )
         else:
-            if isinstance(self.learning_rate, float):
-                eta = constant(self.learning_rate)
+            self.history = OptimizerHistory(
+                len(initial_point),
+                capacity=self._history_capacity(1),
+                dtype=self.history_dtype,
+                stride=self.history_stride,
+            )
+
+            self._perturbations = BernoulliPerturbations(
+                len(initial_point), self.perturbation_dims, seed=self.seed
+            )
+
+            # ensure learning rate and perturbation are set
+            # this happens only here because for the calibration the loss function is required
+            if self.learning_rate is None and self.perturbation is None:
+                if self.maxiter == 0:
+                    # without iterations, e.g. if only points are evaluated, nothing is calibrated
+                    get_learning_rate, get_perturbation = Constant(0.0), Constant(0.0)
+                else:
+                    get_learning_rate, get_perturbation = self.calibrate(
+                        loss_callable, initial_point, generator=self._perturbations.generator
+                    )
+            elif self.learning_rate is None or self.perturbation is None:
+                raise ValueError(
+                    "If one of learning rate or perturbation is set, both must be set."
+                )
             else:
-                eta = self.learning_rate()
+                get_learning_rate = _load_iterator_factory(None, self.learning_rate)
+                get_perturbation = _load_iterator_factory(None, self.perturbation)
 
-            if isinstance(self.perturbation, float):
-                eps = constant(self.perturbation)
+            # prepare some initials
+            x = np.asarray(initial_point)
+            fx = None
+            first_iteration = 1
+            self._next_resamplings = None
+
+            if self.initial_hessian is None:
+                self._moving_avg = np.identity(x.size)
             else:
-                eps = self.perturbation()
+                self._moving_avg = self.initial_hessian
 
-        # prepare some initials
-        x = np.asarray(initial_point)
+            self._nfev = 0
 
-        if self.initial_hessian is None:
-            self._moving_avg = np.identity(x.size)
-        else:
-            self._moving_avg = self.initial_hessian
+            # if blocking is enabled we need to keep track of the function values
+            if self.blocking and self.maxiter > 0:
+                fx = loss_callable(x)
+
+                self._nfev += 1
+                if self.allowed_increase is None:
+                    self.allowed_increase = 2 * self.estimate_stddev(loss_callable, x)
 
-        self._nfev = 0
+            # keep track of the last few steps to return their average
+            last_steps = deque([x])
 
-        # if blocking is enabled we need to keep track of the function values
-        if self.blocking:
-            fx = loss_callable(x)
+            if self.pregenerate_perturbations:
+                self._perturbations.pregenerate(2 * self._total_resamplings())
 
-            self._nfev += 1
-            if self.allowed_increase is None:
-                self.allowed_increase = 2 * self.estimate_stddev(loss_callable, x)
+        # adaptive resamplings start with the minimal number to estimate the gradient variance
+        if self.resamplings == "adaptive":
+            self.history.metadata.setdefault("resamplings", [])
+            if self._next_resamplings is None:
+                self._next_resamplings = min(2, self.max_resamplings)
+
+        eta = get_learning_rate()
+        eps = get_perturbation()
+
+        # move the iterators to the position of the first iteration, this is only required
+        # if the optimization is resumed from a checkpoint
+        for _ in range(1, first_iteration):
+            next(eta)
+            next(eps)
 
         logger.info("=" * 30)
         logger.info("Starting SPSA optimization")
         start = time()
 
-        # keep track of the last few steps to return their average
-        last_steps = deque([x])
+        def checkpoint(k):
+            if self.checkpoint_callback is not None and self.checkpoint_interval:
+                if k % self.checkpoint_interval == 0:
+                    self.checkpoint_callback(
+                        self._get_state(k, x, fx, last_steps, get_learning_rate, get_perturbation)
+                    )
+
+        def terminate(x_next, fx_next, update, accepted):
+            if self.termination_checker is None:
+                return False
 
-        for k in range(1, self.maxiter + 1):
+            stepsize = np.linalg.norm(update)
+            if self.termination_checker(self._nfev, x_next, fx_next, stepsize, accepted):
+                self.history.metadata["stop_reason"] = self.termination_checker.reason
+                logger.info("Terminated early: %s.", self.termination_checker.reason)
+                return True
+
+            return False
+
+        self.history.metadata["stop_reason"] = "maxiter"
+        for k in range(first_iteration, self.maxiter + 1):
             iteration_start = time()
+
+            # reallocate the shots with the variances observed in the previous iterations
+            if allocate_shots and k > 1 and k % self.shot_allocator.interval == 0:
+                loss = self.shot_allocator.allocate()
+                self._reset_expressions()
             # compute update
             update, fx_next = self._compute_update(loss, x, k, next(eps))
 
@@ -608,9 +2096,7 @@ class _SPSA(Optimizer):
                 self._nfev += 1
                 if fx + self.allowed_increase <= fx_next:  # accept only if loss improved
 
-                    self.history["loss"].append(fx_next)
-                    self.history["params"].append(x_next)
-                    self.history["time"].append(time())
+                    self.history.append(fx_next, x_next)
 
                     # if self.callback is not None:
                     #     self.callback(self._nfev,  # number of function evals
@@ -625,6 +2111,11 @@ class _SPSA(Optimizer):
                         self.maxiter + 1,
                         time() - iteration_start,
                     )
+                    # the iterate stays at the accepted point, which the checker sees
+                    stop = terminate(x, fx, update, False)
+                    checkpoint(k)
+                    if stop:
+                        break
                     continue
                 fx = fx_next
 
@@ -639,9 +2130,7 @@ class _SPSA(Optimizer):
             #                   np.linalg.norm(update),  # size of the update step
             #                   True)  # accepted
 
-            self.history["loss"].append(fx_next)
-            self.history["params"].append(x_next)
-            self.history["time"].append(time())
+            self.history.append(fx_next, x_next)
 
             # update parameters
             x = x_next
@@ -652,13 +2141,54 @@ class _SPSA(Optimizer):
                 if len(last_steps) > self.last_avg:
                     last_steps.popleft()
 
+            stop = terminate(x_next, fx_next, update, True)
+            checkpoint(k)
+            if stop:
+                break
+
         logger.info("SPSA finished in %s", time() - start)
+        if self._sampler is not None:
+            logger.info("Sampler cache: %s", self._sampler.cache_info())
         logger.info("=" * 30)
 
         if self.last_avg > 1:
             x = np.mean(last_steps, axis=0)
 
-        return x, loss_callable(x), self._nfev
+        fx_final = loss_callable(x) if self.evaluate_final else None
+
+        return x, fx_final, self._nfev
+
+    def _get_state(self, k, x, fx, last_steps, learning_rate, perturbation):
+        """Get the optimizer state after the ``k``-th iteration.
+
+        The state is serializable with the ``RuntimeEncoder`` and can be passed as
+        ``resume_state`` to continue the optimization from this point. It only holds the history
+        since the previous checkpoint, see :meth:`OptimizerHistory.checkpoint_dict`.
+        """
+        return {
+            "iteration": k,
+            "x": x,
+            "fx": fx,
+            "nfev": self._nfev,
+            "moving_avg": self._moving_avg,
+            "allowed_increase": self.allowed_increase,
+            "last_steps": list(last_steps),
+            "learning_rate": learning_rate.serialize() if isinstance(learning_rate, It) else None,
+            "perturbation": perturbation.serialize() if isinstance(perturbation, It) else None,
+            "perturbations": self._perturbations.get_state(),
+            "resamplings": self._next_resamplings,
+            "termination_checker": (
+                self.termination_checker.serialize()
+                if self.termination_checker is not None
+                else None
+            ),
+            "history": self.history.checkpoint_dict(),
+            "shot_allocator": (
+                self.shot_allocator.get_state()
+                if self._energy_sampler is not self._sampler
+                else None
+            ),
+        }
 
     def get_support_level(self):
         """Get the support level dictionary."""
@@ -676,7 +2206,13 @@ class _SPSA(Optimizer):
         variable_bounds=None,
         initial_point=None,
     ):
-        return self._minimize(objective_function, initial_point)
+        try:
+            return self._minimize(objective_function, initial_point)
+        finally:
+            # the allocated shots only apply to the loss of this optimization
+            if self._energy_sampler is not self._sampler:
+                self._energy_sampler = self._sampler
+                self._reset_expressions()
 
 
 class _QNSPSA(_SPSA):
@@ -690,7 +2226,7 @@ class _QNSPSA(_SPSA):
         allowed_increase: Optional[float] = None,
         learning_rate: Optional[Union[float, Callable[[], Iterator]]] = None,
         perturbation: Optional[Union[float, Callable[[], Iterator]]] = None,
-        resamplings: int = 1,
+        resamplings: Union[int, Dict[int, int], str] = 1,
         callback: Optional[CALLBACK] = None,
         # 2-SPSA arguments
         hessian_delay: int = 0,
@@ -700,10 +2236,25 @@ class _QNSPSA(_SPSA):
         initial_hessian: Optional[np.ndarray] = None,
         expectation: Optional[ExpectationBase] = None,
         backend: Optional[Union[Backend, QuantumInstance]] = None,
+        checkpoint_interval: Optional[int] = None,
+        checkpoint_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        resume_state: Optional[Dict[str, Any]] = None,
+        seed: Optional[Union[int, np.random.SeedSequence]] = None,
+        pregenerate_perturbations: bool = False,
+        estimation_error: Union[bool, str] = True,
+        evaluate_final: bool = True,
+        target_snr: float = 1.0,
+        max_resamplings: int = 10,
+        termination_checker: Optional[TerminationChecker] = None,
+        history_dtype: Union[str, type] = "float64",
+        history_stride: int = 1,
+        shot_allocator: Optional[PauliShotAllocator] = None,
+        evaluator: Optional[StatevectorEvaluator] = None,
     ) -> None:
         r"""
         Args:
-            maxiter: The maximum number of iterations.
+            maxiter: The maximum number of iterations. If 0, the calibration and the initial
+                evaluations are skipped and the initial point is returned.
             blocking: If True, only accepts updates that improve the loss.
             allowed_increase: If blocking is True, this sets by how much the loss can increase
                 and still be accepted. If None, calibrated automatically to be twice the
@@ -712,6 +2263,9 @@ class _QNSPSA(_SPSA):
                 :math:`a_k`.
             perturbation: A generator yielding the perturbation magnitudes :math:`c_k`.
             resamplings: In each step, sample the gradient (and preconditioner) this many times.
+                Can be an integer, a dictionary mapping the iteration to the number of
+                resamplings, or ``"adaptive"`` to choose the number of resamplings such that
+                the gradient reaches the signal-to-noise ratio ``target_snr``.
             callback: A callback function passed information in each iteration step. The
                 information is, in this order: the parameters, the function value, the number
                 of function evaluations, the stepsize, whether the step was accepted.
@@ -731,6 +2285,41 @@ class _QNSPSA(_SPSA):
                 Observable over the ansatz state function.
             backend: A backend to evaluate the circuits, if the overlap function is provided as
                 a circuit and the objective function as operator expression.
+            checkpoint_interval: If set, the optimizer state is passed to the
+                ``checkpoint_callback`` every ``checkpoint_interval`` iterations.
+            checkpoint_callback: A callable receiving the serializable optimizer state, see
+                ``checkpoint_interval``.
+            resume_state: An optimizer state, as passed to the ``checkpoint_callback``, to
+                resume the optimization from instead of starting from the initial point. Each
+                state only holds the history since the previous checkpoint. To restore the whole
+                history, its ``"history"`` is replaced by the list of the histories of all states.
+            seed: The seed for the random perturbations.
+            pregenerate_perturbations: If True, the random perturbations for all iterations are
+                generated at once at the start of the optimization.
+            estimation_error: Whether to pass the standard error of the function evaluations to
+                the callback. If ``"lazy"``, the callback receives callables that compute the
+                errors of all evaluations in an iteration upon the first call. If False, the
+                error is reported as 0.
+            evaluate_final: If True, the loss is evaluated at the final point. If False, the
+                final loss is returned as None, e.g. to evaluate it together with other
+                observables.
+            target_snr: If ``resamplings`` is ``"adaptive"``, the number of resamplings for the
+                next iteration is chosen such that the averaged gradient reaches this
+                signal-to-noise ratio, estimated from the gradient samples of the current
+                iteration.
+            max_resamplings: If ``resamplings`` is ``"adaptive"``, the maximal number of
+                resamplings per iteration.
+            termination_checker: A criterion to stop the optimization before ``maxiter``
+                iterations, see :class:`TerminationChecker`. The reason of the termination is
+                stored in ``history.metadata["stop_reason"]``.
+            history_dtype: The data type of the losses and parameters in the history, e.g.
+                ``"float32"`` to halve its size.
+            history_stride: Only record every ``history_stride``-th iteration in the history.
+            shot_allocator: If set, the shots are allocated to the Pauli measurement groups of the
+                loss with this allocator, see :class:`PauliShotAllocator`.
+            evaluator: If set, the loss and the overlaps are evaluated exactly with this
+                evaluator instead of sampling circuits. The parameters of the evaluator must be
+                ordered like the sorted parameters of the loss.
         """
         super().__init__(
             maxiter,
@@ -749,6 +2338,20 @@ class _QNSPSA(_SPSA):
             initial_hessian=initial_hessian,
             expectation=expectation,
             backend=backend,
+            checkpoint_interval=checkpoint_interval,
+            checkpoint_callback=checkpoint_callback,
+            resume_state=resume_state,
+            seed=seed,
+            pregenerate_perturbations=pregenerate_perturbations,
+            estimation_error=estimation_error,
+            evaluate_final=evaluate_final,
+            target_snr=target_snr,
+            max_resamplings=max_resamplings,
+            termination_checker=termination_checker,
+            history_dtype=history_dtype,
+            history_stride=history_stride,
+            shot_allocator=shot_allocator,
+            evaluator=evaluator,
         )
 
         self.overlap_fn = overlap_fn
@@ -771,7 +2374,7 @@ class _QNSPSA(_SPSA):
             ]
 
             self.hessian_params = [x_pp, x_pm, x_mp, x_mm, y]
-            self.hessian_expr = [~StateFn(left) @ StateFn(right) for right in rights]
+            self.hessian_expr = [_overlap_expression(left, right) for right in rights]
 
     @staticmethod
     def get_overlap(circuit, backend=None, expectation=None):
@@ -779,8 +2382,8 @@ class _QNSPSA(_SPSA):
         params_x = ParameterVector("x", circuit.num_parameters)
         params_y = ParameterVector("y", circuit.num_parameters)
 
-        expression = ~StateFn(circuit.assign_parameters(params_x)) @ StateFn(
-            circuit.assign_parameters(params_y)
+        expression = _overlap_expression(
+            circuit.assign_parameters(params_x), circuit.assign_parameters(params_y)
         )
 
         if expectation is not None:
@@ -795,7 +2398,7 @@ class _QNSPSA(_SPSA):
                 return -0.5 * np.abs(expression.bind_parameters(value_dict).eval()) ** 2
 
         else:
-            sampler = CircuitSampler(backend)
+            sampler = _BoundedCircuitSampler(backend)
 
             def overlap_fn(values_x, values_y):
                 value_dict = dict(
@@ -821,9 +2424,22 @@ class QNSPSAVQE(VQE):
         learning_rate: Optional[float] = None,
         perturbation: Optional[float] = None,
         regularization: float = 0.01,
-        resamplings: int = 1,
+        resamplings: Union[int, Dict[int, int], str] = 1,
         hessian_delay: int = 0,
         initial_hessian: Optional[np.ndarray] = None,
+        checkpoint_interval: Optional[int] = None,
+        checkpoint_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        resume_state: Optional[Dict[str, Any]] = None,
+        seed: Optional[Union[int, np.random.SeedSequence]] = None,
+        pregenerate_perturbations: bool = False,
+        estimation_error: Union[bool, str] = True,
+        target_snr: float = 1.0,
+        max_resamplings: int = 10,
+        termination_checker: Optional[TerminationChecker] = None,
+        history_dtype: Union[str, type] = "float64",
+        history_stride: int = 1,
+        shot_allocator: Optional[PauliShotAllocator] = None,
+        exact: bool = False,
     ) -> None:
         """
         Args:
@@ -847,6 +2463,34 @@ class QNSPSAVQE(VQE):
                 These are: the evaluation count, the optimizer parameters for the
                 variational form, the evaluated mean and the evaluated standard deviation.`
             quantum_instance: Quantum Instance or Backend
+            checkpoint_interval: If set, the optimizer state is passed to the
+                ``checkpoint_callback`` every ``checkpoint_interval`` iterations.
+            checkpoint_callback: A callable receiving the serializable optimizer state.
+            resume_state: An optimizer state, as passed to the ``checkpoint_callback``, to
+                resume the optimization from. Each state only holds the history since the
+                previous checkpoint. To restore the whole history, its ``"history"`` is replaced
+                by the list of the histories of all states.
+            seed: The seed for the random perturbations of the optimizer.
+            pregenerate_perturbations: If True, the random perturbations for all iterations are
+                generated at once at the start of the optimization.
+            estimation_error: Whether to pass the standard error of the energy evaluations to the
+                callback. If ``"lazy"``, callables computing the error are passed instead.
+            target_snr: If ``resamplings`` is ``"adaptive"``, the number of resamplings for the
+                next iteration is chosen such that the averaged gradient reaches this
+                signal-to-noise ratio, estimated from the gradient samples of the current
+                iteration.
+            max_resamplings: If ``resamplings`` is ``"adaptive"``, the maximal number of
+                resamplings per iteration.
+            termination_checker: A criterion to stop the optimization before ``maxiter``
+                iterations, see :class:`TerminationChecker`. The reason of the termination is
+                stored in ``history.metadata["stop_reason"]``.
+            history_dtype: The data type of the losses and parameters in the history, e.g.
+                ``"float32"`` to halve its size.
+            history_stride: Only record every ``history_stride``-th iteration in the history.
+            shot_allocator: If set, the shots are allocated to the Pauli measurement groups of the
+                loss with this allocator, see :class:`PauliShotAllocator`.
+            exact: If True, the energies and overlaps of the optimization are computed exactly
+                with statevector simulation, see :class:`StatevectorEvaluator`.
         """
         super().__init__(
             ansatz=ansatz,
@@ -865,6 +2509,19 @@ class QNSPSAVQE(VQE):
         self.resamplings = resamplings
         self.hessian_delay = hessian_delay
         self.initial_hessian = initial_hessian
+        self.checkpoint_interval = checkpoint_interval
+        self.checkpoint_callback = checkpoint_callback
+        self.resume_state = resume_state
+        self.seed = seed
+        self.pregenerate_perturbations = pregenerate_perturbations
+        self.estimation_error = estimation_error
+        self.target_snr = target_snr
+        self.max_resamplings = max_resamplings
+        self.termination_checker = termination_checker
+        self.history_dtype = history_dtype
+        self.history_stride = history_stride
+        self.shot_allocator = shot_allocator
+        self.exact = exact
 
         self._ret = VQEResult()
         self._eval_time = None
@@ -881,6 +2538,12 @@ class QNSPSAVQE(VQE):
 
     @optimizer.setter
     def optimizer(self, optimizer):
+        # since Terra 0.19 the base class sets its default optimizer upon initialization, which is
+        # only used to print the settings
+        if optimizer is None:
+            VQE.optimizer.fset(self, optimizer)
+            return
+
         raise NotImplementedError(
             "The optimizer is a SPSA version with batched circuits and " "cannot be set."
         )
@@ -927,10 +2590,27 @@ class QNSPSAVQE(VQE):
             "expectation": self.expectation,
             "callback": self._callback,
             "backend": self._quantum_instance,
+            "checkpoint_interval": self.checkpoint_interval,
+            "checkpoint_callback": self.checkpoint_callback,
+            "resume_state": self.resume_state,
+            "seed": self.seed,
+            "pregenerate_perturbations": self.pregenerate_perturbations,
+            "estimation_error": self.estimation_error,
+            "evaluate_final": False,
+            "target_snr": self.target_snr,
+            "max_resamplings": self.max_resamplings,
+            "termination_checker": self.termination_checker,
+            "history_dtype": self.history_dtype,
+            "history_stride": self.history_stride,
+            "shot_allocator": self.shot_allocator,
         }
 
+        # the optimizer orders the parameter values by the names of the parameters of the loss,
+        # which sort like the ansatz parameters they replace
+        theta = _ordered_parameters(self.ansatz.num_parameters)
         if self.natural_spsa:
-            optimizer = _QNSPSA(overlap_fn=self.ansatz, **optimizer_settings)
+            overlap_fn = self.ansatz.assign_parameters(theta)
+            optimizer = _QNSPSA(overlap_fn=overlap_fn, **optimizer_settings)
         else:
             optimizer = _SPSA(**optimizer_settings)
 
@@ -939,11 +2619,15 @@ class QNSPSAVQE(VQE):
         #     operator, return_expectation=True
         # )
 
-        theta = ParameterVector("θ​", self.ansatz.num_parameters)
         energy_expectation, expectation = self.construct_expectation(
             theta, operator, return_expectation=True
         )
 
+        if self.exact:
+            optimizer.evaluator = StatevectorEvaluator(
+                self.ansatz, operator, list(self.ansatz.parameters)
+            )
+
         start_time = time()
         opt_params, opt_value, nfev = optimizer.optimize(
             num_vars=len(self.initial_point),
@@ -954,14 +2638,24 @@ class QNSPSAVQE(VQE):
         )
         eval_time = time() - start_time
 
+        # evaluate the energy, eigenstate and auxiliary operators at the final point in one job
+        if optimizer.evaluator is not None:
+            opt_value, eigenstate, aux_values = self._evaluate_final_exactly(
+                optimizer.evaluator, opt_params, aux_operators
+            )
+        else:
+            opt_value, eigenstate, aux_values = self._evaluate_final(
+                opt_params, theta, energy_expectation, aux_operators, expectation
+            )
+
         result = VQEResult()
         result.optimal_point = opt_params
-        result.optimal_parameters = dict(zip(self._ansatz_params, opt_params))
+        result.optimal_parameters = dict(zip(self.ansatz.parameters, opt_params))
         result.optimal_value = opt_value
         result.cost_function_evals = nfev
         result.optimizer_time = eval_time
         result.eigenvalue = opt_value + 0j
-        result.eigenstate = self._get_eigenstate(result.optimal_parameters)
+        result.eigenstate = eigenstate
 
         logger.info(
             "Optimization complete in %s seconds.\nFound opt_params %s in %s evals",
@@ -973,45 +2667,158 @@ class QNSPSAVQE(VQE):
         # TODO delete as soon as get_optimal_vector etc are removed
         self._ret = result
 
-        if aux_operators is not None:
-            aux_values = self._eval_aux_ops(opt_params, aux_operators, expectation=expectation)
+        if aux_values is not None:
             result.aux_operator_eigenvalues = aux_values[0]
 
         # return result, None
 
         return result, optimizer.history
 
+    def evaluate_energies(
+        self, operator: OperatorBase, points: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Evaluate the energy at many parameter points, batched into as few jobs as possible.
+
+        Args:
+            operator: The Hamiltonian.
+            points: The parameter values, one point per row, ordered like the optimal point.
+
+        Returns:
+            The energies and their standard errors.
+
+        Raises:
+            AlgorithmError: If no quantum instance is set.
+        """
+        if self.quantum_instance is None:
+            raise AlgorithmError(
+                "A QuantumInstance or Backend " "must be supplied to run the quantum algorithm."
+            )
+
+        self._check_operator_ansatz(operator)
+
+        theta = _ordered_parameters(self.ansatz.num_parameters)
+        energy_expectation, expectation = self.construct_expectation(
+            theta, operator, return_expectation=True
+        )
+
+        evaluator = None
+        if self.exact:
+            evaluator = StatevectorEvaluator(self.ansatz, operator, list(self.ansatz.parameters))
+
+        optimizer = _SPSA(
+            expectation=expectation,
+            backend=self._quantum_instance,
+            estimation_error=self.estimation_error,
+            evaluator=evaluator,
+        )
+        return optimizer.evaluate(energy_expectation, points)
+
+    def _evaluate_final(self, opt_params, theta, energy_expectation, aux_operators, expectation):
+        """Evaluate the energy, the eigenstate and the auxiliary operators in a single job.
+
+        This returns the same as evaluating the loss in the optimizer and calling
+        ``_get_eigenstate`` and ``_eval_aux_ops``, but the circuits are sampled together.
+        """
+        # ``theta[i]`` replaces the i-th ansatz parameter, so both are bound in the same order
+        param_dict = dict(zip(theta, opt_params))
+        param_dict.update(zip(self.ansatz.parameters, opt_params))
+
+        operators = [energy_expectation, StateFn(self.ansatz)]
+        if aux_operators is not None:
+            aux_op_meas = expectation.convert(StateFn(ListOp(aux_operators), is_measurement=True))
+            operators.append(aux_op_meas.compose(StateFn(self.ansatz)))
+
+        sampler = CircuitSampler(self.quantum_instance)
+        sampled = sampler.convert(ListOp(operators), params=param_dict)
+
+        opt_value = np.real(sampled[0].eval())
+
+        # VectorStateFn -> Statevector -> np.array or SparseVectorStateFn -> DictStateFn -> dict
+        state_fn = sampled[1].eval()
+        if self.quantum_instance.is_statevector:
+            eigenstate = state_fn.primitive.data
+        else:
+            eigenstate = state_fn.to_dict_fn().primitive
+
+        if aux_operators is None:
+            return opt_value, eigenstate, None
+
+        # discard values below threshold, as in ``_eval_aux_ops``
+        values = np.real(sampled[2].eval())
+        aux_op_results = values * (np.abs(values) > 1e-12)
+        aux_values = np.array([[[result] for result in aux_op_results]], dtype=object)
+
+        return opt_value, eigenstate, aux_values
+
+    @staticmethod
+    def _evaluate_final_exactly(evaluator, opt_params, aux_operators):
+        """Evaluate the energy, the eigenstate and the auxiliary operators without a job.
+
+        This returns the same as ``_evaluate_final`` with exact values, where the eigenstate is
+        the statevector.
+        """
+        state = evaluator.statevectors(opt_params)
+        opt_value = evaluator.expectation_values(state)[0]
+        eigenstate = state[0]
+
+        if aux_operators is None:
+            return opt_value, eigenstate, None
+
+        # discard values below threshold, as in ``_eval_aux_ops``
+        values = np.array([evaluator.expectation_values(state, op)[0] for op in aux_operators])
+        aux_op_results = values * (np.abs(values) > 1e-12)
+        aux_values = np.array([[[result] for result in aux_op_results]], dtype=object)
+
+        return opt_value, eigenstate, aux_values
+
+
+def _ordered_parameters(num_parameters):
+    """Get parameters whose names sort like their indices.
+
+    The SPSA optimizers order the parameter values by the names of the parameters of the loss,
+    but the names of the elements of a ``ParameterVector`` do not sort like their indices beyond
+    ten elements, e.g. ``θ[10]`` sorts before ``θ[2]``.
+    """
+    width = len(str(max(num_parameters - 1, 0)))
+    return [Parameter(f"θ​[{i:0{width}d}]") for i in range(num_parameters)]
+
 
 # Code from qn-spsa/utils.py
 
 
-def bernoulli_perturbation(dim, perturbation_dims=None):
-    """Get a Bernoulli random perturbation."""
-    if perturbation_dims is None:
-        return np.array([1 - 2 * np.random.binomial(1, 0.5) for _ in range(dim)])
+def _load_iterator_factory(serialized, factory):
+    """Get an iterator factory from its serialized form or from the given factory."""
+    if serialized is not None:
+        return It.deserialize(serialized)
 
-    pert = np.array([1 - 2 * np.random.binomial(1, 0.5) for _ in range(perturbation_dims)])
-    indices = np.random.choice(list(range(dim)), size=perturbation_dims, replace=False)
-    result = np.zeros(dim)
-    result[indices] = pert
+    if isinstance(factory, float):
+        return Constant(factory)
 
-    return result
+    return factory
 
 
-def powerseries(eta=0.01, power=2, offset=0):
-    """Yield a series decreasing by a powerlaw."""
+def _overlap_expression(left, right):
+    r"""Get an expression for the overlap of the states prepared by two circuits.
 
-    n = 1
-    while True:
-        yield eta / ((n + offset) ** power)
-        n += 1
+    Instead of evaluating the states separately, the overlap is computed with the
+    compute-uncompute circuit :math:`U_{left}^\dagger U_{right}`. On a sampling backend this
+    evaluates to the square root of the probability to measure all zeros, which is the absolute
+    value of the overlap :math:`|\langle left | right \rangle|`. On a statevector backend it is
+    the overlap itself.
+    """
+    circuit = right.compose(left.inverse())
+    return ~StateFn("0" * circuit.num_qubits) @ StateFn(circuit)
 
 
-def constant(eta=0.01):
-    """Yield a constant series."""
+def _num_circuits(operator):
+    """Count the circuits in an operator expression."""
+    if isinstance(operator, CircuitStateFn):
+        return 1
 
-    while True:
-        yield eta
+    if isinstance(operator, ListOp):
+        return sum(_num_circuits(op) for op in operator.oplist)
+
+    return 0
 
 
 def _make_spd(matrix, bias=0.01):
@@ -1020,6 +2827,95 @@ def _make_spd(matrix, bias=0.01):
     return (1 - bias) * psd + bias * identity
 
 
+class _EstimationErrors:
+    """Standard errors of sampled expectation values, computed once upon the first access."""
+
+    def __init__(self, operators, expectation, shots):
+        self._operators = operators
+        self._expectation = expectation
+        self._shots = shots
+        self._errors = None
+
+    def __call__(self):
+        if self._errors is None:
+            variances = np.array(
+                [_sampled_variance(op, self._expectation) for op in self._operators]
+            )
+            self._errors = np.sqrt(variances / self._shots)
+
+        return self._errors
+
+    def get(self, index):
+        """Get the error of the ``index``-th operator."""
+        return self()[index]
+
+
+def _sampled_variance(operator, expectation):
+    """Compute the variance of a sampled Pauli expectation value.
+
+    This computes the same as ``PauliExpectation.compute_variance`` but evaluates the diagonal
+    measurements on all sampled bitstrings at once, instead of one bitstring at a time. Operators
+    which are not in the form of sampled diagonal Pauli measurements are passed to the
+    ``compute_variance`` method of the expectation.
+    """
+    if isinstance(operator, ComposedOp):
+        eigenvalues = _diagonal_eigenvalues(operator)
+        if eigenvalues is None:
+            return np.real(expectation.compute_variance(operator))
+
+        amplitudes, values = eigenvalues
+        average = np.sum(np.abs(amplitudes * operator[1].coeff) ** 2 * values)
+        variance = np.sum((amplitudes * (values - average)) ** 2)
+        return np.real(operator.coeff * variance)
+
+    if isinstance(operator, ListOp):
+        variances = [_sampled_variance(op, expectation) for op in operator.oplist]
+        # the variance of the mean over repetitions decreases with their number
+        if operator.combo_fn is _mean:
+            return np.real(np.mean(variances) / len(variances))
+
+        return np.real(operator.combo_fn(variances))
+
+    return 0.0
+
+
+def _diagonal_eigenvalues(operator):
+    """Get the amplitudes and the measured values for each bitstring in a sampled ComposedOp.
+
+    Returns None if the operator is not a diagonal Pauli measurement on a ``DictStateFn``.
+    """
+    if len(operator.oplist) != 2:
+        return None
+
+    measurement, state = operator.oplist
+    if not (isinstance(measurement, OperatorStateFn) and isinstance(state, DictStateFn)):
+        return None
+
+    primitive = measurement.primitive
+    if isinstance(primitive, PauliOp):
+        primitive = PauliSumOp(SparsePauliOp(primitive.primitive), coeff=primitive.coeff)
+
+    if not isinstance(primitive, PauliSumOp) or np.any(primitive.primitive.paulis.x):
+        return None
+
+    bitstrings = list(state.primitive.keys())
+    num_qubits = primitive.num_qubits
+    if any(len(bitstring) != num_qubits for bitstring in bitstrings):
+        return None
+
+    # bitstrings are big endian, Paulis are little endian
+    bits = np.frombuffer("".join(bitstrings).encode(), dtype=np.uint8)
+    bits = (bits.reshape(len(bitstrings), num_qubits)[:, ::-1] == ord("1")).astype(int)
+
+    # the eigenvalue of a diagonal Pauli is the parity of the bits it acts on
+    parities = bits.dot(primitive.primitive.paulis.z.T.astype(int)) % 2
+    coeffs = primitive.primitive.coeffs * primitive.coeff * measurement.coeff
+    values = np.real((1 - 2 * parities).dot(coeffs))
+
+    amplitudes = np.array(list(state.primitive.values()))
+    return amplitudes, values
+
+
 class Publisher:
     """Class used to publish interim results."""
 
@@ -1027,10 +2923,114 @@ class Publisher:
         self._messenger = messenger
 
     def callback(self, *args, **kwargs):
-        text = list(args)
+        self._messenger.publish(self._format(*args, **kwargs))
+
+    def checkpoint(self, state):
+        """Publish an optimizer state, which can be passed as ``resume_state`` to a new job."""
+        self._messenger.publish({"checkpoint": state})
+
+    def close(self):
+        """Publish all pending results."""
+
+    @staticmethod
+    def _format(*args, **kwargs):
+        # lazily computed values are passed as callables and only evaluated when published
+        text = [arg() if callable(arg) else arg for arg in args]
         for k, v in kwargs.items():
             text.append({k: v})
-        self._messenger.publish(text)
+        return text
+
+
+class BatchedPublisher(Publisher):
+    """Class used to publish interim results in batches from a background thread.
+
+    The interim results are put in a bounded queue and a worker thread publishes them as
+    ``{"batch": [...]}`` once ``batch_size`` results are collected or ``interval`` seconds have
+    passed. This keeps the encoding and sending of the results off the optimization loop. If the
+    queue is full, new results are dropped and their number is published with the next batch
+    as ``"dropped"``. The publisher must be closed to publish the remaining results.
+    """
+
+    def __init__(self, messenger, interval=1.0, batch_size=100, max_queue_size=10000):
+        """
+        Args:
+            messenger: The messenger used to publish the results.
+            interval: The maximal time in seconds between two published batches.
+            batch_size: The maximal number of results in a batch.
+            max_queue_size: The maximal number of results waiting to be published.
+        """
+        super().__init__(messenger)
+        self.interval = interval
+        self.batch_size = batch_size
+        self.dropped = 0
+
+        self._lock = threading.Lock()
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def callback(self, *args, **kwargs):
+        try:
+            self._queue.put_nowait(("callback", (args, kwargs)))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def checkpoint(self, state):
+        # checkpoints are never dropped
+        self._queue.put(("message", {"checkpoint": state}))
+
+    def flush(self):
+        """Publish all results which are currently queued."""
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        done.wait()
+
+    def close(self):
+        """Publish all queued results and stop the background thread."""
+        if self._thread.is_alive():
+            self._queue.put(("close", None))
+            self._thread.join()
+
+    def _run(self):
+        batch = []
+        deadline = time() + self.interval
+        while True:
+            try:
+                kind, payload = self._queue.get(timeout=max(0, deadline - time()))
+            except queue.Empty:
+                kind, payload = None, None
+
+            if kind == "callback":
+                batch.append(self._format(*payload[0], **payload[1]))
+                if len(batch) < self.batch_size and time() < deadline:
+                    continue
+            elif kind == "message":
+                # publish queued results first to keep the order
+                self._publish_batch(batch)
+                batch = []
+                self._messenger.publish(payload)
+
+            if kind is None or kind == "callback":
+                self._publish_batch(batch)
+                batch = []
+                deadline = time() + self.interval
+            elif kind in ["flush", "close"]:
+                self._publish_batch(batch)
+                batch = []
+                if kind == "close":
+                    return
+                payload.set()
+
+    def _publish_batch(self, batch):
+        with self._lock:
+            dropped, self.dropped = self.dropped, 0
+
+        if len(batch) > 0 or dropped > 0:
+            message = {"batch": batch}
+            if dropped > 0:
+                message["dropped"] = dropped
+            self._messenger.publish(message)
 
 
 def _parse_optimizer(kwargs):
@@ -1051,8 +3051,13 @@ def _parse_optimizer(kwargs):
         for attr in ["learning_rate", "perturbation"]:
             if attr in optimizer_params.keys():
                 if isinstance(optimizer_params[attr], (list, tuple)):  # need to de-serialize
-                    iterator_factory = It.deserialize(optimizer_params[attr])
-                    optimizer_params[attr] = iterator_factory.get_iterator()
+                    # the iterator is kept as object, such that it can be checkpointed
+                    optimizer_params[attr] = It.deserialize(optimizer_params[attr])
+
+        # de-serialize the termination checker if necessary
+        checker = optimizer_params.get("termination_checker", None)
+        if isinstance(checker, (list, tuple)):
+            optimizer_params["termination_checker"] = TerminationChecker.deserialize(checker)
 
         if optimizer_name == "SPSA":
             optimizer = _SPSA(**optimizer_params)
@@ -1078,9 +3083,29 @@ def main(backend, user_messenger, **kwargs):
 
     shots = kwargs.get("shots", 1024)
     measurement_error_mitigation = kwargs.get("measurement_error_mitigation", False)
+    checkpoint_interval = kwargs.get("checkpoint_interval", None)
+    resume_state = kwargs.get("resume_state", None)
+    estimation_error = kwargs.get("estimation_error", True)
+    history_summary = kwargs.get("history_summary", False)
+    publish_interval = kwargs.get("publish_interval", None)
+    publish_batch_size = kwargs.get("publish_batch_size", None)
+    shot_allocation = kwargs.get("shot_allocation", None)
+    exact = kwargs.get("exact", False)
+    evaluation_points = kwargs.get("evaluation_points", None)
+    measurement_plan_cache = kwargs.get("measurement_plan_cache", None)
+
+    if exact and not backend.configuration().simulator:
+        raise ValueError("Exact evaluations are only supported on simulators.")
+
+    # use independent random streams for the initial point and the optimizer
+    initial_point_seed, optimizer_seed = np.random.SeedSequence(kwargs.get("seed", None)).spawn(2)
+    if getattr(optimizer, "seed", None) is not None:
+        optimizer_seed = optimizer.seed
 
     # set up quantum instance
-    if measurement_error_mitigation:
+    if measurement_error_mitigation == "subspace":
+        _quantum_instance = SubspaceMitigatedQuantumInstance(backend, shots=shots)
+    elif measurement_error_mitigation:
         _quantum_instance = QuantumInstance(
             backend,
             shots=shots,
@@ -1090,44 +3115,103 @@ def main(backend, user_messenger, **kwargs):
     else:
         _quantum_instance = QuantumInstance(backend, shots=shots)
 
-    publisher = Publisher(user_messenger)
-
     # verify the initial point
     if initial_point == "random" or initial_point is None:
-        initial_point = np.random.random(ansatz.num_parameters)
+        initial_point = np.random.default_rng(initial_point_seed).random(ansatz.num_parameters)
     elif len(initial_point) != ansatz.num_parameters:
         raise ValueError("Mismatching number of parameters and initial point dimension.")
 
-    # construct the VQE instance
-    if isinstance(optimizer, (SPSA, QNSPSA, _SPSA, _QNSPSA)):
-        vqe = QNSPSAVQE(
-            ansatz=ansatz,
-            initial_point=initial_point,
-            expectation=PauliExpectation(),
-            callback=publisher.callback,
-            quantum_instance=_quantum_instance,
-            natural_spsa=isinstance(optimizer, QNSPSA),
-            allowed_increase=optimizer.allowed_increase,
-            maxiter=optimizer.maxiter,
-            blocking=optimizer.blocking,
-            learning_rate=optimizer.learning_rate,
-            perturbation=optimizer.perturbation,
-            resamplings=optimizer.resamplings,
-            regularization=optimizer.regularization,
-            hessian_delay=optimizer.hessian_delay,
-            initial_hessian=optimizer.initial_hessian,
-        )
-        result, history = vqe.compute_minimum_eigenvalue(operator, aux_operators)
+    # allocate the shots to the measurement groups, the options are passed as dictionary
+    if isinstance(shot_allocation, dict):
+        shot_allocator = PauliShotAllocator(**shot_allocation)
+    elif shot_allocation:
+        shot_allocator = PauliShotAllocator()
     else:
-        vqe = VQE(
-            ansatz=ansatz,
-            initial_point=initial_point,
-            expectation=PauliExpectation(),
-            callback=publisher.callback,
-            quantum_instance=_quantum_instance,
+        shot_allocator = None
+
+    # cache the measurement plan, in a file if a filename is given
+    if isinstance(measurement_plan_cache, str):
+        expectation = CachedPauliExpectation(measurement_plan_cache)
+    elif measurement_plan_cache:
+        expectation = CachedPauliExpectation()
+    else:
+        expectation = PauliExpectation()
+
+    # publisher for user-server communication
+    if publish_interval is not None or publish_batch_size is not None:
+        publisher = BatchedPublisher(
+            user_messenger,
+            interval=publish_interval if publish_interval is not None else 1.0,
+            batch_size=publish_batch_size if publish_batch_size is not None else 100,
         )
-        result = vqe.compute_minimum_eigenvalue(operator, aux_operators)
-        history = None
+    else:
+        publisher = Publisher(user_messenger)
+
+    # lazy errors only save work if interim results can be dropped, as in the batched publisher,
+    # which then computes the errors of the published results in its thread
+    if estimation_error == "lazy" and not isinstance(publisher, BatchedPublisher):
+        estimation_error = True
+
+    try:
+        # construct the VQE instance
+        if isinstance(optimizer, (SPSA, QNSPSA, _SPSA, _QNSPSA)):
+            vqe = QNSPSAVQE(
+                ansatz=ansatz,
+                initial_point=initial_point,
+                expectation=expectation,
+                callback=publisher.callback,
+                quantum_instance=_quantum_instance,
+                natural_spsa=isinstance(optimizer, QNSPSA),
+                allowed_increase=optimizer.allowed_increase,
+                maxiter=optimizer.maxiter,
+                blocking=optimizer.blocking,
+                learning_rate=optimizer.learning_rate,
+                perturbation=optimizer.perturbation,
+                resamplings=optimizer.resamplings,
+                regularization=optimizer.regularization,
+                hessian_delay=optimizer.hessian_delay,
+                initial_hessian=optimizer.initial_hessian,
+                checkpoint_interval=checkpoint_interval,
+                checkpoint_callback=publisher.checkpoint,
+                resume_state=resume_state,
+                seed=optimizer_seed,
+                estimation_error=estimation_error,
+                pregenerate_perturbations=getattr(optimizer, "pregenerate_perturbations", False),
+                target_snr=getattr(optimizer, "target_snr", 1.0),
+                max_resamplings=getattr(optimizer, "max_resamplings", 10),
+                termination_checker=getattr(optimizer, "termination_checker", None),
+                history_dtype=getattr(optimizer, "history_dtype", "float64"),
+                history_stride=getattr(optimizer, "history_stride", 1),
+                shot_allocator=shot_allocator,
+                exact=exact,
+            )
+            result, optimizer_history = vqe.compute_minimum_eigenvalue(operator, aux_operators)
+
+            if history_summary:
+                history = optimizer_history.summary()
+            else:
+                history = optimizer_history.to_dict()
+
+            # scan the energy landscape, e.g. to diagnose barren plateaus
+            if evaluation_points is not None:
+                energies, errors = vqe.evaluate_energies(operator, np.asarray(evaluation_points))
+                evaluations = {"energies": energies, "errors": errors}
+            else:
+                evaluations = None
+        else:
+            vqe = VQE(
+                ansatz=ansatz,
+                initial_point=initial_point,
+                expectation=expectation,
+                callback=publisher.callback,
+                quantum_instance=_quantum_instance,
+            )
+            result = vqe.compute_minimum_eigenvalue(operator, aux_operators)
+            history = None
+            evaluations = None
+    finally:
+        # make sure all interim results are published before the final result or the error
+        publisher.close()
 
     eigenvalues_list = (
         result.aux_operator_eigenvalues.tolist()
@@ -1146,6 +3230,7 @@ def main(backend, user_messenger, **kwargs):
         "eigenvalue": result.eigenvalue,
         "aux_operator_eigenvalues": eigenvalues_list,
         "optimizer_history": history,
+        "evaluations": evaluations,
     }
 
     user_messenger.publish(serialized_result, final=True)
@@ -0,0 +1,274 @@
+# This code is part of qiskit-runtime.
+#
+# (C) Copyright IBM 2021.
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+
+"""Test the hardware efficient QAOA ansatz of the QAOA program."""
+
+from unittest import TestCase, skipUnless
+
+import numpy as np
+
+from qiskit import QuantumCircuit, QuantumRegister
+from qiskit.circuit import Parameter
+from qiskit.converters import circuit_to_dag
+from qiskit.exceptions import QiskitError
+from qiskit.opflow import PauliSumOp, Z, I
+from qiskit.quantum_info import Operator
+from qiskit.transpiler import Layout
+
+from qiskit_runtime.qaoa import qaoa
+
+try:
+    from qiskit_optimization import QuadraticProgram
+
+    HAS_OPTIMIZATION = True
+except ImportError:
+    HAS_OPTIMIZATION = False
+
+# the gates of the ansatz built before the sparse cost matrix, the layout index arrays and the
+# reuse of the layers across reps, for the cost operator of _baseline_ansatz and three reps, as
+# the name, the qubits and, for rotations, the factor of the angle and the parameter index
+_BASELINE_GATES = [
+    ("h", (3,)),
+    ("h", (2,)),
+    ("h", (1,)),
+    ("h", (0,)),
+    ("rz", (1,), 1.6, 0),
+    ("rz", (3,), -4.4, 0),
+    ("cx", (3, 0)),
+    ("rz", (0,), -1.0, 0),
+    ("cx", (3, 0)),
+    ("cx", (2, 0)),
+    ("rz", (0,), 2.6, 0),
+    ("cx", (0, 2)),
+    ("cx", (2, 0)),
+    ("cx", (1, 3)),
+    ("cx", (3, 1)),
+    ("cx", (1, 3)),
+    ("cx", (0, 3)),
+    ("rz", (3,), 4.0, 0),
+    ("cx", (3, 0)),
+    ("cx", (0, 3)),
+    ("cx", (0, 2)),
+    ("rz", (2,), 2.0, 0),
+    ("cx", (0, 2)),
+    ("cx", (1, 3)),
+    ("rz", (3,), 1.4, 0),
+    ("cx", (1, 3)),
+    ("rx", (2,), 2.0, 1),
+    ("rx", (0,), 2.0, 1),
+    ("rx", (3,), 2.0, 1),
+    ("rx", (1,), 2.0, 1),
+    ("cx", (1, 3)),
+    ("rz", (3,), 1.4, 2),
+    ("cx", (1, 3)),
+    ("cx", (0, 2)),
+    ("rz", (2,), 2.0, 2),
+    ("cx", (0, 2)),
+    ("cx", (0, 3)),
+    ("cx", (3, 0)),
+    ("rz", (3,), 4.0, 2),
+    ("cx", (0, 3)),
+    ("cx", (1, 3)),
+    ("cx", (3, 1)),
+    ("cx", (1, 3)),
+    ("cx", (2, 0)),
+    ("cx", (0, 2)),
+    ("rz", (0,), 2.6, 2),
+    ("cx", (2, 0)),
+    ("cx", (3, 0)),
+    ("rz", (0,), -1.0, 2),
+    ("cx", (3, 0)),
+    ("rz", (3,), -4.4, 2),
+    ("rz", (1,), 1.6, 2),
+    ("rx", (0,), 2.0, 3),
+    ("rx", (1,), 2.0, 3),
+    ("rx", (2,), 2.0, 3),
+    ("rx", (3,), 2.0, 3),
+    ("rz", (1,), 1.6, 4),
+    ("rz", (3,), -4.4, 4),
+    ("cx", (3, 0)),
+    ("rz", (0,), -1.0, 4),
+    ("cx", (3, 0)),
+    ("cx", (2, 0)),
+    ("rz", (0,), 2.6, 4),
+    ("cx", (0, 2)),
+    ("cx", (2, 0)),
+    ("cx", (1, 3)),
+    ("cx", (3, 1)),
+    ("cx", (1, 3)),
+    ("cx", (0, 3)),
+    ("rz", (3,), 4.0, 4),
+    ("cx", (3, 0)),
+    ("cx", (0, 3)),
+    ("cx", (0, 2)),
+    ("rz", (2,), 2.0, 4),
+    ("cx", (0, 2)),
+    ("cx", (1, 3)),
+    ("rz", (3,), 1.4, 4),
+    ("cx", (1, 3)),
+    ("rx", (2,), 2.0, 5),
+    ("rx", (0,), 2.0, 5),
+    ("rx", (3,), 2.0, 5),
+    ("rx", (1,), 2.0, 5),
+]
+
+# the number of gates in _BASELINE_GATES for each number of reps
+_BASELINE_NUM_GATES = {1: 30, 2: 56, 3: 82}
+
+
+def _baseline_ansatz(reps):
+    """An ansatz with linear terms on a line with a permuted initial layout."""
+    cost_op = PauliSumOp.from_list(
+        [
+            ("IIZZ", 1.0),
+            ("ZIIZ", -0.5),
+            ("IZZI", 2.0),
+            ("ZZII", 0.7),
+            ("IZIZ", 1.3),
+            ("IIZI", 0.4),
+            ("ZIII", -1.1),
+        ]
+    )
+    register = QuantumRegister(4, "q")
+    return (
+        qaoa.HWQAOAAnsatz(
+            cost_op,
+            reps=reps,
+            swap_strategy=qaoa.LineSwapStrategy(list(range(4))),
+            initial_layout=Layout.from_intlist([2, 0, 3, 1], register),
+        ),
+        register,
+    )
+
+
+def _baseline_circuit(reps, values):
+    """The circuit of the first gates of _BASELINE_GATES with the given parameter values."""
+    circuit = QuantumCircuit(4)
+    for name, qubits, *angle in _BASELINE_GATES[: _BASELINE_NUM_GATES[reps]]:
+        if angle:
+            factor, index = angle
+            getattr(circuit, name)(factor * values[index], *qubits)
+        else:
+            getattr(circuit, name)(*qubits)
+
+    return circuit
+
+
+def _random_ising(num_qubits, seed):
+    """A random Ising operator with linear and quadratic terms, and its constant offset."""
+    rng = np.random.default_rng(seed)
+    paulis = []
+    for i in range(num_qubits):
+        label = ["I"] * num_qubits
+        label[i] = "Z"
+        if rng.random() < 0.5:
+            paulis.append(("".join(label), rng.normal()))
+
+        for j in range(i):
+            if rng.random() < 0.5:
+                label = ["I"] * num_qubits
+                label[i], label[j] = "Z", "Z"
+                paulis.append(("".join(label), rng.normal()))
+
+    return PauliSumOp.from_list(paulis), rng.normal()
+
+
+class TestCostMatrix(TestCase):
+    """Test the cost matrix read from the Paulis of the cost operator."""
+
+    def test_cost_matrix(self):
+        """Test the cost matrix of an operator with linear terms and a constant offset."""
+        cost_op = PauliSumOp.from_list(
+            [("IZZ", 1.0), ("ZIZ", -2.0), ("ZII", 0.5), ("IIZ", 1.5), ("III", 3.0)]
+        )
+        expected = [[-1.0, 2.0, -4.0], [2.0, -2.0, 0.0], [-4.0, 0.0, 3.0]]
+
+        matrix = qaoa.HWQAOAAnsatz._get_cost_matrix(cost_op)
+        sparse_matrix = qaoa.HWQAOAAnsatz._get_cost_matrix(cost_op, sparse=True)
+
+        np.testing.assert_allclose(matrix, expected)
+        np.testing.assert_allclose(sparse_matrix.toarray(), expected)
+
+    @skipUnless(HAS_OPTIMIZATION, "qiskit-optimization is required")
+    def test_quadratic_program(self):
+        """Test the cost matrix against the one of the quadratic program of the operator."""
+        for num_qubits, seed in [(2, 0), (4, 1), (6, 2), (8, 3)]:
+            with self.subTest(num_qubits=num_qubits, seed=seed):
+                cost_op, offset = _random_ising(num_qubits, seed)
+
+                # the quadratic program takes the constant offset separately
+                quadratic_program = QuadraticProgram()
+                quadratic_program.from_ising(qubit_op=cost_op, offset=offset)
+                objective = quadratic_program.objective
+                expected = objective.quadratic.to_array(symmetric=True)
+                expected += np.diag(objective.linear.to_array())
+
+                with_offset = cost_op + offset * PauliSumOp.from_list([("I" * num_qubits, 1.0)])
+                matrix = qaoa.HWQAOAAnsatz._get_cost_matrix(with_offset)
+                sparse_matrix = qaoa.HWQAOAAnsatz._get_cost_matrix(with_offset, sparse=True)
+
+                np.testing.assert_allclose(matrix, expected, atol=1e-12)
+                np.testing.assert_allclose(sparse_matrix.toarray(), expected, atol=1e-12)
+
+    def test_invalid_operators(self):
+        """Test that only sums of Pauli Z terms on at most two qubits are accepted."""
+        invalid = [
+            PauliSumOp.from_list([("XZ", 1.0)]),
+            PauliSumOp.from_list([("ZZZ", 1.0)]),
+            Z ^ Z,
+            ((Z ^ Z) + (I ^ Z)).to_matrix_op(),
+        ]
+
+        for cost_op in invalid:
+            with self.subTest(cost_op=cost_op):
+                with self.assertRaises(QiskitError):
+                    qaoa.HWQAOAAnsatz._get_cost_matrix(cost_op)
+
+
+class TestBaseline(TestCase):
+    """Test the ansatz against the circuits built before the sparse and reused layers."""
+
+    def test_operator(self):
+        """Test the bound ansatz and the final layout against the baseline construction."""
+        rng = np.random.default_rng(0)
+        for reps in [1, 2, 3]:
+            with self.subTest(reps=reps):
+                ansatz, register = _baseline_ansatz(reps)
+                values = rng.uniform(-np.pi, np.pi, 2 * reps)
+
+                bound = ansatz.assign_parameters(values)
+                self.assertEqual(Operator(bound), Operator(_baseline_circuit(reps, values)))
+
+                # the odd reps end in the swapped layout and the even reps in the initial layout
+                expected = [3, 2, 1, 0] if reps % 2 else [2, 0, 3, 1]
+                self.assertEqual([ansatz.final_layout[qubit] for qubit in register], expected)
+
+
+class TestBuildDag(TestCase):
+    """Test the ansatz built directly as DAG against the decomposed circuit."""
+
+    def test_bound(self):
+        """Test the DAG with numbers and with parameter expressions as parameter values."""
+        x = Parameter("x")
+        for reps in [1, 2, 3]:
+            ansatz, _ = _baseline_ansatz(reps)
+            for values in [np.linspace(0.1, 1.0, 2 * reps), [(i + 1) * x for i in range(2 * reps)]]:
+                with self.subTest(reps=reps, values=values):
+                    expected = circuit_to_dag(ansatz.assign_parameters(values).decompose())
+                    self.assertEqual(ansatz.build_dag(values), expected)
+
+    def test_unbound(self):
+        """Test that the DAG without parameter values has the parameters of the circuit."""
+        for reps in [1, 2, 3]:
+            with self.subTest(reps=reps):
+                ansatz, _ = _baseline_ansatz(reps)
+                self.assertEqual(ansatz.build_dag(), circuit_to_dag(ansatz.decompose()))
@@ -0,0 +1,114 @@
+# This code is part of qiskit-runtime.
+#
+# (C) Copyright IBM 2021.
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+
+"""Test the initial qubit mapper of the QAOA program."""
+
+from unittest import TestCase
+
+import numpy as np
+
+from qiskit.exceptions import QiskitError
+from qiskit.opflow import PauliSumOp
+
+from qiskit_runtime.qaoa import qaoa
+
+
+def _reference_mapping(cost_op, swap_strategy):
+    """The mapping computed with the full matrix of the costs of all logical qubits."""
+    num_qubits = cost_op.num_qubits
+    rotation_angles = qaoa.InitialQubitMapper._rotation_matrix(cost_op)
+    distance_mat = np.asarray(swap_strategy.distance_matrix)[:num_qubits, :num_qubits]
+
+    physical_mapping = [-1] * num_qubits
+    costs = np.zeros((num_qubits, num_qubits))
+    rotation_sums = np.zeros(num_qubits)
+    v_qubit = int(np.argmax(np.count_nonzero(rotation_angles, axis=1)))
+    for _ in range(num_qubits):
+        free = [p not in physical_mapping for p in range(num_qubits)]
+        physical_mapping[v_qubit] = int(np.argmin(np.where(free, costs[v_qubit], np.inf)))
+        rotation_sums += rotation_angles[:, v_qubit]
+        costs += np.outer(rotation_angles[:, v_qubit], distance_mat[:, physical_mapping[v_qubit]])
+
+        unmapped = [p < 0 for p in physical_mapping]
+        v_qubit = int(np.argmax(np.where(unmapped, rotation_sums, -np.inf)))
+
+    return physical_mapping
+
+
+def _random_cost_op(num_qubits, probability, seed):
+    """A random cost operator with integer weights, such that the costs are exact."""
+    rng = np.random.default_rng(seed)
+    paulis = []
+    for i in range(num_qubits):
+        for j in range(i):
+            if rng.random() < probability:
+                label = ["I"] * num_qubits
+                label[i], label[j] = "Z", "Z"
+                paulis.append(("".join(label), float(rng.integers(1, 5))))
+
+    return PauliSumOp.from_list(paulis)
+
+
+class TestInitialQubitMapper(TestCase):
+    """Test the mapping of the decision variables to the qubits of a swap strategy."""
+
+    def test_mapping(self):
+        """Test the mapping of a small cost operator to a line."""
+        cost_op = PauliSumOp.from_list(
+            [
+                ("IIZZII", 1.0),
+                ("ZIZIII", 2.0),
+                ("IZZIII", 1.0),
+                ("IIZIIZ", 3.0),
+                ("IZIIIZ", 1.0),
+                ("ZIIIZI", 2.0),
+            ]
+        )
+        swap_strategy = qaoa.LineSwapStrategy(list(range(6)))
+
+        # qubit 3 has the most rotations and is mapped first, then qubits 0, 4, 5, 1 and 2
+        permuted = qaoa.InitialQubitMapper().permute_operator(cost_op, swap_strategy)
+
+        self.assertEqual(permuted, cost_op.permute([1, 4, 2, 0, 3, 5]))
+
+    def test_first_qubit(self):
+        """Test that the first mapped qubit is the one with the most rotations."""
+        cost_op = PauliSumOp.from_list([("IIZZ", 1.0), ("IZIZ", 1.0), ("ZIIZ", 1.0)])
+        swap_strategy = qaoa.LineSwapStrategy(list(range(4)))
+
+        permuted = qaoa.InitialQubitMapper().permute_operator(cost_op, swap_strategy)
+
+        # qubit 0 has three rotations and is mapped first to the end of the line, followed by the
+        # qubits 1, 2 and 3. The original mapper counted the rotations of list positions and never
+        # updated the largest count, so it started with qubit 2 and mapped qubit 0 to qubit 1.
+        self.assertEqual(permuted, cost_op.permute([0, 1, 2, 3]))
+        self.assertNotEqual(permuted, cost_op.permute([1, 0, 2, 3]))
+
+    def test_reference(self):
+        """Test the mapping against the mapping computed with the full cost matrix."""
+        for num_qubits, seed in [(5, 0), (8, 1), (10, 2), (12, 3), (12, 4)]:
+            with self.subTest(num_qubits=num_qubits, seed=seed):
+                cost_op = _random_cost_op(num_qubits, 0.4, seed)
+                swap_strategy = qaoa.LineSwapStrategy(list(range(num_qubits)))
+
+                permuted = qaoa.InitialQubitMapper().permute_operator(cost_op, swap_strategy)
+                expected = _reference_mapping(cost_op, swap_strategy)
+
+                self.assertEqual(permuted, cost_op.permute(expected))
+
+    def test_too_large(self):
+        """Test that a cost operator larger than the swap strategy raises."""
+        cost_op = PauliSumOp.from_list([("ZIIIZ", 1.0)])
+        swap_strategy = qaoa.LineSwapStrategy(list(range(4)))
+
+        with self.assertRaises(QiskitError):
+            qaoa.InitialQubitMapper().permute_operator(cost_op, swap_strategy)
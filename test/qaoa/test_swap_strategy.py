@@ -0,0 +1,268 @@
+# This code is part of qiskit-runtime.
+#
+# (C) Copyright IBM 2021.
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+
+"""Test the swap strategies of the QAOA program."""
+
+import json
+from unittest import TestCase
+
+import numpy as np
+
+from qiskit.transpiler import CouplingMap
+
+from qiskit_runtime.qaoa import qaoa
+
+
+def _library_strategies():
+    """The line and library swap strategies, with a name for the subtests."""
+    strategies = [(f"line {n}", qaoa.LineSwapStrategy(list(range(n)))) for n in range(2, 9)]
+    strategies.append(("line 6 with 2 layers", qaoa.LineSwapStrategy(list(range(6)), 2)))
+    strategies.append(("tee", qaoa.FiveQubitTeeSwapStrategy()))
+    strategies += [(f"heavy {n}", qaoa.SevenQubitHeavySwapStrategy(n)) for n in [6, 7]]
+    strategies += [(f"double ring {n}", qaoa.DoubleRingSwapStrategy(n)) for n in range(22, 28)]
+    return strategies
+
+
+def _reference_inverse_permutations(swap_strategy):
+    """The inverse composed permutations, composed layer by layer on lists."""
+    permutations = [list(range(swap_strategy.num_vertices))]
+    for idx in range(len(swap_strategy)):
+        permutations.append(swap_strategy.apply_swap_layer(permutations[-1], idx))
+
+    return permutations
+
+
+def _reference_distance_matrix(swap_strategy):
+    """The distance matrix as nested list with None for qubits that are never connected."""
+    num_vertices = swap_strategy.num_vertices
+    distance_matrix = [[None] * num_vertices for _ in range(num_vertices)]
+    for i in range(num_vertices):
+        distance_matrix[i][i] = 0
+
+    for i, permutation in enumerate(_reference_inverse_permutations(swap_strategy)):
+        for j, k in swap_strategy.coupling_map.get_edges():
+            j, k = permutation[j], permutation[k]
+            if distance_matrix[j][k] is None:
+                distance_matrix[j][k] = i
+                distance_matrix[k][j] = i
+
+    return distance_matrix
+
+
+class TestSwapStrategyArrays(TestCase):
+    """Test the array-backed permutations and distances against the list-based computation."""
+
+    def test_permutations(self):
+        """Test the composed permutations and their inverses."""
+        for name, swap_strategy in _library_strategies():
+            with self.subTest(name):
+                reference = _reference_inverse_permutations(swap_strategy)
+                for idx, inverse in enumerate(reference):
+                    self.assertEqual(swap_strategy.inverse_composed_permutation(idx), inverse)
+                    self.assertEqual(
+                        swap_strategy.composed_permutation(idx),
+                        qaoa.SwapStrategy.invert_permutation(inverse),
+                    )
+
+    def test_swapped_coupling_map(self):
+        """Test the coupling maps after each swap layer."""
+        for name, swap_strategy in _library_strategies():
+            with self.subTest(name):
+                edges = swap_strategy.coupling_map.get_edges()
+                for idx, inverse in enumerate(_reference_inverse_permutations(swap_strategy)):
+                    expected = {(inverse[i], inverse[j]) for i, j in edges}
+                    swapped = set(swap_strategy.swapped_coupling_map(idx).get_edges())
+                    self.assertEqual(swapped, expected)
+
+    def test_distance_matrix(self):
+        """Test the distance matrix, where -1 marks qubits that are never connected."""
+        for name, swap_strategy in _library_strategies():
+            with self.subTest(name):
+                reference = _reference_distance_matrix(swap_strategy)
+                expected = [[-1 if d is None else d for d in row] for row in reference]
+                self.assertEqual(swap_strategy.distance_matrix.tolist(), expected)
+
+                distances = [d for row in reference for d in row]
+                if None in distances:
+                    self.assertIsNone(swap_strategy.max_distance)
+                else:
+                    self.assertEqual(swap_strategy.max_distance, max(distances))
+
+    def test_new_connections(self):
+        """Test the connections obtained by each swap layer."""
+        for name, swap_strategy in _library_strategies():
+            with self.subTest(name):
+                reference = _reference_distance_matrix(swap_strategy)
+                num_vertices = swap_strategy.num_vertices
+                for idx in range(len(swap_strategy) + 1):
+                    expected = [
+                        {i, j}
+                        for i in range(num_vertices)
+                        for j in range(i)
+                        if reference[i][j] == idx
+                    ]
+                    self.assertEqual(swap_strategy.new_connections(idx), expected)
+
+    def test_line_full_connectivity(self):
+        """Test the line strategy with n - 2 layers connects all qubits."""
+        for num_qubits in range(2, 9):
+            with self.subTest(num_qubits):
+                swap_strategy = qaoa.LineSwapStrategy(list(range(num_qubits)))
+                self.assertTrue(swap_strategy.reaches_full_connectivity())
+
+
+def _random_coupling_map(num_vertices, probability, seed):
+    """A random coupling map with the edges in both directions."""
+    rng = np.random.default_rng(seed)
+    edges = []
+    for i in range(num_vertices):
+        for j in range(i):
+            if rng.random() < probability:
+                edges += [[i, j], [j, i]]
+
+    return CouplingMap(couplinglist=edges)
+
+
+def _greedy_num_colors(coupling_map):
+    """The number of colors if each edge in sorted order gets the first color free at its ends."""
+    used = {vertex: set() for vertex in coupling_map.physical_qubits}
+    for i, j in sorted({tuple(sorted(edge)) for edge in coupling_map.get_edges()}):
+        color = min(set(range(len(used) ** 2)) - used[i] - used[j])
+        used[i].add(color)
+        used[j].add(color)
+
+    return len(set.union(*used.values()))
+
+
+def _petersen_coupling_map():
+    """The Petersen graph, which has maximal degree 3 but needs 4 edge colors."""
+    edges = [(i, (i + 1) % 5) for i in range(5)] + [(i, i + 5) for i in range(5)]
+    edges += [(5 + i, 5 + (i + 2) % 5) for i in range(5)]
+    return CouplingMap(couplinglist=[list(edge) for edge in edges] + [[j, i] for i, j in edges])
+
+
+class TestEdgeColoring(TestCase):
+    """Test the minimal edge coloring of the coupling maps."""
+
+    def assertProperColoring(self, coupling_map, coloring):
+        """Assert that all edges are colored and that edges sharing a vertex differ in color."""
+        for i, j in coupling_map.get_edges():
+            self.assertEqual(coloring[(i, j)], coloring[(j, i)])
+
+        for vertex in coupling_map.physical_qubits:
+            colors = [coloring[(vertex, neighbor)] for neighbor in coupling_map.neighbors(vertex)]
+            self.assertEqual(len(colors), len(set(colors)))
+
+    @staticmethod
+    def _max_degree(coupling_map):
+        """The maximal number of neighbors of a qubit."""
+        return max(len(set(coupling_map.neighbors(v))) for v in coupling_map.physical_qubits)
+
+    def test_bipartite(self):
+        """Test that bipartite coupling maps are colored with the maximal degree of colors."""
+        coupling_maps = [(f"line {n}", CouplingMap.from_line(n)) for n in range(2, 10)]
+        coupling_maps += [(f"even ring {n}", CouplingMap.from_ring(n)) for n in [4, 6, 8]]
+        coupling_maps += [
+            (f"grid {n}x{m}", CouplingMap.from_grid(n, m)) for n in range(1, 5) for m in range(2, 6)
+        ]
+        coupling_maps += [(f"heavy hex {d}", CouplingMap.from_heavy_hex(d)) for d in [3, 5, 7]]
+        coupling_maps.append(("tee", qaoa.FiveQubitTeeSwapStrategy().coupling_map))
+
+        for name, coupling_map in coupling_maps:
+            with self.subTest(name):
+                coloring = qaoa.minimal_edge_coloring(coupling_map)
+                self.assertProperColoring(coupling_map, coloring)
+                self.assertEqual(len(set(coloring.values())), self._max_degree(coupling_map))
+
+    def test_non_bipartite(self):
+        """Test that other coupling maps are colored with at most one more color."""
+        coupling_maps = [(f"odd ring {n}", CouplingMap.from_ring(n)) for n in [3, 5, 7, 9]]
+        coupling_maps += [(f"full {n}", CouplingMap.from_full(n)) for n in range(3, 8)]
+        coupling_maps += [
+            (f"random {seed}", _random_coupling_map(12, 0.4, seed)) for seed in range(10)
+        ]
+        coupling_maps.append(("petersen", _petersen_coupling_map()))
+
+        for name, coupling_map in coupling_maps:
+            with self.subTest(name):
+                coloring = qaoa.minimal_edge_coloring(coupling_map)
+                self.assertProperColoring(coupling_map, coloring)
+                self.assertLessEqual(
+                    len(set(coloring.values())), self._max_degree(coupling_map) + 1
+                )
+
+    def test_recoloring(self):
+        """Test coupling maps where coloring the edges greedily needs too many colors.
+
+        The heavy-hex maps require inverting alternating paths, and the full maps require
+        rotating the fans of Misra and Gries to stay within the bound.
+        """
+        coupling_maps = [(f"heavy hex {d}", CouplingMap.from_heavy_hex(d), 0) for d in [3, 5]]
+        coupling_maps += [(f"full {n}", CouplingMap.from_full(n), 1) for n in [5, 6]]
+
+        for name, coupling_map, extra_colors in coupling_maps:
+            with self.subTest(name):
+                max_colors = self._max_degree(coupling_map) + extra_colors
+                self.assertGreater(_greedy_num_colors(coupling_map), max_colors)
+
+                coloring = qaoa.minimal_edge_coloring(coupling_map)
+                self.assertProperColoring(coupling_map, coloring)
+                self.assertLessEqual(len(set(coloring.values())), max_colors)
+
+    def test_line_swap_strategy(self):
+        """Test that the coloring of a line equals the coloring of the line swap strategy."""
+        for line in [list(range(6)), [3, 0, 5, 1, 4, 2]]:
+            with self.subTest(line):
+                swap_strategy = qaoa.LineSwapStrategy(line)
+                expected = {
+                    (line[i], line[j]): color
+                    for (i, j), color in qaoa.line_coloring(len(line)).items()
+                }
+                self.assertEqual(swap_strategy.edge_coloring, expected)
+
+                # a line has only two proper 2-colorings, which only differ in the color names
+                coloring = qaoa.minimal_edge_coloring(swap_strategy.coupling_map)
+                self.assertProperColoring(swap_strategy.coupling_map, coloring)
+                renaming = {coloring[edge]: color for edge, color in expected.items()}
+                self.assertEqual(len(renaming), 2)
+                self.assertEqual({edge: renaming[c] for edge, c in coloring.items()}, expected)
+
+
+class TestSerialization(TestCase):
+    """Test the serialization of the swap strategies into dictionaries."""
+
+    def test_round_trip(self):
+        """Test that a loaded swap strategy equals the serialized one."""
+        strategies = _library_strategies()
+        strategies.append(("line with gaps", qaoa.LineSwapStrategy([3, 0, 5, 1, 4, 2])))
+
+        for name, swap_strategy in strategies:
+            with self.subTest(name):
+                data = json.loads(json.dumps(swap_strategy.to_dict()))
+                loaded = qaoa.SwapStrategy.from_dict(data)
+
+                np.testing.assert_array_equal(loaded.distance_matrix, swap_strategy.distance_matrix)
+                self.assertEqual(
+                    [sorted(map(tuple, layer)) for layer in loaded.swap_layers],
+                    [sorted(map(tuple, layer)) for layer in swap_strategy.swap_layers],
+                )
+                self.assertEqual(loaded.edge_coloring, swap_strategy.edge_coloring)
+                self.assertEqual(loaded.num_vertices, swap_strategy.num_vertices)
+                self.assertEqual(
+                    sorted(loaded.coupling_map.get_edges()),
+                    sorted(swap_strategy.coupling_map.get_edges()),
+                )
+                for idx in range(len(swap_strategy) + 1):
+                    self.assertEqual(
+                        loaded.inverse_composed_permutation(idx),
+                        swap_strategy.inverse_composed_permutation(idx),
+                    )
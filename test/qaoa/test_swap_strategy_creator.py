@@ -0,0 +1,201 @@
+# This code is part of qiskit-runtime.
+#
+# (C) Copyright IBM 2021.
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+
+"""Test the swap strategy creator of the QAOA program."""
+
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from types import SimpleNamespace
+from unittest import TestCase
+from unittest.mock import patch
+
+import numpy as np
+
+from qiskit import QuantumCircuit
+from qiskit.converters import circuit_to_dag
+
+from qiskit_runtime.qaoa import qaoa
+
+# a 16 qubit heavy-hex coupling map with two hexagons
+HEAVY_HEX_EDGES = [
+    (0, 1),
+    (1, 2),
+    (1, 4),
+    (2, 3),
+    (3, 5),
+    (4, 7),
+    (5, 8),
+    (6, 7),
+    (7, 10),
+    (8, 9),
+    (8, 11),
+    (10, 12),
+    (11, 14),
+    (12, 13),
+    (12, 15),
+    (13, 14),
+]
+
+
+class FakeBackend:
+    """A backend with a heavy-hex coupling map and random two-qubit gate errors."""
+
+    def __init__(self, seed, last_update_date=None):
+        rng = np.random.default_rng(seed)
+        self._errors = {}
+        for edge in HEAVY_HEX_EDGES:
+            error = rng.uniform(0.005, 0.05)
+            self._errors[edge] = error
+            self._errors[edge[::-1]] = error
+
+        self._last_update_date = last_update_date
+
+    def configuration(self):
+        """The coupling map in both directions and the number of qubits."""
+        return SimpleNamespace(coupling_map=[list(edge) for edge in self._errors], num_qubits=16)
+
+    def name(self):
+        """The name of the backend."""
+        return "fake_heavy_hex"
+
+    def properties(self):
+        """The two-qubit gate errors and the calibration date."""
+        return SimpleNamespace(
+            gate_error=lambda gate, edge: self._errors[tuple(edge)],
+            last_update_date=self._last_update_date,
+        )
+
+
+def _brute_force_fidelity(creator, length):
+    """The highest fidelity of all simple paths with the given number of qubits."""
+    neighbors = {}
+    for edge0, edge1 in HEAVY_HEX_EDGES:
+        neighbors.setdefault(edge0, []).append(edge1)
+        neighbors.setdefault(edge1, []).append(edge0)
+
+    def paths(path):
+        if len(path) == length:
+            yield path
+            return
+
+        for neighbor in neighbors[path[-1]]:
+            if neighbor not in path:
+                yield from paths(path + [neighbor])
+
+    return max(creator.evaluate_path(path) for start in neighbors for path in paths([start]))
+
+
+class TestSwapStrategyCreator(TestCase):
+    """Test the branch and bound search of the best line."""
+
+    def setUp(self):
+        super().setUp()
+        qaoa.SwapStrategyCreator._path_cache.clear()
+
+    def test_find_path_matches_brute_force(self):
+        """Test that the best path has the fidelity of the best of all simple paths."""
+        for seed in range(5):
+            creator = qaoa.SwapStrategyCreator(FakeBackend(seed))
+            for length in range(2, 12):
+                with self.subTest(seed=seed, length=length):
+                    path = creator.find_path(length)
+
+                    self.assertEqual(len(path), length)
+                    self.assertEqual(len(set(path)), length)
+                    for idx in range(length - 1):
+                        self.assertIn((path[idx], path[idx + 1]), creator._two_qubit_fidelity)
+
+                    self.assertAlmostEqual(
+                        creator.evaluate_path(path), _brute_force_fidelity(creator, length)
+                    )
+
+    def test_find_path_without_fidelity(self):
+        """Test that a simple path is found if the fidelity is not used."""
+        creator = qaoa.SwapStrategyCreator(FakeBackend(0), use_fidelity=False)
+        path = creator.find_path(10)
+
+        self.assertEqual(len(set(path)), 10)
+        for idx in range(9):
+            self.assertIn((path[idx], path[idx + 1]), creator._two_qubit_fidelity)
+
+    def test_no_path(self):
+        """Test that no path is found if it is longer than the coupling map allows."""
+        creator = qaoa.SwapStrategyCreator(FakeBackend(0))
+
+        self.assertIsNone(creator.find_path(17))
+
+    def test_path_cache(self):
+        """Test that paths are only cached if the calibration date is known."""
+        qaoa.SwapStrategyCreator(FakeBackend(0)).find_path(5)
+        self.assertEqual(len(qaoa.SwapStrategyCreator._path_cache), 0)
+
+        date = datetime(2021, 7, 1)
+        qaoa.SwapStrategyCreator(FakeBackend(0, date)).find_path(5)
+        qaoa.SwapStrategyCreator(FakeBackend(0, date), two_qubit_gate="ecr").find_path(5)
+        self.assertEqual(len(qaoa.SwapStrategyCreator._path_cache), 2)
+
+
+class TestSwapStrategyCache(TestCase):
+    """Test the swap strategies cached on disk."""
+
+    def setUp(self):
+        super().setUp()
+        qaoa.SwapStrategyCreator._path_cache.clear()
+        self._tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self._tmp_dir)
+
+    def _run(self, problem_size):
+        """Run a creator with the cache directory and return it with its swap strategy."""
+        backend = FakeBackend(0, datetime(2021, 7, 1))
+        creator = qaoa.SwapStrategyCreator(backend, cache_dir=self._tmp_dir)
+        creator.run(circuit_to_dag(QuantumCircuit(problem_size)))
+
+        return creator, creator.property_set["qaoa_swap_strategy"]
+
+    def test_load_from_disk(self):
+        """Test that a second run loads the swap strategy and path instead of creating them."""
+        first, swap_strategy = self._run(6)
+        self.assertEqual(len(os.listdir(self._tmp_dir)), 1)
+
+        with patch.object(qaoa.SwapStrategyCreator, "find_path") as find_path:
+            second, loaded = self._run(6)
+
+        find_path.assert_not_called()
+        self.assertEqual(
+            second.property_set["qaoa_swap_layout"], first.property_set["qaoa_swap_layout"]
+        )
+        np.testing.assert_array_equal(loaded.distance_matrix, swap_strategy.distance_matrix)
+
+    def test_corrupted_file(self):
+        """Test that a corrupted cache file is a cache miss and is overwritten."""
+        first, _ = self._run(6)
+        (filename,) = os.listdir(self._tmp_dir)
+        with open(os.path.join(self._tmp_dir, filename), "w") as file:
+            file.write('{"swap_strategy": {"num_vert')
+
+        with patch.object(
+            qaoa.SwapStrategyCreator, "find_path", wraps=first.find_path
+        ) as find_path:
+            second, _ = self._run(6)
+
+        find_path.assert_called_once_with(6)
+        self.assertEqual(
+            second.property_set["qaoa_swap_layout"], first.property_set["qaoa_swap_layout"]
+        )
+
+        # the created swap strategy replaced the corrupted file
+        with patch.object(qaoa.SwapStrategyCreator, "find_path") as find_path:
+            self._run(6)
+
+        find_path.assert_not_called()
@@ -0,0 +1,98 @@
+# This code is part of qiskit-runtime.
+#
+# (C) Copyright IBM 2021.
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+
+"""Test the Pauli expectation caching the measurement plans of the VQE program."""
+
+import os
+import tempfile
+from unittest import TestCase
+
+from qiskit.circuit.library import EfficientSU2
+from qiskit.opflow import PauliExpectation, PauliSumOp, StateFn
+
+from qiskit_runtime.vqe import vqe
+
+
+def _measurement(coeff=1.0):
+    """A measurement of a Hamiltonian with several groups of commuting Paulis."""
+    hamiltonian = PauliSumOp.from_list(
+        [("ZZI", 1.0), ("IXX", -0.5), ("YIY", 0.3), ("IIZ", 0.2), ("XXX", coeff)]
+    )
+    return StateFn(hamiltonian, is_measurement=True)
+
+
+class TestCachedPauliExpectation(TestCase):
+    """Test that the cached measurement plans equal the plans of the Pauli expectation."""
+
+    def test_cache_hit(self):
+        """Test that a cache hit equals a fresh conversion."""
+        expectation = vqe.CachedPauliExpectation()
+        first = expectation.convert(_measurement())
+        second = expectation.convert(_measurement())
+
+        self.assertEqual(first, PauliExpectation().convert(_measurement()))
+        self.assertEqual(second, PauliExpectation().convert(_measurement()))
+        self.assertEqual((expectation.hits, expectation.misses), (1, 1))
+
+    def test_different_operator(self):
+        """Test that a different operator misses the cache."""
+        expectation = vqe.CachedPauliExpectation()
+        expectation.convert(_measurement())
+        converted = expectation.convert(_measurement(coeff=0.9))
+
+        self.assertEqual(converted, PauliExpectation().convert(_measurement(coeff=0.9)))
+        self.assertEqual((expectation.hits, expectation.misses), (0, 2))
+
+    def test_coefficient(self):
+        """Test that the coefficient of the measurement is kept on a cache hit."""
+        expectation = vqe.CachedPauliExpectation()
+        expectation.convert(_measurement())
+        converted = expectation.convert(2 * _measurement())
+
+        self.assertEqual(converted, PauliExpectation().convert(2 * _measurement()))
+        self.assertEqual(expectation.hits, 1)
+
+    def test_expectation_value(self):
+        """Test the conversion of an expectation value with respect to a circuit."""
+        circuit = EfficientSU2(3, reps=1)
+        circuit = circuit.assign_parameters([0.1 * i for i in range(circuit.num_parameters)])
+        expression = _measurement() @ StateFn(circuit)
+
+        expectation = vqe.CachedPauliExpectation()
+        expectation.convert(expression)
+        converted = expectation.convert(expression)
+
+        expected = PauliExpectation().convert(expression)
+        self.assertEqual(converted, expected)
+        self.assertAlmostEqual(converted.eval(), expected.eval())
+        self.assertEqual(expectation.hits, 1)
+
+    def test_file(self):
+        """Test that a new instance loads the measurement groups from the file."""
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "plans.json")
+            vqe.CachedPauliExpectation(filename).convert(_measurement())
+            self.assertTrue(os.path.exists(filename))
+
+            expectation = vqe.CachedPauliExpectation(filename)
+            converted = expectation.convert(_measurement())
+
+        self.assertEqual(converted, PauliExpectation().convert(_measurement()))
+        self.assertEqual((expectation.hits, expectation.misses), (1, 0))
+
+    def test_without_grouping(self):
+        """Test that the measurements are not cached if the Paulis are not grouped."""
+        expectation = vqe.CachedPauliExpectation(group_paulis=False)
+        converted = expectation.convert(_measurement())
+
+        self.assertEqual(converted, PauliExpectation(group_paulis=False).convert(_measurement()))
+        self.assertEqual((expectation.hits, expectation.misses), (0, 0))
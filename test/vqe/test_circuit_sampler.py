@@ -0,0 +1,102 @@
+# This code is part of qiskit-runtime.
+#
+# (C) Copyright IBM 2021.
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+
+"""Test the circuit sampler with a bounded cache of the VQE program."""
+
+from unittest import TestCase
+
+from qiskit import Aer
+from qiskit.circuit.library import RealAmplitudes
+from qiskit.opflow import StateFn, Z
+from qiskit.utils import QuantumInstance
+
+from qiskit_runtime.vqe import vqe
+
+
+def _operator(reps):
+    """An expectation value of a circuit whose size grows with ``reps``."""
+    return StateFn(Z ^ Z, is_measurement=True) @ StateFn(RealAmplitudes(2, reps=reps))
+
+
+class TestBoundedCircuitSampler(TestCase):
+    """Test the bound and the least-recently-used eviction of the operator cache."""
+
+    def setUp(self):
+        super().setUp()
+        self.quantum_instance = QuantumInstance(Aer.get_backend("statevector_simulator"))
+        self.operators = {name: _operator(reps) for name, reps in [("a", 1), ("b", 2), ("c", 8)]}
+
+        # the number of transpiled instructions of each operator in the cache
+        sampler = vqe._BoundedCircuitSampler(self.quantum_instance, max_instructions=None)
+        self.sizes = {}
+        for name, operator in self.operators.items():
+            self._convert(sampler, name)
+            self.sizes[name] = sampler._cached_sizes[operator.instance_id]
+
+    def _convert(self, sampler, name):
+        """Convert the operator with the given name at the zero point."""
+        operator = self.operators[name]
+        sampler.convert(operator, params={param: 0.0 for param in operator.parameters})
+
+    def _cached(self, sampler):
+        """The names of the cached operators, from the least to the most recently used."""
+        names = {operator.instance_id: name for name, operator in self.operators.items()}
+        return [names[op_id] for op_id in sampler._cached_ops]
+
+    def test_max_entries(self):
+        """Test that the least recently used operator is evicted first."""
+        sampler = vqe._BoundedCircuitSampler(self.quantum_instance, max_entries=2)
+        for name in ["a", "b", "a", "c"]:
+            self._convert(sampler, name)
+
+        self.assertEqual(self._cached(sampler), ["a", "c"])
+        info = sampler.cache_info()
+        self.assertEqual((info["hits"], info["misses"], info["evictions"]), (1, 3, 1))
+        self.assertEqual(info["instructions"], self.sizes["a"] + self.sizes["c"])
+
+    def test_max_instructions(self):
+        """Test that operators are evicted until the instructions are within the bound."""
+        bound = self.sizes["b"] + self.sizes["c"]
+        sampler = vqe._BoundedCircuitSampler(self.quantum_instance, max_instructions=bound)
+        for name in ["a", "b", "c"]:
+            self._convert(sampler, name)
+
+        self.assertEqual(self._cached(sampler), ["b", "c"])
+        self.assertEqual(sampler.cache_info()["evictions"], 1)
+        self.assertLessEqual(sampler.cache_info()["instructions"], bound)
+
+    def test_oversized_operator(self):
+        """Test that an operator larger than the bound is not cached and evicts nothing."""
+        bound = self.sizes["a"] + self.sizes["b"]
+        self.assertGreater(self.sizes["c"], bound)
+
+        sampler = vqe._BoundedCircuitSampler(self.quantum_instance, max_instructions=bound)
+        for name in ["a", "b", "c", "c"]:
+            self._convert(sampler, name)
+
+        self.assertEqual(self._cached(sampler), ["a", "b"])
+        info = sampler.cache_info()
+        self.assertEqual((info["hits"], info["misses"], info["evictions"]), (0, 4, 0))
+        self.assertEqual(info["instructions"], bound)
+
+    def test_clear_cache(self):
+        """Test that clearing the cache keeps the counts."""
+        sampler = vqe._BoundedCircuitSampler(self.quantum_instance)
+        for name in ["a", "a"]:
+            self._convert(sampler, name)
+
+        sampler.clear_cache()
+        self._convert(sampler, "a")
+
+        self.assertEqual(self._cached(sampler), ["a"])
+        self.assertEqual(sampler.cache_info()["hits"], 1)
+        self.assertEqual(sampler.cache_info()["misses"], 2)
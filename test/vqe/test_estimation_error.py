@@ -0,0 +1,99 @@
+# This code is part of qiskit-runtime.
+#
+# (C) Copyright IBM 2021.
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+
+"""Test the estimation errors of sampled expectation values of the VQE program."""
+
+from unittest import TestCase
+
+import numpy as np
+
+from qiskit import Aer
+from qiskit.circuit.library import EfficientSU2
+from qiskit.opflow import CircuitSampler, ListOp, PauliExpectation, PauliSumOp, StateFn
+from qiskit.utils import QuantumInstance
+
+from qiskit_runtime.vqe import vqe
+
+
+class TestEstimationError(TestCase):
+    """Test the vectorized variances against the variances computed by opflow."""
+
+    def setUp(self):
+        super().setUp()
+        self.shots = 1000
+        self.expectation = PauliExpectation()
+
+        circuit = EfficientSU2(3, reps=1)
+        point = np.random.default_rng(5).uniform(-np.pi, np.pi, circuit.num_parameters)
+        self.circuit = circuit.assign_parameters(point)
+
+        quantum_instance = QuantumInstance(
+            Aer.get_backend("qasm_simulator"),
+            shots=self.shots,
+            seed_simulator=13,
+            seed_transpiler=13,
+        )
+        self.sampler = CircuitSampler(quantum_instance)
+
+    def _sample(self, hamiltonian):
+        """Sample the expectation value of the Hamiltonian with respect to the circuit."""
+        expression = StateFn(hamiltonian, is_measurement=True) @ StateFn(self.circuit)
+        return self.sampler.convert(self.expectation.convert(expression))
+
+    def test_variance(self):
+        """Test the variance against ``PauliExpectation.compute_variance``."""
+        hamiltonians = {
+            "diagonal": PauliSumOp.from_list([("ZZI", 1.0), ("IZZ", -0.5), ("IIZ", 0.3)]),
+            "groups": PauliSumOp.from_list(
+                [("ZZI", 1.0), ("IXX", -0.5), ("YIY", 0.3), ("IIZ", 0.2), ("XXX", 0.7)]
+            ),
+            "single": PauliSumOp.from_list([("XYZ", 2.0)]),
+        }
+
+        for name, hamiltonian in hamiltonians.items():
+            with self.subTest(hamiltonian=name):
+                sampled = self._sample(hamiltonian)
+
+                variance = vqe._sampled_variance(sampled, self.expectation)
+                expected = np.real(self.expectation.compute_variance(sampled))
+
+                self.assertGreater(variance, 0)
+                self.assertAlmostEqual(variance, expected)
+
+    def test_estimation_errors(self):
+        """Test the standard errors of several sampled expectation values."""
+        hamiltonians = [
+            PauliSumOp.from_list([("ZZI", 1.0), ("IXX", -0.5)]),
+            PauliSumOp.from_list([("YIY", 0.3), ("IIZ", 0.2)]),
+        ]
+        operators = [self._sample(hamiltonian) for hamiltonian in hamiltonians]
+
+        errors = vqe._EstimationErrors(operators, self.expectation, self.shots)
+        expected = [
+            np.sqrt(np.real(self.expectation.compute_variance(operator)) / self.shots)
+            for operator in operators
+        ]
+
+        np.testing.assert_allclose(errors(), expected)
+        self.assertAlmostEqual(errors.get(1), expected[1])
+
+    def test_mean_of_repetitions(self):
+        """Test that the variance of the mean over repetitions is divided by their number."""
+        hamiltonian = PauliSumOp.from_list([("ZZI", 1.0), ("IXX", -0.5)])
+        repetitions = [self._sample(hamiltonian) for _ in range(3)]
+        mean = ListOp(repetitions, combo_fn=vqe._mean)
+
+        variances = [np.real(self.expectation.compute_variance(op)) for op in repetitions]
+
+        self.assertAlmostEqual(
+            vqe._sampled_variance(mean, self.expectation), np.mean(variances) / 3
+        )
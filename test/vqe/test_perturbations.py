@@ -0,0 +1,87 @@
+# This code is part of qiskit-runtime.
+#
+# (C) Copyright IBM 2021.
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+
+"""Test the random perturbations of the SPSA optimizers of the VQE program."""
+
+from unittest import TestCase
+
+import numpy as np
+
+from qiskit_runtime.vqe import vqe
+
+
+class TestBernoulliPerturbations(TestCase):
+    """Test the Bernoulli perturbations drawn from a seeded NumPy generator."""
+
+    def test_values_and_shape(self):
+        """Test that the perturbations are ±1 and have the requested shape."""
+        perturbations = vqe.BernoulliPerturbations(7, seed=3)
+
+        for num in [1, 4, 50]:
+            with self.subTest(num=num):
+                samples = perturbations.sample(num)
+
+                self.assertEqual(samples.shape, (num, 7))
+                self.assertTrue(np.all(np.abs(samples) == 1))
+
+        # both signs occur
+        samples = perturbations.sample(100)
+        self.assertEqual(set(np.unique(samples)), {-1, 1})
+
+    def test_perturbation_dims(self):
+        """Test that only the requested number of dimensions is perturbed at once."""
+        perturbations = vqe.BernoulliPerturbations(7, perturbation_dims=2, seed=3)
+        samples = perturbations.sample(20)
+
+        self.assertEqual(samples.shape, (20, 7))
+        np.testing.assert_array_equal(np.count_nonzero(samples, axis=1), 2)
+        self.assertTrue(np.all(np.isin(samples, [-1, 0, 1])))
+
+    def test_seed(self):
+        """Test that seeded perturbations are reproducible and differ for different seeds."""
+        for perturbation_dims in [None, 3]:
+            with self.subTest(perturbation_dims=perturbation_dims):
+                first = vqe.BernoulliPerturbations(6, perturbation_dims, seed=11)
+                second = vqe.BernoulliPerturbations(6, perturbation_dims, seed=11)
+                other = vqe.BernoulliPerturbations(6, perturbation_dims, seed=12)
+
+                samples = [first.sample(5), first.sample(3)]
+                np.testing.assert_array_equal(second.sample(5), samples[0])
+                np.testing.assert_array_equal(second.sample(3), samples[1])
+                self.assertFalse(np.array_equal(other.sample(5), samples[0]))
+
+    def test_pregenerate(self):
+        """Test that pre-generated perturbations equal those drawn on demand."""
+        expected = vqe.BernoulliPerturbations(5, seed=7).sample(10)
+
+        perturbations = vqe.BernoulliPerturbations(5, seed=7)
+        perturbations.pregenerate(6)
+        samples = [perturbations.sample(4), perturbations.sample(4), perturbations.sample(2)]
+
+        # the buffer is used up in the second sample and the generator continues afterwards
+        self.assertEqual([len(sample) for sample in samples], [4, 4, 2])
+        np.testing.assert_array_equal(np.concatenate(samples), expected)
+
+    def test_state(self):
+        """Test that a source restored from its state continues with the same perturbations."""
+        for pregenerate in [False, True]:
+            with self.subTest(pregenerate=pregenerate):
+                perturbations = vqe.BernoulliPerturbations(5, seed=7)
+                if pregenerate:
+                    perturbations.pregenerate(10)
+                perturbations.sample(3)
+
+                restored = vqe.BernoulliPerturbations(5)
+                restored.set_state(perturbations.get_state())
+
+                for num in [4, 6]:
+                    np.testing.assert_array_equal(restored.sample(num), perturbations.sample(num))
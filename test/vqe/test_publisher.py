@@ -0,0 +1,128 @@
+# This code is part of qiskit-runtime.
+#
+# (C) Copyright IBM 2021.
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+
+"""Test the publishers of the interim results of the VQE program."""
+
+import threading
+import time
+from unittest import TestCase
+
+from qiskit_runtime.vqe import vqe
+
+
+class FakeMessenger:
+    """A messenger recording the published messages, which can block the publishing."""
+
+    def __init__(self):
+        self.messages = []
+        self.publishing = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+    def publish(self, message, final=False):
+        """Record the message once publishing is released."""
+        self.publishing.set()
+        self.release.wait()
+        self.messages.append((message, final))
+
+
+class TestBatchedPublisher(TestCase):
+    """Test the batching, the interval and the dropped results of the batched publisher."""
+
+    def setUp(self):
+        super().setUp()
+        self.messenger = FakeMessenger()
+
+    def _batches(self):
+        """The published batches without the dropped counts."""
+        return [message["batch"] for message, _ in self.messenger.messages]
+
+    def test_batch_size(self):
+        """Test that full batches are published and the rest upon closing."""
+        publisher = vqe.BatchedPublisher(self.messenger, interval=60, batch_size=3)
+        for i in range(7):
+            publisher.callback(i, value=i)
+        publisher.close()
+
+        expected = [
+            [[i, {"value": i}] for i in range(start, min(start + 3, 7))] for start in [0, 3, 6]
+        ]
+        self.assertEqual(self._batches(), expected)
+        self.assertFalse(any(final for _, final in self.messenger.messages))
+
+    def test_interval(self):
+        """Test that a batch is published after the interval without closing."""
+        publisher = vqe.BatchedPublisher(self.messenger, interval=0.05, batch_size=100)
+        publisher.callback(1)
+        publisher.callback(2)
+
+        deadline = time.time() + 5
+        while not self.messenger.messages and time.time() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(self._batches(), [[[1], [2]]])
+        publisher.close()
+        self.assertEqual(len(self.messenger.messages), 1)
+
+    def test_dropped(self):
+        """Test that results are dropped if the queue is full and their number is published."""
+        publisher = vqe.BatchedPublisher(
+            self.messenger, interval=60, batch_size=1, max_queue_size=2
+        )
+
+        # block the publisher thread while it publishes the first result
+        self.messenger.release.clear()
+        publisher.callback(0)
+        self.assertTrue(self.messenger.publishing.wait(5))
+
+        for i in range(1, 6):
+            publisher.callback(i)
+        self.assertEqual(publisher.dropped, 3)
+
+        self.messenger.release.set()
+        publisher.close()
+
+        messages = [message for message, _ in self.messenger.messages]
+        self.assertEqual(
+            messages, [{"batch": [[0]]}, {"batch": [[1]], "dropped": 3}, {"batch": [[2]]}]
+        )
+        self.assertEqual(publisher.dropped, 0)
+
+    def test_flush_and_checkpoint(self):
+        """Test that flushing and checkpoints publish the queued results first."""
+        publisher = vqe.BatchedPublisher(self.messenger, interval=60, batch_size=100)
+        publisher.callback(1)
+        publisher.checkpoint({"iteration": 1})
+        publisher.callback(2)
+        publisher.flush()
+
+        messages = [message for message, _ in self.messenger.messages]
+        self.assertEqual(
+            messages, [{"batch": [[1]]}, {"checkpoint": {"iteration": 1}}, {"batch": [[2]]}]
+        )
+        publisher.close()
+
+    def test_lazy_values(self):
+        """Test that lazily computed values are evaluated when published."""
+        publisher = vqe.BatchedPublisher(self.messenger, interval=60, batch_size=100)
+        publisher.callback(1, lambda: 0.5)
+        publisher.close()
+
+        self.assertEqual(self._batches(), [[[1, 0.5]]])
+
+    def test_close(self):
+        """Test that closing twice is possible and publishes nothing new."""
+        publisher = vqe.BatchedPublisher(self.messenger, interval=60, batch_size=100)
+        publisher.close()
+        publisher.close()
+
+        self.assertEqual(self.messenger.messages, [])
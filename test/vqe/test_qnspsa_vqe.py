@@ -0,0 +1,149 @@
+# This code is part of qiskit-runtime.
+#
+# (C) Copyright IBM 2021.
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+
+"""Test the parameter order of the SPSA based VQE of the VQE program."""
+
+from unittest import TestCase
+
+import numpy as np
+
+from qiskit import Aer
+from qiskit.circuit.library import RealAmplitudes
+from qiskit.opflow import PauliSumOp
+from qiskit.quantum_info import Statevector
+
+from qiskit_runtime.vqe import vqe
+
+
+def _energy(circuit, values, operator):
+    """The energy of the circuit with the parameters bound in the order of the circuit."""
+    state = Statevector(circuit.assign_parameters(values))
+    return np.real(state.expectation_value(operator.primitive))
+
+
+class TestParameterOrder(TestCase):
+    """Test that all parameter values are ordered like the parameters of the ansatz.
+
+    The ansatz has more than ten parameters, whose names do not sort like the parameters.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.ansatz = RealAmplitudes(3, reps=3)
+        self.operator = PauliSumOp.from_list([("ZZI", 1.0), ("IXX", -0.5), ("ZIZ", 0.3)])
+        self.initial_point = np.random.default_rng(2).uniform(-np.pi, np.pi, 12)
+        self.backend = Aer.get_backend("statevector_simulator")
+
+    def _vqe(self, **kwargs):
+        """The VQE with few iterations on a statevector simulator."""
+        return vqe.QNSPSAVQE(
+            ansatz=self.ansatz,
+            initial_point=self.initial_point,
+            quantum_instance=self.backend,
+            maxiter=3,
+            learning_rate=0.01,
+            perturbation=0.01,
+            seed=5,
+            **kwargs,
+        )
+
+    def test_ordered_parameters(self):
+        """Test that the parameters of the loss sort like their indices."""
+        parameters = vqe._ordered_parameters(12)
+        self.assertEqual(sorted(parameters, key=lambda p: p.name), parameters)
+
+    def test_evaluate_energies(self):
+        """Test that the evaluated points are ordered like the ansatz parameters."""
+        points = np.array([self.initial_point, -self.initial_point])
+        expected = [_energy(self.ansatz, point, self.operator) for point in points]
+
+        for exact in [False, True]:
+            with self.subTest(exact=exact):
+                energies, _ = self._vqe(exact=exact).evaluate_energies(self.operator, points)
+                np.testing.assert_allclose(energies, expected, atol=1e-8)
+
+    def test_optimal_parameters(self):
+        """Test that the optimal point and parameters give the optimal value."""
+        for natural_spsa, exact in [(False, False), (True, False), (False, True)]:
+            with self.subTest(natural_spsa=natural_spsa, exact=exact):
+                result, _ = self._vqe(
+                    natural_spsa=natural_spsa, exact=exact
+                ).compute_minimum_eigenvalue(self.operator)
+
+                self.assertEqual(list(result.optimal_parameters), list(self.ansatz.parameters))
+                np.testing.assert_allclose(
+                    list(result.optimal_parameters.values()), result.optimal_point
+                )
+                self.assertAlmostEqual(
+                    result.optimal_value,
+                    _energy(self.ansatz, result.optimal_point, self.operator),
+                )
+
+    def test_overlap(self):
+        """Test that the overlaps of QN-SPSA bind the points in the order of the ansatz."""
+        theta = vqe._ordered_parameters(self.ansatz.num_parameters)
+        optimizer = vqe._QNSPSA(overlap_fn=self.ansatz.assign_parameters(theta))
+
+        left = self.initial_point
+        right = self.initial_point + np.linspace(0, 0.5, len(left))
+        values = dict(zip(optimizer.hessian_params[-1], left))
+        values.update(zip(optimizer.hessian_params[0], right))
+        overlap = optimizer.hessian_expr[0].bind_parameters(values).eval()
+
+        left_state = Statevector(self.ansatz.assign_parameters(left))
+        right_state = Statevector(self.ansatz.assign_parameters(right))
+        self.assertAlmostEqual(abs(overlap), abs(left_state.inner(right_state)))
+
+
+class FakeMessenger:
+    """A messenger recording the published messages."""
+
+    def __init__(self):
+        self.messages = []
+
+    def publish(self, message, final=False):
+        """Record the message."""
+        self.messages.append((message, final))
+
+
+class TestEvaluationPoints(TestCase):
+    """Test evaluating points without optimizing."""
+
+    def test_only_evaluation(self):
+        """Test that the points are evaluated and the initial point is kept if maxiter is 0."""
+        ansatz = RealAmplitudes(2, reps=1)
+        operator = PauliSumOp.from_list([("ZZ", 1.0), ("XI", 0.5)])
+        initial_point = np.array([0.1, 0.2, 0.3, 0.4])
+        points = np.random.default_rng(3).uniform(-np.pi, np.pi, (3, 4))
+
+        for name in ["SPSA", "QN-SPSA"]:
+            with self.subTest(optimizer=name):
+                messenger = FakeMessenger()
+                vqe.main(
+                    Aer.get_backend("statevector_simulator"),
+                    messenger,
+                    ansatz=ansatz,
+                    operator=operator,
+                    optimizer={"name": name, "maxiter": 0},
+                    initial_point=initial_point,
+                    evaluation_points=points,
+                )
+
+                result, final = messenger.messages[-1]
+                self.assertTrue(final)
+                np.testing.assert_array_equal(result["optimal_point"], initial_point)
+                self.assertEqual(result["cost_function_evals"], 0)
+                np.testing.assert_allclose(
+                    result["evaluations"]["energies"],
+                    [_energy(ansatz, point, operator) for point in points],
+                    atol=1e-8,
+                )
@@ -0,0 +1,120 @@
+# This code is part of qiskit-runtime.
+#
+# (C) Copyright IBM 2021.
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+
+"""Test the allocation of shots to measurement groups of the VQE program."""
+
+from unittest import TestCase
+
+import numpy as np
+
+from qiskit import Aer
+from qiskit.circuit.library import EfficientSU2
+from qiskit.opflow import CircuitSampler, PauliExpectation, PauliSumOp, StateFn
+from qiskit.utils import QuantumInstance
+
+from qiskit_runtime.vqe import vqe
+
+
+class TestPauliShotAllocator(TestCase):
+    """Test that the shots are allocated in proportion to the group standard deviations."""
+
+    def setUp(self):
+        super().setUp()
+        self.shots = 1000
+        self.resolution = 20
+        self.expectation = PauliExpectation()
+
+        circuit = EfficientSU2(3, reps=1)
+        point = np.random.default_rng(5).uniform(-np.pi, np.pi, circuit.num_parameters)
+        hamiltonian = PauliSumOp.from_list(
+            [("ZZI", 1.0), ("IZZ", -2.0), ("XXI", 0.5), ("IYY", 3.0), ("XIX", -0.2)]
+        )
+        expression = StateFn(hamiltonian, is_measurement=True) @ StateFn(
+            circuit.assign_parameters(point)
+        )
+        self.operator = self.expectation.convert(expression)
+        self.groups = self.operator.oplist
+
+        self.quantum_instance = QuantumInstance(
+            Aer.get_backend("qasm_simulator"), shots=self.shots, seed_simulator=3
+        )
+
+    def _check_allocation(self, allocator, weights):
+        """Check that the repetitions are proportional to the weights and keep the budget."""
+        repetitions = allocator.repetitions
+        num_groups = len(self.groups)
+        self.assertEqual(len(repetitions), num_groups)
+
+        # proportional up to the rounding to integer repetitions
+        ideal = self.resolution * num_groups * np.asarray(weights) / np.sum(weights)
+        self.assertTrue(np.all(np.abs(repetitions - np.maximum(1, ideal)) <= 0.5))
+
+        # the shots of all repetitions sum to the shots without allocation
+        shots = allocator.quantum_instance.run_config.shots
+        budget = self.shots * num_groups
+        self.assertLessEqual(abs(shots * np.sum(repetitions) - budget), np.sum(repetitions) / 2)
+
+        # the original quantum instance keeps its shots
+        self.assertEqual(self.quantum_instance.run_config.shots, self.shots)
+
+    def test_initial_allocation(self):
+        """Test the initial allocation from the norms of the group coefficients."""
+        allocator = vqe.PauliShotAllocator(resolution=self.resolution)
+        allocator.initialize(self.operator, self.quantum_instance)
+        allocated = allocator.allocate()
+
+        norms = [
+            np.linalg.norm(group.oplist[0].primitive.primitive.coeffs) for group in self.groups
+        ]
+        self._check_allocation(allocator, norms)
+
+        # each group is repeated, and the repetitions are averaged
+        self.assertEqual(
+            [len(group.oplist) for group in allocated.oplist], list(allocator.repetitions)
+        )
+
+    def test_observed_allocation(self):
+        """Test the allocation from the observed standard deviations of the groups."""
+        allocator = vqe.PauliShotAllocator(resolution=self.resolution)
+        allocator.initialize(self.operator, self.quantum_instance)
+        allocated = allocator.allocate()
+
+        sampler = CircuitSampler(allocator.quantum_instance)
+        sampled = sampler.convert(allocated)
+        allocator.observe([sampled], self.expectation)
+        allocator.allocate()
+
+        # the standard deviation of each group, including its coefficients
+        stddevs = [
+            np.sqrt(
+                np.mean([np.real(self.expectation.compute_variance(op)) for op in group.oplist])
+            )
+            for group in sampled.oplist
+        ]
+        self.assertTrue(np.all(np.asarray(stddevs) > 0))
+        self._check_allocation(allocator, stddevs)
+
+    def test_state(self):
+        """Test that a restored allocator has the same allocation."""
+        allocator = vqe.PauliShotAllocator(resolution=self.resolution)
+        allocator.initialize(self.operator, self.quantum_instance)
+        allocator.allocate()
+
+        restored = vqe.PauliShotAllocator(resolution=self.resolution)
+        restored.initialize(self.operator, self.quantum_instance)
+        restored.set_state(allocator.get_state())
+        restored.allocated_operator()
+
+        np.testing.assert_array_equal(restored.repetitions, allocator.repetitions)
+        self.assertEqual(
+            restored.quantum_instance.run_config.shots, allocator.quantum_instance.run_config.shots
+        )
@@ -0,0 +1,175 @@
+# This code is part of qiskit-runtime.
+#
+# (C) Copyright IBM 2021.
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+
+"""Test the SPSA optimizers of the VQE program."""
+
+import json
+from unittest import TestCase
+
+import numpy as np
+
+from qiskit.circuit.library import RealAmplitudes
+from qiskit.opflow import PauliSumOp, StateFn
+from qiskit.providers.ibmq.runtime.utils import RuntimeDecoder, RuntimeEncoder
+
+from qiskit_runtime.vqe import vqe
+
+
+def _loss():
+    """The energy of a small Hamiltonian and the exact evaluator of it."""
+    ansatz = RealAmplitudes(2, reps=1)
+    hamiltonian = PauliSumOp.from_list([("ZZ", 1.0), ("XI", -0.5), ("IX", 0.3)])
+    loss = StateFn(hamiltonian, is_measurement=True) @ StateFn(ansatz)
+    return loss, vqe.StatevectorEvaluator(ansatz, hamiltonian)
+
+
+def _serialize(state):
+    """Send the state through the runtime serialization, as for a checkpoint of a job."""
+    return json.loads(json.dumps(state, cls=RuntimeEncoder), cls=RuntimeDecoder)
+
+
+class TestCheckpoints(TestCase):
+    """Test that an optimization resumed from a checkpoint continues like the original one."""
+
+    def setUp(self):
+        super().setUp()
+        self.initial_point = np.array([0.5, -1.0, 2.0, 0.1])
+        self.loss, self.evaluator = _loss()
+
+    def _optimize(self, checkpoints=None, resume_state=None, **options):
+        optimizer = vqe._SPSA(
+            maxiter=12,
+            seed=42,
+            checkpoint_interval=4,
+            checkpoint_callback=None if checkpoints is None else checkpoints.append,
+            resume_state=resume_state,
+            evaluator=self.evaluator,
+            **options,
+        )
+        result = optimizer.optimize(
+            len(self.initial_point), self.loss, initial_point=self.initial_point
+        )
+        return optimizer, result
+
+    def test_resume(self):
+        """Test resuming from a checkpoint with the histories of all checkpoints."""
+        configurations = [
+            {},
+            {"learning_rate": 0.1, "perturbation": 0.05},
+            {"blocking": True, "allowed_increase": 0.1},
+            {"second_order": True},
+            {"resamplings": "adaptive", "max_resamplings": 4},
+            {"pregenerate_perturbations": True, "history_stride": 3, "last_avg": 3},
+        ]
+
+        for options in configurations:
+            with self.subTest(**options):
+                checkpoints = []
+                optimizer, result = self._optimize(checkpoints, **options)
+                self.assertEqual([state["iteration"] for state in checkpoints], [4, 8, 12])
+
+                checkpoints = [_serialize(state) for state in checkpoints]
+                resume_state = dict(checkpoints[1])
+                resume_state["history"] = [state["history"] for state in checkpoints[:2]]
+                resumed, resumed_result = self._optimize(resume_state=resume_state, **options)
+
+                np.testing.assert_allclose(resumed_result[0], result[0])
+                self.assertAlmostEqual(resumed_result[1], result[1])
+                self.assertEqual(resumed_result[2], result[2])
+
+                history, resumed_history = optimizer.history.to_dict(), resumed.history.to_dict()
+                np.testing.assert_allclose(resumed_history["loss"], history["loss"])
+                np.testing.assert_allclose(resumed_history["params"], history["params"])
+                for key in ["iterations", "stride", "stop_reason", "resamplings"]:
+                    self.assertEqual(resumed_history.get(key), history.get(key))
+
+    def test_checkpoint_history(self):
+        """Test that each checkpoint holds the history since the previous checkpoint."""
+        checkpoints = []
+        optimizer, _ = self._optimize(checkpoints, history_stride=3)
+
+        self.assertEqual([state["history"]["start"] for state in checkpoints], [0, 2, 3])
+        self.assertEqual([len(state["history"]["loss"]) for state in checkpoints], [2, 1, 1])
+
+        history = vqe.OptimizerHistory.from_dict(
+            [state["history"] for state in checkpoints], len(self.initial_point)
+        )
+        np.testing.assert_allclose(history.to_dict()["loss"], optimizer.history.to_dict()["loss"])
+
+        # the last checkpoint alone only restores its own records
+        last = vqe.OptimizerHistory.from_dict(checkpoints[-1]["history"], len(self.initial_point))
+        self.assertEqual(last.to_dict()["start"], 3)
+        self.assertEqual(len(last), 1)
+
+        with self.assertRaises(ValueError):
+            vqe.OptimizerHistory.from_dict(
+                [checkpoints[0]["history"], checkpoints[2]["history"]], len(self.initial_point)
+            )
+
+
+class _LinearEvaluator:
+    """An evaluator of the linear loss ``x -> gradient @ x``."""
+
+    def __init__(self, gradient):
+        self.gradient = np.asarray(gradient)
+
+    def energies(self, points):
+        """The loss at each point."""
+        return np.asarray(points) @ self.gradient
+
+
+class TestGradient(TestCase):
+    """Test the SPSA gradient estimate."""
+
+    def test_resampled_gradient(self):
+        """Test that each resampling uses its own perturbation in the gradient estimate."""
+        loss, _ = _loss()
+        gradient = np.array([1.0, -2.0, 0.5, 3.0])
+        optimizer = vqe._SPSA(maxiter=1, evaluator=_LinearEvaluator(gradient))
+        optimizer._nfev = 0
+
+        x = np.array([0.1, 0.2, 0.3, 0.4])
+        deltas = np.array([[1, 1, -1, 1], [-1, 1, 1, 1], [1, -1, 1, -1]])
+        estimate, _, fval, samples = optimizer._point_samples(loss, x, 0.1, deltas, deltas)
+
+        # for a linear loss the i-th sample is (gradient @ delta_i) * delta_i
+        expected_samples = (deltas @ gradient).reshape(-1, 1) * deltas
+        np.testing.assert_allclose(samples, expected_samples)
+        np.testing.assert_allclose(estimate, np.mean(expected_samples, axis=0))
+        self.assertAlmostEqual(fval, gradient @ x)
+        self.assertEqual(optimizer._nfev, 6)
+
+
+class TestWithoutIterations(TestCase):
+    """Test the optimizers without iterations, e.g. if only points are evaluated."""
+
+    def test_no_evaluations(self):
+        """Test that the loss is only evaluated at the returned initial point."""
+        evaluations = []
+
+        def loss(x):
+            evaluations.append(x)
+            return np.sum(x ** 2)
+
+        initial_point = np.array([0.5, -1.0])
+        for options in [{}, {"blocking": True}, {"last_avg": 3}]:
+            with self.subTest(**options):
+                evaluations.clear()
+                optimizer = vqe._SPSA(maxiter=0, **options)
+                x, fx, nfev = optimizer.optimize(2, loss, initial_point=initial_point)
+
+                # the final loss is the only evaluation, there is no calibration
+                np.testing.assert_array_equal(x, initial_point)
+                self.assertEqual(fx, 1.25)
+                self.assertEqual(len(evaluations), 1)
+                self.assertEqual(nfev, 0)
+                self.assertEqual(len(optimizer.history), 0)
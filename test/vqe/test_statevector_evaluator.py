@@ -0,0 +1,101 @@
+# This code is part of qiskit-runtime.
+#
+# (C) Copyright IBM 2021.
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+
+"""Test the exact statevector evaluator of the VQE program."""
+
+from unittest import TestCase
+
+import numpy as np
+
+from qiskit.circuit import Parameter, QuantumCircuit
+from qiskit.circuit.library import EfficientSU2
+from qiskit.opflow import PauliSumOp
+from qiskit.quantum_info import Statevector
+
+from qiskit_runtime.vqe import vqe
+
+
+def _hamiltonian():
+    """A small Hamiltonian with X, Y and Z terms."""
+    return PauliSumOp.from_list([("ZZI", 1.0), ("IXX", -0.5), ("YIY", 0.3), ("IIZ", 0.2)])
+
+
+def _reference_energy(circuit, parameters, point, operator):
+    """The expectation value of the statevector simulated by Qiskit."""
+    state = Statevector(circuit.assign_parameters(dict(zip(parameters, point))))
+    return np.real(state.expectation_value(operator.primitive))
+
+
+class TestStatevectorEvaluator(TestCase):
+    """Test the batched statevector simulation against the Qiskit statevectors."""
+
+    def setUp(self):
+        super().setUp()
+        self.circuit = EfficientSU2(3, reps=2)
+        self.parameters = sorted(self.circuit.parameters, key=lambda p: p.name)
+        self.points = np.random.default_rng(12).uniform(-np.pi, np.pi, (5, len(self.parameters)))
+
+    def test_energies(self):
+        """Test the energies of a batch of points."""
+        operator = _hamiltonian()
+        evaluator = vqe.StatevectorEvaluator(self.circuit, operator)
+
+        energies = evaluator.energies(self.points)
+        expected = [
+            _reference_energy(self.circuit, self.parameters, point, operator)
+            for point in self.points
+        ]
+
+        np.testing.assert_allclose(energies, expected, atol=1e-10)
+
+    def test_statevectors(self):
+        """Test the statevectors, including the global phase."""
+        evaluator = vqe.StatevectorEvaluator(self.circuit, _hamiltonian())
+
+        states = evaluator.statevectors(self.points)
+        for state, point in zip(states, self.points):
+            bound = self.circuit.assign_parameters(dict(zip(self.parameters, point)))
+            np.testing.assert_allclose(state, Statevector(bound).data, atol=1e-10)
+
+    def test_parameter_order_and_expressions(self):
+        """Test given parameters and angles which are not affine in the parameters."""
+        a, b = Parameter("a"), Parameter("b")
+        circuit = QuantumCircuit(2)
+        circuit.h(0)
+        circuit.ry(a * b, 0)
+        circuit.rx(2 * b + 1, 1)
+        circuit.cx(0, 1)
+        circuit.rz(a.sin(), 1)
+        operator = PauliSumOp.from_list([("ZZ", 1.0), ("XI", 0.5)])
+
+        evaluator = vqe.StatevectorEvaluator(circuit, operator, parameters=[b, a])
+
+        points = np.random.default_rng(3).uniform(-2, 2, (4, 2))
+        expected = [_reference_energy(circuit, [b, a], point, operator) for point in points]
+        np.testing.assert_allclose(evaluator.energies(points), expected, atol=1e-10)
+
+    def test_expectation_values_and_overlaps(self):
+        """Test the expectation values of another operator and the state overlaps."""
+        evaluator = vqe.StatevectorEvaluator(self.circuit, _hamiltonian())
+        states = evaluator.statevectors(self.points)
+        other = PauliSumOp.from_list([("XYZ", 0.7), ("ZII", -1.0)])
+
+        values = evaluator.expectation_values(states, other)
+        expected = [
+            np.real(Statevector(state).expectation_value(other.primitive)) for state in states
+        ]
+        np.testing.assert_allclose(values, expected, atol=1e-10)
+
+        left = np.repeat(self.points[:1], len(self.points), axis=0)
+        overlaps = evaluator.overlaps(left, self.points)
+        expected = np.abs(states @ np.conj(states[0]))
+        np.testing.assert_allclose(overlaps, expected, atol=1e-10)
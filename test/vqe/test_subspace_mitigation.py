@@ -0,0 +1,118 @@
+# This code is part of qiskit-runtime.
+#
+# (C) Copyright IBM 2021.
+#
+# This code is licensed under the Apache License, Version 2.0. You may
+# obtain a copy of this license in the LICENSE.txt file in the root directory
+# of this source tree or at http://www.apache.org/licenses/LICENSE-2.0.
+#
+# Any modifications or derivative works of this code must retain this
+# copyright notice, and modified files need to carry a notice indicating
+# that they have been altered from the originals.
+
+"""Test the readout error mitigation in the subspace of the observed bitstrings."""
+
+from functools import reduce
+from unittest import TestCase
+
+import numpy as np
+
+from qiskit import Aer, QuantumCircuit
+from qiskit.providers.aer.noise import NoiseModel, ReadoutError
+
+from qiskit_runtime.vqe import vqe
+
+# the probabilities to read 1 if 0 is prepared and to read 0 if 1 is prepared on each qubit
+READOUT_ERRORS = [(0.02, 0.08), (0.05, 0.1), (0.03, 0.04)]
+
+
+def _noise_model():
+    """A noise model with the readout errors of each qubit."""
+    noise_model = NoiseModel()
+    for qubit, (p01, p10) in enumerate(READOUT_ERRORS):
+        error = ReadoutError([[1 - p01, p01], [p10, 1 - p10]])
+        noise_model.add_readout_error(error, [qubit])
+
+    return noise_model
+
+
+def _ghz():
+    """A three qubit GHZ state, whose ideal counts are 000 and 111 with equal probability."""
+    circuit = QuantumCircuit(3)
+    circuit.h(0)
+    circuit.cx(0, 1)
+    circuit.cx(1, 2)
+    circuit.measure_all()
+    return circuit
+
+
+class TestSubspaceMitigation(TestCase):
+    """Test that the mitigated counts recover the ideal distribution."""
+
+    def test_injected_calibration(self):
+        """Test that the counts of a known readout error are corrected exactly."""
+        quantum_instance = vqe.SubspaceMitigatedQuantumInstance(Aer.get_backend("qasm_simulator"))
+        quantum_instance._readout_errors = dict(enumerate(READOUT_ERRORS))
+
+        # the readout matrix of all qubits, the first qubit is the least significant bit
+        matrices = [np.array([[1 - p01, p10], [p01, 1 - p10]]) for p01, p10 in READOUT_ERRORS]
+        readout_matrix = reduce(np.kron, matrices[::-1])
+
+        ideal = np.random.default_rng(4).dirichlet(np.ones(8))
+        noisy = readout_matrix.dot(ideal) * 1000
+        counts = {format(i, "03b"): value for i, value in enumerate(noisy)}
+
+        # solved directly and iteratively, up to the tolerance of the iterative solver
+        for direct_limit, rtol in [(1000, 1e-10), (0, 1e-4)]:
+            with self.subTest(direct_limit=direct_limit):
+                quantum_instance.direct_limit = direct_limit
+                mitigated = quantum_instance._mitigate(counts, [0, 1, 2])
+
+                self.assertEqual(set(mitigated), set(counts))
+                np.testing.assert_allclose(
+                    [mitigated[format(i, "03b")] for i in range(8)], ideal * 1000, rtol=rtol
+                )
+
+    def test_noisy_simulator(self):
+        """Test the mitigation of a GHZ state measured with readout errors."""
+        shots = 20000
+        backend = Aer.get_backend("qasm_simulator")
+        noisy = vqe.SubspaceMitigatedQuantumInstance(
+            backend, shots=shots, noise_model=_noise_model(), seed_simulator=7, seed_transpiler=7
+        )
+        raw = dict(
+            backend.run(_ghz(), shots=shots, noise_model=_noise_model(), seed_simulator=7)
+            .result()
+            .get_counts()
+        )
+        mitigated = noisy.execute(_ghz()).get_counts()
+
+        # the readout errors are calibrated per qubit
+        for qubit, (p01, p10) in enumerate(READOUT_ERRORS):
+            self.assertAlmostEqual(noisy._readout_errors[qubit][0], p01, delta=0.01)
+            self.assertAlmostEqual(noisy._readout_errors[qubit][1], p10, delta=0.01)
+
+        # the mitigated counts stay on the measured bitstrings and recover the ideal ones
+        self.assertTrue(set(mitigated).issubset(raw))
+        self.assertAlmostEqual(sum(mitigated.values()), shots)
+        for bitstring in ["000", "111"]:
+            self.assertAlmostEqual(mitigated[bitstring] / shots, 0.5, delta=0.02)
+            self.assertLess(
+                abs(mitigated[bitstring] / shots - 0.5), abs(raw[bitstring] / shots - 0.5)
+            )
+
+        others = sum(value for key, value in mitigated.items() if key not in ["000", "111"])
+        self.assertLess(others / shots, 0.02)
+
+    def test_statevector(self):
+        """Test that statevector simulations are not mitigated."""
+        quantum_instance = vqe.SubspaceMitigatedQuantumInstance(
+            Aer.get_backend("statevector_simulator")
+        )
+        circuit = _ghz().remove_final_measurements(inplace=False)
+        result = quantum_instance.execute(circuit)
+
+        self.assertEqual(quantum_instance._readout_errors, {})
+        np.testing.assert_allclose(
+            np.abs(result.get_statevector()) ** 2, [0.5, 0, 0, 0, 0, 0, 0, 0.5], atol=1e-10
+        )